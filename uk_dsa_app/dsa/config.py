@@ -20,6 +20,11 @@ FREQ_TO_PANDAS = {
     "quarterly": "Q",
     "yearly": "Y",
 }
+PERIODS_PER_YEAR = {
+    "monthly": 12,
+    "quarterly": 4,
+    "yearly": 1,
+}
 
 # Units known by the app
 UNITS = {
@@ -53,6 +58,15 @@ class MonteCarloDefaults:
     corr_rg: float = 0.4
     corr_rpb: float = 0.2
     corr_gpb: float = -0.3
+    # Shock distribution: 'gaussian', 'student_t' or 'regime'
+    shock_dist: str = "gaussian"
+    t_df: float = 5.0
+    # Two-state (calm/crisis) volatility regime
+    regime_p_enter: float = 0.05
+    regime_p_exit: float = 0.25
+    regime_crisis_scale: float = 2.5
+    # Share of the debt stock in index-linked gilts (accretes with inflation)
+    il_share: float = 0.25
 
 MC_DEFAULTS = MonteCarloDefaults()
 
@@ -98,4 +112,19 @@ _hide_logo = os.getenv("DSA_HIDE_LOGO", "").lower() in {"1", "true", "yes", "on"
 IMPERIAL_LOGO_PATH: Optional[str] = None if _hide_logo or not _logo_candidate.exists() else str(_logo_candidate)
 STYLE_CSS_PATH = str((_BASE_DIR / "assets" / "styles.css").resolve())
 
+def user_data_dir() -> Path:
+    """
+    Per-user directory for files that should outlive a session (e.g. the results store):
+    %APPDATA%/uk_dsa on Windows, else $XDG_DATA_HOME/uk_dsa (default ~/.local/share/uk_dsa).
+    Created on first use; DSA_DATA_DIR overrides.
+    """
+    if os.getenv("DSA_DATA_DIR"):
+        base = Path(os.environ["DSA_DATA_DIR"])
+    elif os.name == "nt" and os.getenv("APPDATA"):
+        base = Path(os.environ["APPDATA"]) / "uk_dsa"
+    else:
+        base = Path(os.getenv("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "uk_dsa"
+    base.mkdir(parents=True, exist_ok=True)
+    return base
+
 DEFAULT_HORIZON = 2035
\ No newline at end of file
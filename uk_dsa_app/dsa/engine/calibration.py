@@ -3,6 +3,10 @@ from typing import Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
 from statsmodels.tsa.api import VAR
+import statsmodels.api as sm
+from ..config import FREQ_TO_PANDAS, PERIODS_PER_YEAR
+from ..timeseries import FREQ_RANK, period_freq, resample_periods
+from .dsa_math import annualize_rate
 
 def calibrate_var(
     df: pd.DataFrame,
@@ -33,6 +37,29 @@ def calibrate_var(
     except Exception:
         return {}
 
+def estimate_fiscal_reaction(pb_ratio: pd.Series, b_ratio: pd.Series, min_obs: int = 10) -> Dict:
+    """
+    Bohn-style fiscal reaction function estimated by OLS:
+    pb_t = alpha + beta * b_{t-1} + u_t
+    beta > 0 means the primary balance responds to higher debt.
+    Returns dict with alpha, beta, their standard errors, residual sigma and nobs.
+    """
+    df = pd.concat([pb_ratio.rename("pb"), b_ratio.shift(1).rename("b_lag")], axis=1).dropna()
+    if len(df) < min_obs:
+        return {}
+    try:
+        res = sm.OLS(df["pb"], sm.add_constant(df["b_lag"])).fit()
+        return {
+            "alpha": float(res.params["const"]),
+            "beta": float(res.params["b_lag"]),
+            "alpha_se": float(res.bse["const"]),
+            "beta_se": float(res.bse["b_lag"]),
+            "sigma": float(np.sqrt(res.scale)),
+            "nobs": int(res.nobs),
+        }
+    except Exception:
+        return {}
+
 def compute_effective_r_from_interest_and_debt(interest_bn: pd.Series, psnd_bn: pd.Series) -> pd.Series:
     psnd_y = psnd_bn
     avg_debt = (psnd_y.shift(1) + psnd_y) / 2.0
@@ -47,4 +74,75 @@ def implied_pb_ratio(psnb_bn: pd.Series, interest_bn: pd.Series, gdp_bn: pd.Seri
     """
     pb_bn = -(psnb_bn - interest_bn)
     pb_ratio = (pb_bn / gdp_bn).rename("pb_ratio")
-    return pb_ratio
\ No newline at end of file
+    return pb_ratio
+
+def stock_at_freq(stock: pd.Series, freq: str) -> pd.Series:
+    """
+    Stock variable at freq: end-of-period value when aggregating, held constant when expanding.
+    """
+    return resample_periods(stock, freq, how="last")
+
+def flow_at_freq(flow: pd.Series, freq: str) -> pd.Series:
+    """
+    Flow variable at freq: summed when aggregating, split evenly when expanding.
+    """
+    src = period_freq(flow.index)
+    if FREQ_RANK[src] < FREQ_RANK[freq]:
+        return resample_periods(flow, freq) / (PERIODS_PER_YEAR[freq] // PERIODS_PER_YEAR[src])
+    return resample_periods(flow, freq, how="sum")
+
+def inflation_at_freq(price_index: pd.Series, freq: str) -> pd.Series:
+    """
+    Annualized inflation rate at freq from a price index (CPI or GDP deflator) at any frequency:
+    period-on-period change of the period-average index when the index is at least as frequent as freq,
+    otherwise the index's own annualized rate held constant within each of its periods.
+    """
+    src = period_freq(price_index.index)
+    if FREQ_RANK[src] >= FREQ_RANK[freq]:
+        p = resample_periods(price_index, freq, how="mean")
+        return annualize_rate(p / p.shift(1) - 1.0, PERIODS_PER_YEAR[freq]).dropna().rename("inflation")
+    pi = annualize_rate(price_index / price_index.shift(1) - 1.0, PERIODS_PER_YEAR[src]).dropna()
+    return resample_periods(pi, freq).rename("inflation")
+
+def rolling_annual_gdp(gdp: pd.Series, freq: str) -> pd.Series:
+    """
+    Annual GDP level at freq: rolling sum of the last year of GDP at its own frequency,
+    then carried to freq. Denominator for sub-annual flow-to-GDP ratios.
+    When freq is finer than GDP, the level is interpolated log-linearly between period ends.
+    """
+    src = period_freq(gdp.index)
+    m_src = PERIODS_PER_YEAR[src]
+    y_ann = (gdp.rolling(m_src, min_periods=m_src).sum() if m_src > 1 else gdp).dropna()
+    if y_ann.empty or FREQ_RANK[src] >= FREQ_RANK[freq]:
+        return stock_at_freq(y_ann, freq)
+    code = FREQ_TO_PANDAS[freq]
+    anchors = pd.Series(y_ann.to_numpy(dtype=float), index=y_ann.index.asfreq(code, how="end"))
+    idx = pd.period_range(start=anchors.index[0], end=anchors.index[-1], freq=code)
+    return np.exp(np.log(anchors).reindex(idx).interpolate()).rename(gdp.name)
+
+def native_frequency_inputs(
+    psnd_bn: pd.Series, psnb_bn: pd.Series, interest_bn: pd.Series, gdp_bn: pd.Series, freq: str
+) -> pd.DataFrame:
+    """
+    Model inputs at a native (monthly / quarterly / yearly) frequency:
+    - debt_ratio: end-of-period PSND over rolling annual GDP
+    - effective_r, nominal_g: annualized rates (engines de-annualize them)
+    - pb_ratio, sfa_ratio: per-period flows over rolling annual GDP
+    Inputs are PeriodIndex series at any supported frequency.
+    """
+    m = PERIODS_PER_YEAR[freq]
+    D = stock_at_freq(psnd_bn, freq)
+    B = flow_at_freq(psnb_bn, freq)
+    interest = flow_at_freq(interest_bn, freq)
+    Y = rolling_annual_gdp(gdp_bn, freq)
+    idx = D.index.intersection(B.index).intersection(interest.index).intersection(Y.index)
+    D, B, interest, Y = D.reindex(idx), B.reindex(idx), interest.reindex(idx), Y.reindex(idx)
+    avg_debt = (D.shift(1) + D) / 2.0
+    out = pd.concat([
+        (D / Y).rename("debt_ratio"),
+        annualize_rate(interest / avg_debt, m).rename("effective_r"),
+        annualize_rate(Y / Y.shift(1) - 1.0, m).rename("nominal_g"),
+        (-(B - interest) / Y).rename("pb_ratio"),
+        ((D.diff() - B) / Y).rename("sfa_ratio"),
+    ], axis=1)
+    return out
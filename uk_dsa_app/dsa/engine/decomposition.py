@@ -0,0 +1,132 @@
+from __future__ import annotations
+from typing import Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+from .dsa_math import deannualize_rate
+
+# Change in the debt ratio split as in debt_dynamics:
+# b_t - b_{t-1} = (r_t - g_t) / (1 + g_t) * b_{t-1} - pb_t + sfa_t (+ residual for observed data)
+COMPONENTS = ("interest_growth", "primary_balance", "sfa", "residual")
+COMPONENT_LABELS = {"interest_growth": "r − g", "primary_balance": "Primary balance", "sfa": "SFA", "residual": "Other"}
+
+def contributions(b0, b: np.ndarray, r: np.ndarray, g: np.ndarray, pb: np.ndarray, sfa: np.ndarray,
+                  periods_per_year: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Per-period contributions to the change in the debt ratio along the last axis.
+    b, r, g (annual rates), pb, sfa broadcast against each other, e.g. (n_paths, n_steps) paths
+    with (n_steps,) sfa; b0 is a scalar or one value per path.
+    Returns {'change', plus one array per component} all shaped like b.
+    """
+    b = np.asarray(b, dtype=float)
+    first = np.broadcast_to(np.asarray(b0, dtype=float)[..., None] if np.ndim(b0) else b0, b.shape[:-1] + (1,))
+    b_prev = np.concatenate([first, b[..., :-1]], axis=-1)
+    rr = deannualize_rate(np.asarray(r, dtype=float), periods_per_year)
+    gg = deannualize_rate(np.asarray(g, dtype=float), periods_per_year)
+    out = {"change": b - b_prev,
+           "interest_growth": (rr - gg) / (1.0 + gg) * b_prev,
+           "primary_balance": np.broadcast_to(-np.asarray(pb, dtype=float), b.shape),
+           "sfa": np.broadcast_to(np.asarray(sfa, dtype=float), b.shape)}
+    out["residual"] = out["change"] - out["interest_growth"] - out["primary_balance"] - out["sfa"]
+    return out
+
+def _to_years(contrib: Dict[str, np.ndarray], dates: pd.PeriodIndex):
+    # Sum sub-annual contributions within each calendar year (changes add up); edge years may be partial
+    years = np.asarray(dates.year)
+    starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+    out = {k: np.add.reduceat(v, starts, axis=-1) for k, v in contrib.items()}
+    return out, pd.PeriodIndex(years[starts], freq="Y")
+
+def _tidy(contrib: Dict[str, np.ndarray], dates: pd.PeriodIndex, paths: bool) -> pd.DataFrame:
+    comps = ["change"] + list(COMPONENTS)
+    stacked = np.stack([np.asarray(contrib[c]) for c in comps])  # (C, [P,] T)
+    cols = {"component": pd.Categorical(np.repeat(comps, stacked[0].size), categories=comps)}
+    if paths:
+        n_paths, n_t = stacked.shape[1:]
+        cols["path"] = np.tile(np.repeat(np.arange(n_paths), n_t), len(comps))
+    cols["period"] = np.tile(np.asarray(dates.astype(str)), stacked[0].size // len(dates) * len(comps))
+    cols["value"] = stacked.ravel()
+    return pd.DataFrame(cols)[["path", "period", "component", "value"] if paths else ["period", "component", "value"]]
+
+def decompose_history(
+    b: pd.Series, r: pd.Series, g: pd.Series, pb: pd.Series, sfa: Optional[pd.Series] = None,
+    periods_per_year: int = 1, annual: bool = True,
+) -> pd.DataFrame:
+    """
+    Observed debt-ratio changes split into r − g, primary balance, SFA and a residual
+    (the gap between the observed change and the identity). Tidy table: period, component, value.
+    With annual=True sub-annual contributions are summed by calendar year.
+    """
+    idx = b.dropna().index.intersection(r.dropna().index).intersection(g.dropna().index).intersection(pb.dropna().index)
+    if len(idx) < 2:
+        return pd.DataFrame(columns=["period", "component", "value"])
+    s = np.zeros(len(idx)) if sfa is None else sfa.reindex(idx).fillna(0.0).to_numpy(dtype=float)
+    bv = b.reindex(idx).to_numpy(dtype=float)
+    c = contributions(bv[0], bv[1:], r.reindex(idx).to_numpy(dtype=float)[1:], g.reindex(idx).to_numpy(dtype=float)[1:],
+                      pb.reindex(idx).to_numpy(dtype=float)[1:], s[1:], periods_per_year)
+    dates = idx[1:]
+    if annual and periods_per_year > 1:
+        c, dates = _to_years(c, dates)
+    return _tidy(c, dates, paths=False)
+
+def decompose_paths(
+    b0: float, paths: np.ndarray, drivers: Dict[str, np.ndarray], sfa: Optional[np.ndarray], dates: pd.PeriodIndex,
+    periods_per_year: int = 1, quantiles: Sequence[float] = (5, 50, 95), band: float = 5.0,
+    annual: bool = True, tidy: bool = True,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Decomposition for every simulated path and horizon year in one pass.
+    paths: (n_paths, n_dates) debt ratios; drivers: {'effective_r', 'nominal_g', 'pb_ratio'} arrays of the
+    same shape (mc_distribution(..., return_drivers=True)); sfa: (n_dates,) or None.
+    Returns {'table': tidy path, period, component, value (if tidy), 'by_quantile': for paths whose terminal
+    debt lies within ±band/2 percentiles of each quantile, the average cumulative contribution of each
+    component over the horizon, with start and end levels (rows feed waterfall_inputs)}.
+    """
+    s = np.zeros(paths.shape[-1]) if sfa is None else np.asarray(sfa, dtype=float)
+    c = contributions(b0, paths, drivers["effective_r"], drivers["nominal_g"], drivers["pb_ratio"], s, periods_per_year)
+    if annual and periods_per_year > 1:
+        c, dates = _to_years(c, dates)
+    out = {}
+    if tidy:
+        out["table"] = _tidy(c, dates, paths=True)
+    terminal = paths[:, -1]
+    ok = np.isfinite(terminal)
+    total = {k: c[k].sum(axis=-1) for k in COMPONENTS}
+    rows = {}
+    for q in quantiles:
+        lo, hi = np.nanpercentile(terminal, [max(q - band / 2, 0.0), min(q + band / 2, 100.0)])
+        sel = ok & (terminal >= lo) & (terminal <= hi)
+        row = {"start": float(b0)}
+        row.update({k: float(total[k][sel].mean()) if sel.any() else np.nan for k in COMPONENTS})
+        row["end"] = float(terminal[sel].mean()) if sel.any() else np.nan
+        row["n_paths"] = int(sel.sum())
+        rows[str(q)] = row
+    out["by_quantile"] = pd.DataFrame.from_dict(rows, orient="index")
+    out["by_quantile"].index.name = "quantile"
+    return out
+
+def cumulative_contributions(table: pd.DataFrame, b: pd.Series, start: Optional[str] = None, end: Optional[str] = None) -> pd.Series:
+    """
+    Sum of a history table (decompose_history) over periods start..end per component, with the
+    debt ratio at the end of the window and the implied start level (end minus the summed changes).
+    """
+    sel = table
+    if start is not None:
+        sel = sel[sel["period"] >= start]
+    if end is not None:
+        sel = sel[sel["period"] <= end]
+    sums = sel.groupby("component", observed=False)["value"].sum()
+    obs = b.dropna()
+    last = obs[obs.index.start_time <= pd.Period(sel["period"].max()).end_time] if not sel.empty else obs.iloc[:0]
+    level = float(last.iloc[-1]) if not last.empty else np.nan
+    row = pd.Series({k: float(sums[k]) for k in COMPONENTS})
+    row["start"] = level - float(sums["change"])
+    row["end"] = level
+    return row
+
+def waterfall_inputs(row: pd.Series) -> Dict[str, list]:
+    """
+    labels / values / measure for plotting.waterfall from a by_quantile row (start, components, end).
+    """
+    labels = ["Start"] + [COMPONENT_LABELS[k] for k in COMPONENTS] + ["End"]
+    values = [float(row["start"])] + [float(row[k]) for k in COMPONENTS] + [float(row["end"])]
+    return {"labels": labels, "values": values, "measure": ["absolute"] + ["relative"] * len(COMPONENTS) + ["total"]}
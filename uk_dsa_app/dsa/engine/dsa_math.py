@@ -3,6 +3,52 @@ from typing import Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+def deannualize_rate(rate, periods_per_year: int = 1):
+    """
+    Convert an annual rate to the per-period rate: (1 + rate)^(1/m) - 1.
+    Works on floats, numpy arrays and pandas Series.
+    """
+    if periods_per_year == 1:
+        return rate
+    return (1.0 + rate) ** (1.0 / periods_per_year) - 1.0
+
+def annualize_rate(rate, periods_per_year: int = 1):
+    """
+    Inverse of deannualize_rate: (1 + rate)^m - 1.
+    """
+    if periods_per_year == 1:
+        return rate
+    return (1.0 + rate) ** periods_per_year - 1.0
+
+def debt_recursion(b0, growth_factor: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """
+    Closed form of b_t = a_t * b_{t-1} + f_t along the last axis:
+    b_t = P_t * (b0 + sum_{s<=t} f_s / P_s), P_t = prod_{s<=t} a_s.
+    Broadcasts over leading axes (paths, scenarios).
+    """
+    P = np.cumprod(growth_factor, axis=-1)
+    b0 = np.asarray(b0, dtype=float)[..., None] if np.ndim(b0) else b0
+    return P * (b0 + np.cumsum(flows / P, axis=-1))
+
+def index_linked_recursion(b0, growth_conv: np.ndarray, growth_il: np.ndarray, flows: np.ndarray, il_share: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Debt split into conventional and index-linked stocks: both start at shares (1 - s, s) of b0 and new
+    borrowing is issued in the same proportions, each stock compounding at its own growth factor.
+    Broadcasts like debt_recursion. Returns (conventional, index_linked); their sum is the debt ratio.
+    """
+    s = float(il_share)
+    return (debt_recursion((1.0 - s) * np.asarray(b0, dtype=float), growth_conv, (1.0 - s) * flows),
+            debt_recursion(s * np.asarray(b0, dtype=float), growth_il, s * flows))
+
+def _carry_onto(s: pd.Series, idx: pd.PeriodIndex, name: str) -> np.ndarray:
+    # Values on idx, carrying the last observation forward (e.g. historical CPI onto projection years)
+    obs = s.dropna()
+    if obs.empty:
+        raise ValueError(f"{name} has no observations.")
+    if isinstance(obs.index, pd.PeriodIndex) and isinstance(idx, pd.PeriodIndex) and obs.index.freqstr != idx.freqstr:
+        raise ValueError(f"{name} is at frequency {obs.index.freqstr}, the projection at {idx.freqstr}.")
+    return obs.reindex(obs.index.union(idx)).ffill().bfill().reindex(idx).to_numpy(dtype=float)
+
 def debt_dynamics(
     b0: float,
     r: pd.Series,
@@ -10,46 +56,60 @@ def debt_dynamics(
     pb: pd.Series,
     sfa: Optional[pd.Series] = None,
     start_year: Optional[int] = None,
+    periods_per_year: int = 1,
+    il_share: float = 0.0,
+    inflation: Optional[pd.Series] = None,
+    inflation_expected: Optional[pd.Series] = None,
 ) -> pd.Series:
     """
     Core debt dynamics in ratios:
     b_t = (1 + r_t) / (1 + g_t) * b_{t-1} - pb_t + sfa_t_ratio
     pb_t is primary balance in ratio (positive reduces debt).
     sfa_t_ratio is stock-flow adjustment as ratio of GDP (optional).
-    r and g are nominal rates (ratios), aligned yearly.
+    r and g are nominal annual rates (ratios), aligned on the projection index.
+    At sub-annual frequencies (periods_per_year 4 or 12) r and g are de-annualized,
+    and pb, sfa are per-period flows over rolling annual GDP.
+    Index-linked channel: with il_share > 0 and an annual inflation path, the index-linked part of the
+    stock pays r plus the inflation surprise (inflation - inflation_expected; expected defaults to the
+    mean of the path), so unexpected inflation accretes on that stock while conventional debt pays r.
+    Inflation inputs at the projection frequency that stop before (or start after) the projection
+    are carried onto it from the nearest observation; a series with no observations raises ValueError.
     """
     idx = r.index.intersection(g.index)
     idx = idx.intersection(pb.index)
     if sfa is not None:
         idx = idx.intersection(sfa.index)
-    r = r.reindex(idx).fillna(method="ffill")
-    g = g.reindex(idx).fillna(method="ffill")
+    r = r.reindex(idx).ffill()
+    g = g.reindex(idx).ffill()
     pb = pb.reindex(idx).fillna(0.0)
     if sfa is not None:
         sfa = sfa.reindex(idx).fillna(0.0)
     else:
         sfa = pd.Series(0.0, index=idx)
-    b = pd.Series(np.nan, index=idx, dtype=float)
-    prev = b0
-    for t in idx:
-        rr = r.loc[t]
-        gg = g.loc[t]
-        pb_t = pb.loc[t]
-        sfa_t = sfa.loc[t]
-        prev = ((1.0 + rr) / (1.0 + gg)) * prev - pb_t + sfa_t
-        b.loc[t] = prev
+    rr = deannualize_rate(r.to_numpy(dtype=float), periods_per_year)
+    gg = deannualize_rate(g.to_numpy(dtype=float), periods_per_year)
+    flows = sfa.to_numpy(dtype=float) - pb.to_numpy(dtype=float)
+    if il_share and inflation is not None:
+        pi = _carry_onto(inflation, idx, "inflation")
+        pi_e = np.full(len(idx), pi.mean()) if inflation_expected is None else _carry_onto(inflation_expected, idx, "inflation_expected")
+        rr_il = deannualize_rate(r.to_numpy(dtype=float) + pi - pi_e, periods_per_year)
+        bc, bil = index_linked_recursion(b0, (1.0 + rr) / (1.0 + gg), (1.0 + rr_il) / (1.0 + gg), flows, il_share)
+        b = pd.Series(bc + bil, index=idx, dtype=float)
+    else:
+        b = pd.Series(debt_recursion(b0, (1.0 + rr) / (1.0 + gg), flows), index=idx, dtype=float)
     b.name = "debt_ratio"
     return b
 
-def stabilize_primary_balance(b: pd.Series, r: pd.Series, g: pd.Series) -> pd.Series:
+def stabilize_primary_balance(b: pd.Series, r: pd.Series, g: pd.Series, periods_per_year: int = 1) -> pd.Series:
     """
     Debt-stabilizing primary balance (ratio):
     pb* = ((r - g) / (1 + g)) * b
+    With periods_per_year > 1, r and g are de-annualized and pb* is per period.
     """
     idx = b.index.intersection(r.index).intersection(g.index)
     b = b.reindex(idx)
-    r = r.reindex(idx)
-    g = g.reindex(idx)
+    r = deannualize_rate(r.reindex(idx), periods_per_year)
+    g = deannualize_rate(g.reindex(idx), periods_per_year)
     pb_star = ((r - g) / (1.0 + g)) * b
     pb_star.name = "pb_stabilizing"
     return pb_star
@@ -75,7 +135,7 @@ def gfn_from_deficit_and_maturity(
     gdp = gdp.reindex(idx)
     deficit = deficit.reindex(idx)
     if avg_maturity_years is not None and not avg_maturity_years.empty:
-        m = avg_maturity_years.reindex(idx).fillna(method="ffill").fillna(10.0)
+        m = avg_maturity_years.reindex(idx).ffill().fillna(10.0)
     else:
         m = pd.Series(10.0, index=idx)
     debt_bn = b * gdp
@@ -117,7 +177,8 @@ def present_value_of_surpluses(pb_ratio: pd.Series, r: pd.Series, g: pd.Series,
     return pv
 
 def debt_stress_response(
-    b0: float, r: pd.Series, g: pd.Series, pb: pd.Series, sfa: Optional[pd.Series], shocks: Dict[str, float]
+    b0: float, r: pd.Series, g: pd.Series, pb: pd.Series, sfa: Optional[pd.Series], shocks: Dict[str, float],
+    periods_per_year: int = 1,
 ) -> pd.Series:
     """
     Apply deterministic shocks: shocks dict may include:
@@ -125,11 +186,12 @@ def debt_stress_response(
     - 'g_pp': + to nominal g
     - 'pb_pp': + to primary balance ratio
     - 'sfa_ratio_pp': + to sfa ratio
+    Shocks are annual; pb and sfa shocks are spread evenly over sub-annual periods.
     """
     r2 = r.copy() + shocks.get("r_pp", 0.0)
     g2 = g.copy() + shocks.get("g_pp", 0.0)
-    pb2 = pb.copy() + shocks.get("pb_pp", 0.0)
+    pb2 = pb.copy() + shocks.get("pb_pp", 0.0) / periods_per_year
     sfa2 = None
     if sfa is not None:
-        sfa2 = sfa.copy() + shocks.get("sfa_ratio_pp", 0.0)
-    return debt_dynamics(b0=b0, r=r2, g=g2, pb=pb2, sfa=sfa2)
\ No newline at end of file
+        sfa2 = sfa.copy() + shocks.get("sfa_ratio_pp", 0.0) / periods_per_year
+    return debt_dynamics(b0=b0, r=r2, g=g2, pb=pb2, sfa=sfa2, periods_per_year=periods_per_year)
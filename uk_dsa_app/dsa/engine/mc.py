@@ -1,8 +1,78 @@
 from __future__ import annotations
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
-from .dsa_math import debt_dynamics
+from .dsa_math import annualize_rate, debt_dynamics, debt_recursion, deannualize_rate, index_linked_recursion
+from ..config import MC_DEFAULTS
+
+SHOCK_DISTS = ("gaussian", "student_t", "regime")
+
+def simulate_regime_chains(
+    rng: np.random.Generator,
+    n_paths: int,
+    n_steps: int,
+    p_enter: float,
+    p_exit: float,
+) -> np.ndarray:
+    """
+    Simulate two-state Markov chains (0 = calm, 1 = crisis) for all paths at once.
+    p_enter: P(calm -> crisis), p_exit: P(crisis -> calm).
+    Chains start from the stationary distribution.
+    Returns int array shape (n_paths, n_steps)
+    """
+    u = rng.random((n_paths, n_steps))
+    pi_crisis = p_enter / (p_enter + p_exit) if (p_enter + p_exit) > 0 else 0.0
+    states = np.zeros((n_paths, n_steps), dtype=np.int8)
+    s = u[:, 0] < pi_crisis
+    states[:, 0] = s
+    for t in range(1, n_steps):
+        # stay in crisis unless exit draw, enter crisis on entry draw
+        s = np.where(s, u[:, t] >= p_exit, u[:, t] < p_enter)
+        states[:, t] = s
+    return states
+
+def draw_shocks(
+    Sigma: np.ndarray,
+    n_steps: int,
+    n_paths: int,
+    rng: np.random.Generator,
+    dist: str = "gaussian",
+    t_df: float = 5.0,
+    regime: Optional[Dict] = None,
+) -> np.ndarray:
+    """
+    Draw VAR innovations for all paths and steps in bulk.
+    - 'gaussian': eps ~ N(0, Sigma) via Cholesky factor
+    - 'student_t': multivariate t with t_df degrees of freedom, scaled so Cov(eps) = Sigma
+    - 'regime': two-state Markov-switching volatility; regime dict may include
+      'p_enter', 'p_exit', 'crisis_scale' (volatility multiplier) or 'Sigma_crisis'
+    Returns array shape (n_paths, n_steps, k)
+    """
+    if dist not in SHOCK_DISTS:
+        raise ValueError(f"Unsupported shock distribution: {dist}")
+    k = Sigma.shape[0]
+    L = np.linalg.cholesky(Sigma)
+    z = rng.standard_normal((n_paths, n_steps, k))
+    if dist == "gaussian":
+        return z @ L.T
+    if dist == "student_t":
+        if t_df <= 2:
+            raise ValueError("Student-t shocks need t_df > 2 for a finite covariance.")
+        # One chi-square mixing draw per path and step, shared across variables
+        w = rng.chisquare(t_df, size=(n_paths, n_steps, 1))
+        return (z @ L.T) * np.sqrt((t_df - 2.0) / w)
+    regime = regime or {}
+    p_enter = float(regime.get("p_enter", MC_DEFAULTS.regime_p_enter))
+    p_exit = float(regime.get("p_exit", MC_DEFAULTS.regime_p_exit))
+    if "Sigma_crisis" in regime:
+        L_crisis = np.linalg.cholesky(np.asarray(regime["Sigma_crisis"], dtype=float))
+    else:
+        L_crisis = L * float(regime.get("crisis_scale", MC_DEFAULTS.regime_crisis_scale))
+    states = simulate_regime_chains(rng, n_paths, n_steps, p_enter, p_exit)
+    # Gather the covariance factor of each path's regime at each step
+    L_stack = np.stack([L, L_crisis])
+    L_sel = L_stack[states]
+    return np.einsum("ptij,ptj->pti", L_sel, z)
 
 def simulate_var_paths(
     A: np.ndarray,
@@ -14,28 +84,116 @@ def simulate_var_paths(
     seed: int = 42,
     lower_bounds: Optional[np.ndarray] = None,
     upper_bounds: Optional[np.ndarray] = None,
+    shock_dist: str = "gaussian",
+    t_df: float = 5.0,
+    regime: Optional[Dict] = None,
 ) -> np.ndarray:
     """
-    Simulate VAR(1): x_{t} = c + A x_{t-1} + eps_t, eps ~ N(0,Sigma).
+    Simulate VAR(1): x_{t} = c + A x_{t-1} + eps_t, eps drawn by draw_shocks (default N(0,Sigma)).
     x dimensions: k
+    All paths are advanced together; the loop runs over time steps only.
     Returns array shape (n_paths, n_steps, k)
     """
     rng = np.random.default_rng(seed)
     k = initial_state.shape[0]
-    L = np.linalg.cholesky(Sigma)
+    eps = draw_shocks(Sigma, n_steps, n_paths, rng, dist=shock_dist, t_df=t_df, regime=regime)
     paths = np.zeros((n_paths, n_steps, k), dtype=float)
-    for p in range(n_paths):
-        x = initial_state.copy()
-        for t in range(n_steps):
-            eps = L @ rng.standard_normal(k)
-            x = c + A @ x + eps
-            if lower_bounds is not None:
-                x = np.maximum(x, lower_bounds)
-            if upper_bounds is not None:
-                x = np.minimum(x, upper_bounds)
-            paths[p, t, :] = x
+    x = np.broadcast_to(initial_state, (n_paths, k)).astype(float)
+    for t in range(n_steps):
+        x = c + x @ A.T + eps[:, t, :]
+        if lower_bounds is not None:
+            x = np.maximum(x, lower_bounds)
+        if upper_bounds is not None:
+            x = np.minimum(x, upper_bounds)
+        paths[:, t, :] = x
     return paths
 
+def debt_paths(
+    b0: float,
+    r: np.ndarray,
+    g: np.ndarray,
+    pb: np.ndarray,
+    sfa: np.ndarray,
+    periods_per_year: int = 1,
+    il_share: float = 0.0,
+    inflation_surprise: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Debt ratio recursion b_t = (1 + r_t) / (1 + g_t) * b_{t-1} - pb_t + sfa_t,
+    vectorized across paths. r, g (annual rates), pb shape (n_paths, n_steps); sfa shape (n_steps,).
+    With il_share and inflation_surprise (annual, shaped like r) the index-linked share of the stock
+    pays r plus the surprise (see dsa_math.index_linked_recursion).
+    Returns array shape (n_paths, n_steps)
+    """
+    rr = deannualize_rate(r, periods_per_year)
+    gg = deannualize_rate(g, periods_per_year)
+    if il_share and inflation_surprise is not None:
+        rr_il = deannualize_rate(r + inflation_surprise, periods_per_year)
+        bc, bil = index_linked_recursion(b0, (1.0 + rr) / (1.0 + gg), (1.0 + rr_il) / (1.0 + gg), sfa - pb, il_share)
+        return bc + bil
+    return debt_recursion(b0, (1.0 + rr) / (1.0 + gg), sfa - pb)
+
+def var_expected_path(A: np.ndarray, c: np.ndarray, initial_state: np.ndarray, n_steps: int) -> np.ndarray:
+    """
+    Conditional mean of the VAR(1) from initial_state: E[x_t] = c + A E[x_{t-1}]. Shape (n_steps, k).
+    """
+    out = np.empty((n_steps, len(c)), dtype=float)
+    x = np.asarray(initial_state, dtype=float)
+    for t in range(n_steps):
+        x = c + A @ x
+        out[t] = x
+    return out
+
+def simulate_debt_with_reaction(
+    b0: float,
+    A: np.ndarray,
+    c: np.ndarray,
+    eps: np.ndarray,
+    initial_state: np.ndarray,
+    r_idx: int,
+    g_idx: int,
+    pb_idx: int,
+    sfa: np.ndarray,
+    alpha: float,
+    beta: float,
+    periods_per_year: int = 1,
+    il_share: float = 0.0,
+    pi_idx: Optional[int] = None,
+    pi_expected: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fused VAR simulation and debt recursion with a fiscal reaction function:
+    pb_t = alpha + beta * b_{t-1} + eps_t[pb], replacing the VAR equation for pb.
+    The reacted pb feeds back into the VAR state for the next step.
+    eps: pre-drawn shocks, shape (n_paths, n_steps, k).
+    With il_share, pi_idx and pi_expected (n_steps,) the index-linked stock is tracked separately
+    and accretes the inflation surprise x[pi] - pi_expected.
+    Returns (paths shape (n_paths, n_steps, k), debt shape (n_paths, n_steps))
+    """
+    n_paths, n_steps, k = eps.shape
+    paths = np.empty((n_paths, n_steps, k), dtype=float)
+    br = np.empty((n_paths, n_steps), dtype=float)
+    x = np.broadcast_to(initial_state, (n_paths, k)).astype(float)
+    b_prev = np.full(n_paths, b0, dtype=float)
+    linked = bool(il_share) and pi_idx is not None and pi_expected is not None
+    b_il = np.full(n_paths, il_share * b0 if linked else 0.0, dtype=float)
+    for t in range(n_steps):
+        x = c + x @ A.T + eps[:, t, :]
+        x[:, pb_idx] = alpha + beta * b_prev + eps[:, t, pb_idx]
+        rr = deannualize_rate(x[:, r_idx], periods_per_year)
+        gg = deannualize_rate(x[:, g_idx], periods_per_year)
+        flow = sfa[t] - x[:, pb_idx]
+        if linked:
+            rr_il = deannualize_rate(x[:, r_idx] + x[:, pi_idx] - pi_expected[t], periods_per_year)
+            b_conv = ((1.0 + rr) / (1.0 + gg)) * (b_prev - b_il) + (1.0 - il_share) * flow
+            b_il = ((1.0 + rr_il) / (1.0 + gg)) * b_il + il_share * flow
+            b_prev = b_conv + b_il
+        else:
+            b_prev = ((1.0 + rr) / (1.0 + gg)) * b_prev + flow
+        paths[:, t, :] = x
+        br[:, t] = b_prev
+    return paths, br
+
 def mc_distribution(
     b0: float,
     dates: pd.PeriodIndex,
@@ -44,11 +202,32 @@ def mc_distribution(
     sfa_ratio: Optional[pd.Series] = None,
     n_paths: int = 5000,
     seed: int = 42,
-) -> Dict[str, pd.DataFrame]:
+    shock_dist: str = "gaussian",
+    t_df: float = 5.0,
+    regime: Optional[Dict] = None,
+    reaction: Optional[Dict] = None,
+    periods_per_year: int = 1,
+    keep_samples: bool = False,
+    return_paths: bool = False,
+    return_drivers: bool = False,
+    il_share: float = 0.0,
+) -> Dict[str, Any]:
     """
     Monte Carlo distribution for debt ratio path using VAR simulated r, g, pb (ratios).
     var_params: dict with A, c, Sigma, columns order
     map_columns: mapping metric names 'nominal_g','effective_r','pb_ratio' -> column index
+    shock_dist, t_df, regime: shock generator options (see draw_shocks).
+    reaction: optional fiscal reaction function {'alpha', 'beta'} from
+    calibration.estimate_fiscal_reaction; pb then responds to lagged debt.
+    periods_per_year: 4 or 12 for quarterly / monthly steps (VAR r, g are annualized rates).
+    keep_samples: also return 'samples', the simulated debt ratios sorted per date as a
+    (n_dates, n_paths) array (NaN last), for ranking external paths with percentile_rank.
+    return_paths: also return 'paths', the (n_paths, n_dates) debt ratio array (see engine.risk).
+    return_drivers: also return 'drivers', the simulated {'effective_r', 'nominal_g', 'pb_ratio'}
+    (n_paths, n_dates) arrays behind each path (see engine.decomposition). With the index-linked
+    channel active, 'effective_r' is the rate paid on the whole stock and 'inflation' is added.
+    il_share: share of index-linked debt; active when map_columns also maps 'inflation' to a VAR column.
+    That stock accretes inflation surprises relative to the VAR's conditional mean path.
     Return quantiles by date.
     """
     if not var_params:
@@ -64,33 +243,148 @@ def mc_distribution(
     x0 = np.zeros(k, dtype=float)
 
     n_steps = len(dates)
-    paths = simulate_var_paths(A, c, Sigma, x0, n_steps, n_paths, seed)
-    # Compute debt ratio from simulated r,g,pb
-    # sfa ratio fallback zeros
-    if sfa_ratio is None:
-        sfa_ratio = pd.Series(0.0, index=dates)
     r_idx = map_columns.get("effective_r", None)
     g_idx = map_columns.get("nominal_g", None)
     pb_idx = map_columns.get("pb_ratio", None)
     if r_idx is None or g_idx is None or pb_idx is None:
         return {}
-    br = np.zeros((n_paths, n_steps), dtype=float)
-    for p in range(n_paths):
-        b_prev = b0
-        for t in range(n_steps):
-            rr = paths[p, t, r_idx]
-            gg = paths[p, t, g_idx]
-            pb = paths[p, t, pb_idx]
-            sfa_t = sfa_ratio.iloc[t]
-            b_prev = ((1+rr)/(1+gg))*b_prev - pb + sfa_t
-            br[p, t] = b_prev
+    pi_idx = map_columns.get("inflation", None)
+    linked = bool(il_share) and pi_idx is not None
+    pi_expected = var_expected_path(A, c, x0, n_steps)[:, pi_idx] if linked else None
+    # sfa ratio fallback zeros
+    if sfa_ratio is None:
+        sfa = np.zeros(n_steps, dtype=float)
+    else:
+        sfa = sfa_ratio.reindex(dates).fillna(0.0).to_numpy(dtype=float)
+    if reaction:
+        # Feedback from debt to pb: simulation and recursion must run in one loop
+        rng = np.random.default_rng(seed)
+        eps = draw_shocks(Sigma, n_steps, n_paths, rng, dist=shock_dist, t_df=t_df, regime=regime)
+        paths, br = simulate_debt_with_reaction(
+            b0, A, c, eps, x0, r_idx, g_idx, pb_idx, sfa,
+            alpha=float(reaction["alpha"]), beta=float(reaction["beta"]),
+            periods_per_year=periods_per_year,
+            il_share=il_share if linked else 0.0, pi_idx=pi_idx, pi_expected=pi_expected,
+        )
+    else:
+        paths = simulate_var_paths(A, c, Sigma, x0, n_steps, n_paths, seed,
+                                   shock_dist=shock_dist, t_df=t_df, regime=regime)
+        br = debt_paths(b0, paths[:, :, r_idx], paths[:, :, g_idx], paths[:, :, pb_idx], sfa,
+                        periods_per_year=periods_per_year, il_share=il_share if linked else 0.0,
+                        inflation_surprise=paths[:, :, pi_idx] - pi_expected if linked else None)
     # Quantiles
     qs = [5, 10, 25, 50, 75, 90, 95]
     qdfs = {}
-    qdf = pd.DataFrame(index=dates, columns=[str(q) for q in qs], dtype=float)
-    for j in range(n_steps):
-        x = br[:, j]
-        for q in qs:
-            qdf.iloc[j][str(q)] = np.nanpercentile(x, q)
+    qdf = pd.DataFrame(np.nanpercentile(br, qs, axis=0).T, index=dates, columns=[str(q) for q in qs], dtype=float)
     qdfs["debt_ratio"] = qdf
-    return qdfs
\ No newline at end of file
+    if keep_samples:
+        qdfs["samples"] = np.sort(br.T, axis=1)
+    if return_paths:
+        qdfs["paths"] = br
+    if return_drivers:
+        drivers = {"effective_r": paths[:, :, r_idx], "nominal_g": paths[:, :, g_idx], "pb_ratio": paths[:, :, pb_idx]}
+        if linked:
+            # Rate on the whole stock implied by the recursion, so decompositions still add up
+            b_prev = np.concatenate([np.full((n_paths, 1), b0), br[:, :-1]], axis=1)
+            gg = deannualize_rate(drivers["nominal_g"], periods_per_year)
+            rr = (br + drivers["pb_ratio"] - sfa) * (1.0 + gg) / b_prev - 1.0
+            drivers["effective_r"] = annualize_rate(rr, periods_per_year)
+            drivers["inflation"] = paths[:, :, pi_idx]
+        qdfs["drivers"] = drivers
+    return qdfs
+
+def percentile_rank(sorted_samples: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Percentile (0-100, mid-rank for ties) of values within each row of sorted_samples
+    (n_dates, n_paths, ascending; non-finite draws count as above every value).
+    values: (n_dates,) or (n_paths_ext, n_dates) to rank several external paths at once.
+    Rows are shifted by row * span so they occupy disjoint ranges of one flat sorted array,
+    which turns all lookups into a single searchsorted per side.
+    """
+    S = np.asarray(sorted_samples, dtype=float)
+    V = np.atleast_2d(np.asarray(values, dtype=float))
+    T, P = S.shape
+    out = np.full(V.shape, np.nan)
+    ok = np.isfinite(V)
+    fin = np.isfinite(S)
+    if not ok.any() or not fin.any():
+        return out if np.ndim(values) == 2 else out[0]
+    lo = min(S[fin].min(), V[ok].min())
+    hi = max(S[fin].max(), V[ok].max())
+    span = hi - lo + 2.0
+    shift = np.arange(T) * span
+    flat = (np.where(fin, S, hi + 1.0) - lo + shift[:, None]).ravel()
+    keys = np.where(ok, V, lo) - lo + shift[None, :]
+    base = np.arange(T) * P
+    left = np.searchsorted(flat, keys, side="left") - base
+    right = np.searchsorted(flat, keys, side="right") - base
+    out = np.where(ok, 50.0 * (left + right) / P, np.nan)
+    return out if np.ndim(values) == 2 else out[0]
+
+def rank_paths(sorted_samples: np.ndarray, dates: pd.PeriodIndex, paths: pd.DataFrame) -> pd.DataFrame:
+    """
+    Percentile ranks of external paths (index: periods, columns: e.g. OBR vintages) within the
+    MC distribution. Coarser path periods are matched to the MC date at their end (a year to
+    its Q4 / December). Periods outside the simulation horizon are NaN.
+    """
+    target = paths.index.asfreq(dates.freq, how="end") if paths.index.freqstr != dates.freqstr else paths.index
+    pos = dates.get_indexer(target)
+    valid = pos >= 0
+    ranks = np.full((paths.shape[1], len(paths)), np.nan)
+    if valid.any():
+        ranks[:, valid] = percentile_rank(sorted_samples[pos[valid]], paths.to_numpy(dtype=float).T[:, valid])
+    return pd.DataFrame(ranks.T, index=paths.index, columns=paths.columns)
+
+def stochastic_stress(
+    b0: float,
+    dates: pd.PeriodIndex,
+    var_params: Dict,
+    map_columns: Dict[str, int],
+    scenarios: List,
+    sfa_ratio: Optional[pd.Series] = None,
+    n_paths: int = 5000,
+    seed: int = 42,
+    shock_dist: str = "gaussian",
+    t_df: float = 5.0,
+    regime: Optional[Dict] = None,
+    periods_per_year: int = 1,
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Conditional fan charts for deterministic scenarios (ShockScenario-like: name, r_pp, g_pp, pb_pp,
+    sfa_ratio_pp) layered on one set of simulated VAR paths (common random numbers).
+    The VAR is simulated once; all scenarios plus the baseline run as one batched recursion.
+    Returns {'quantiles': {name: quantile frame}, 'differences': {name: quantiles of the per-path
+    difference to the baseline}}; 'Baseline' is included in 'quantiles'.
+    """
+    if not var_params:
+        return {}
+    r_idx = map_columns.get("effective_r", None)
+    g_idx = map_columns.get("nominal_g", None)
+    pb_idx = map_columns.get("pb_ratio", None)
+    if r_idx is None or g_idx is None or pb_idx is None:
+        return {}
+    k = len(var_params["columns"])
+    n_steps = len(dates)
+    paths = simulate_var_paths(var_params["A"], var_params["c"], var_params["Sigma"], np.zeros(k), n_steps, n_paths, seed,
+                               shock_dist=shock_dist, t_df=t_df, regime=regime)
+    sfa = np.zeros(n_steps) if sfa_ratio is None else sfa_ratio.reindex(dates).fillna(0.0).to_numpy(dtype=float)
+    names = ["Baseline"] + [sc.name for sc in scenarios]
+    # Scenario shocks as (S, 1, 1) so they broadcast over paths and dates
+    shock = lambda attr: np.array([0.0] + [float(getattr(sc, attr, 0.0)) for sc in scenarios])[:, None, None]
+    br = debt_paths(
+        b0,
+        paths[None, :, :, r_idx] + shock("r_pp"),
+        paths[None, :, :, g_idx] + shock("g_pp"),
+        paths[None, :, :, pb_idx] + shock("pb_pp") / periods_per_year,
+        sfa + shock("sfa_ratio_pp") / periods_per_year,
+        periods_per_year=periods_per_year,
+    )
+    qs = [5, 10, 25, 50, 75, 90, 95]
+    cols = [str(q) for q in qs]
+    levels = np.nanpercentile(br, qs, axis=1)  # (Q, S, T)
+    diffs = np.nanpercentile(br[1:] - br[:1], qs, axis=1) if scenarios else np.empty((len(qs), 0, n_steps))
+    return {
+        "quantiles": {n: pd.DataFrame(levels[:, i].T, index=dates, columns=cols) for i, n in enumerate(names)},
+        "differences": {n: pd.DataFrame(diffs[:, i].T, index=dates, columns=cols) for i, n in enumerate(names[1:])},
+    }
+
@@ -0,0 +1,166 @@
+from __future__ import annotations
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .dsa_math import debt_recursion, deannualize_rate
+
+# Shock components in debt_stress_response semantics: permanent additions to r and g (annual
+# rates) and to the primary balance ratio (annual, spread over sub-annual periods).
+# Adverse direction of each and the size of one unit used to measure "how large" a shock is.
+SHOCK_COMPONENTS = ("r_pp", "g_pp", "pb_pp")
+ADVERSE_SIGN = np.array([1.0, -1.0, -1.0])
+DEFAULT_UNITS = np.array([0.01, 0.01, 0.01])
+
+_CACHE: "OrderedDict[str, Dict]" = OrderedDict()
+_CACHE_SIZE = 16
+
+def stressed_paths(b0: float, r: np.ndarray, g: np.ndarray, pb: np.ndarray, sfa: np.ndarray, shocks: np.ndarray,
+                   periods_per_year: int = 1) -> np.ndarray:
+    """
+    Debt paths for a batch of permanent shocks in one broadcasted recursion.
+    shocks: (..., 3) columns r_pp, g_pp, pb_pp. Returns (..., n_periods).
+    """
+    s = np.asarray(shocks, dtype=float)
+    rr = deannualize_rate(r + s[..., 0:1], periods_per_year)
+    gg = deannualize_rate(g + s[..., 1:2], periods_per_year)
+    flows = sfa - (pb + s[..., 2:3] / periods_per_year)
+    return debt_recursion(b0, (1.0 + rr) / (1.0 + gg), flows)
+
+def _paths_and_slopes(b0, r, g, pb, sfa, d: np.ndarray, lam: np.ndarray, m: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Debt paths at shocks lam * d and their analytic derivative with respect to lam, for N directions
+    n, T = len(d), len(r)
+    R = 1.0 + r[None, :] + lam[:, None] * d[:, 0:1]
+    G = 1.0 + g[None, :] + lam[:, None] * d[:, 1:2]
+    rr, gg = R ** (1.0 / m) - 1.0, G ** (1.0 / m) - 1.0
+    drr = d[:, 0:1] / m * R ** (1.0 / m - 1.0)
+    dgg = d[:, 1:2] / m * G ** (1.0 / m - 1.0)
+    a = (1.0 + rr) / (1.0 + gg)
+    da = (drr * (1.0 + gg) - (1.0 + rr) * dgg) / (1.0 + gg) ** 2
+    f = sfa[None, :] - pb[None, :] - lam[:, None] * d[:, 2:3] / m
+    df = np.broadcast_to(-d[:, 2:3] / m, (n, T))
+    b = np.empty((n, T))
+    db = np.empty((n, T))
+    prev, dprev = np.full(n, float(b0)), np.zeros(n)
+    for t in range(T):
+        prev, dprev = a[:, t] * prev + f[:, t], da[:, t] * prev + a[:, t] * dprev + df[:, t]
+        b[:, t], db[:, t] = prev, dprev
+    return b, db
+
+def direction_grid(n_per_axis: int = 12, active: Tuple[bool, bool, bool] = (True, True, True)) -> np.ndarray:
+    """
+    Unit directions (in shock units) covering the adverse orthant of the active components:
+    all non-negative integer compositions of n_per_axis, normalized.
+    """
+    act = np.flatnonzero(active)
+    k = len(act)
+    if k == 0:
+        raise ValueError("At least one shock component must be active.")
+    grids = np.stack(np.meshgrid(*[np.arange(n_per_axis + 1)] * k, indexing="ij"), axis=-1).reshape(-1, k)
+    comp = grids[grids.sum(axis=1) == n_per_axis].astype(float)
+    comp /= np.linalg.norm(comp, axis=1, keepdims=True)
+    out = np.zeros((len(comp), 3))
+    out[:, act] = comp
+    return out
+
+def _baseline_key(idx: pd.PeriodIndex, *parts) -> str:
+    # Dates matter as well as values: breach periods are labelled from idx
+    h = hashlib.sha1(idx.freqstr.encode())
+    h.update(np.ascontiguousarray(idx.asi8).tobytes())
+    for p in parts:
+        h.update(np.ascontiguousarray(np.asarray(p, dtype=float)).tobytes())
+    return h.hexdigest()
+
+def _copy(out: Dict) -> Dict:
+    return {"frontier": out["frontier"].copy(), "minimal": out["minimal"].copy(), "baseline_breach": out["baseline_breach"]}
+
+def reverse_stress(
+    b0: float,
+    r: pd.Series,
+    g: pd.Series,
+    pb: pd.Series,
+    sfa: Optional[pd.Series],
+    threshold: float,
+    by: Optional[pd.Period] = None,
+    periods_per_year: int = 1,
+    units: Optional[np.ndarray] = None,
+    max_units: Optional[np.ndarray] = None,
+    active: Tuple[bool, bool, bool] = (True, True, True),
+    n_per_axis: int = 12,
+    n_grid: int = 64,
+    newton_iters: int = 20,
+    tol: float = 1e-10,
+) -> Dict:
+    """
+    Smallest permanent adverse shocks (r up, g down, pb down) that push the debt ratio above
+    threshold at some period up to `by` (default: the last projection period).
+    For each direction on a grid over the adverse orthant, the breaching shock size is bracketed
+    from one broadcasted evaluation of all (direction, size) candidates, then refined by a batched,
+    bracket-safeguarded Newton iteration using the analytic derivative of the debt recursion.
+    Shock sizes are measured in `units` (default 1pp / 1pp / 1% GDP) and capped per component
+    by max_units (default 10 units).
+    Returns {'frontier': one row per breaching direction with r_pp, g_pp, pb_pp, size, breach period,
+    'minimal': the row with the smallest size (empty if nothing breaches), 'baseline_breach': bool}.
+    Results are cached per baseline (values and dates) and settings; callers get copies.
+    """
+    idx = r.index
+    r_, g_, pb_ = (s.reindex(idx).to_numpy(dtype=float) for s in (r, g, pb))
+    sfa_ = np.zeros(len(idx)) if sfa is None else sfa.reindex(idx).fillna(0.0).to_numpy(dtype=float)
+    n_t = len(idx) if by is None else int(idx.get_loc(by)) + 1
+    units = DEFAULT_UNITS if units is None else np.asarray(units, dtype=float)
+    max_units = np.full(3, 10.0) if max_units is None else np.asarray(max_units, dtype=float)
+    key = _baseline_key(idx, [b0, threshold, n_t, periods_per_year, n_per_axis, n_grid], r_, g_, pb_, sfa_, units, max_units, np.asarray(active, dtype=float))
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _copy(_CACHE[key])
+    r_, g_, pb_, sfa_ = r_[:n_t], g_[:n_t], pb_[:n_t], sfa_[:n_t]
+    m = periods_per_year
+
+    units_dir = direction_grid(n_per_axis, active)
+    d = units_dir * units * ADVERSE_SIGN  # shock per unit of size, in rate / ratio terms
+    with np.errstate(divide="ignore"):
+        lam_max = np.min(np.where(units_dir > 0, max_units / np.where(units_dir > 0, units_dir, 1.0), np.inf), axis=1)
+    base_peak = stressed_paths(b0, r_, g_, pb_, sfa_, np.zeros((1, 3)), m).max()
+    if base_peak >= threshold:
+        lam = np.zeros(len(d))
+    else:
+        # Bracket: all directions x sizes in one call, shape (N, L, T)
+        grid = np.linspace(0.0, 1.0, n_grid)[None, :] * lam_max[:, None]
+        peak = stressed_paths(b0, r_, g_, pb_, sfa_, grid[..., None] * d[:, None, :], m).max(axis=-1)
+        over = peak >= threshold
+        hit = over.any(axis=1)
+        j = np.where(hit, over.argmax(axis=1), 1)
+        lo = np.take_along_axis(grid, (j - 1)[:, None], axis=1)[:, 0]
+        hi = np.take_along_axis(grid, j[:, None], axis=1)[:, 0]
+        lam = 0.5 * (lo + hi)
+        for _ in range(newton_iters):
+            b, db = _paths_and_slopes(b0, r_, g_, pb_, sfa_, d, lam, m)
+            t_star = b.argmax(axis=1)
+            rows = np.arange(len(d))
+            f = b[rows, t_star] - threshold
+            fp = db[rows, t_star]
+            lo = np.where(f < 0, lam, lo)
+            hi = np.where(f >= 0, lam, hi)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = lam - f / fp
+            # Newton inside the bracket, bisection otherwise
+            lam = np.where((fp > 0) & (step > lo) & (step < hi), step, 0.5 * (lo + hi))
+            if np.all(np.abs(f[hit]) < tol):
+                break
+        lam = np.where(hit, lam, np.nan)
+    shocks = lam[:, None] * d
+    ok = ~np.isnan(lam)
+    paths = stressed_paths(b0, r_, g_, pb_, sfa_, np.where(ok[:, None], shocks, 0.0), m)
+    first = np.where(ok, (paths >= threshold - 1e-9).argmax(axis=1), -1)
+    frontier = pd.DataFrame({
+        "r_pp": shocks[:, 0], "g_pp": shocks[:, 1], "pb_pp": shocks[:, 2],
+        "size": lam,
+        "breach_period": [str(idx[i]) if i >= 0 else "" for i in first],
+    })[ok].reset_index(drop=True)
+    minimal = frontier.loc[frontier["size"].idxmin()] if not frontier.empty else pd.Series(dtype=object)
+    out = {"frontier": frontier, "minimal": minimal, "baseline_breach": bool(base_peak >= threshold)}
+    _CACHE[key] = out
+    if len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return _copy(out)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Simulated paths are (n_paths, n_dates) arrays of debt ratios, as returned by
+# mc_distribution(..., return_paths=True)['paths']. Diverging (NaN / inf) draws count as above any level.
+
+def _clean(paths: np.ndarray) -> np.ndarray:
+    return np.where(np.isfinite(paths), paths, np.inf)
+
+def _tail_size(n_paths: int, level: float) -> int:
+    # Number of draws at or above the level-th percentile (at least one)
+    return max(n_paths - int(np.floor(level / 100.0 * n_paths)), 1)
+
+def breach_probabilities(paths: np.ndarray, thresholds: Sequence[float]) -> np.ndarray:
+    """
+    P(debt > threshold) per date. Returns (n_dates, n_thresholds); (n_dates, 0) for no thresholds.
+    """
+    x = _clean(paths)
+    t = np.asarray(thresholds, dtype=float)
+    return (x[:, :, None] > t).mean(axis=0) if t.size else np.empty((x.shape[1], 0))
+
+def var_es(paths: np.ndarray, levels: Sequence[float] = (95, 99)) -> Dict[float, Dict[str, np.ndarray]]:
+    """
+    Per date, the level-th percentile (VaR) and expected shortfall (mean of draws at or above it)
+    for each level, from one np.partition per level rather than a full sort.
+    """
+    x = _clean(paths)
+    n = x.shape[0]
+    out = {}
+    for lv in levels:
+        m = _tail_size(n, lv)
+        tail = np.partition(x, n - m, axis=0)[n - m:]
+        out[lv] = {"var": tail.min(axis=0), "es": tail.mean(axis=0)}
+    return out
+
+def first_breach(paths: np.ndarray, threshold: float) -> Dict[str, np.ndarray]:
+    """
+    First-passage times above threshold via a running maximum along each path.
+    Returns {'first': probability the first breach happens at each date,
+    'cumulative': P(breached by each date), 'never': P(no breach within the horizon)}.
+    """
+    x = _clean(paths)
+    breached = np.maximum.accumulate(x, axis=1) > threshold
+    cumulative = breached.mean(axis=0)
+    ever = breached[:, -1]
+    first_idx = breached.argmax(axis=1)[ever]
+    first = np.bincount(first_idx, minlength=x.shape[1]) / x.shape[0]
+    return {"first": first, "cumulative": cumulative, "never": 1.0 - ever.mean()}
+
+def prob_above_start(paths: np.ndarray, b0: float) -> np.ndarray:
+    """
+    P(debt at each date > debt today); the last entry is the horizon probability.
+    """
+    return (_clean(paths) > b0).mean(axis=0)
+
+class RiskAccumulator:
+    """
+    Streaming version of the risk metrics for simulations run in batches of paths.
+    Keeps counts for breaches, first passages and P(b_t > b0), plus per date only the largest
+    draws needed for the tail levels, so memory does not grow with the number of batches.
+    n_paths is the total that will be fed (fixes the tail size).
+    """
+    def __init__(self, n_dates: int, n_paths: int, b0: float, thresholds: Sequence[float], levels: Sequence[float] = (95, 99)):
+        self.n_paths = n_paths
+        self.b0 = b0
+        self.thresholds = list(thresholds)
+        self.levels = list(levels)
+        self.seen = 0
+        self.breach_counts = np.zeros((n_dates, len(self.thresholds)))
+        self.first_counts = np.zeros((len(self.thresholds), n_dates))
+        self.above_start = np.zeros(n_dates)
+        self.tail_keep = max(_tail_size(n_paths, lv) for lv in self.levels) if self.levels else 0
+        self.tail = np.empty((0, n_dates))
+
+    def update(self, paths: np.ndarray):
+        x = _clean(paths)
+        self.seen += x.shape[0]
+        for j, t in enumerate(self.thresholds):
+            self.breach_counts[:, j] += (x > t).sum(axis=0)
+            breached = np.maximum.accumulate(x, axis=1) > t
+            ever = breached[:, -1]
+            self.first_counts[j] += np.bincount(breached.argmax(axis=1)[ever], minlength=x.shape[1])
+        self.above_start += (x > self.b0).sum(axis=0)
+        if self.tail_keep:
+            pool = np.concatenate([self.tail, x], axis=0)
+            k = self.tail_keep
+            self.tail = pool if len(pool) <= k else np.partition(pool, len(pool) - k, axis=0)[len(pool) - k:]
+
+    def result(self) -> Dict:
+        """
+        Metrics over the paths fed so far; all NaN before the first update.
+        """
+        if self.seen == 0:
+            n_dates = self.tail.shape[1]
+            nan_dates = np.full(n_dates, np.nan)
+            return {
+                "breach": np.full_like(self.breach_counts, np.nan),
+                "tails": {lv: {"var": nan_dates.copy(), "es": nan_dates.copy()} for lv in self.levels},
+                "first": np.full_like(self.first_counts, np.nan),
+                "never": np.full(len(self.thresholds), np.nan),
+                "above_start": nan_dates.copy(),
+            }
+        n = self.seen
+        tails = {}
+        for lv in self.levels:
+            m = _tail_size(self.seen, lv)
+            top = np.partition(self.tail, len(self.tail) - m, axis=0)[len(self.tail) - m:]
+            tails[lv] = {"var": top.min(axis=0), "es": top.mean(axis=0)}
+        first = self.first_counts / n
+        return {
+            "breach": self.breach_counts / n,
+            "tails": tails,
+            "first": first,
+            "never": 1.0 - first.sum(axis=1),
+            "above_start": self.above_start / n,
+        }
+
+def risk_summary(
+    paths: np.ndarray,
+    dates: pd.PeriodIndex,
+    b0: float,
+    thresholds: Sequence[float] = (0.9, 1.0, 1.2),
+    levels: Sequence[float] = (95, 99),
+) -> Dict[str, pd.DataFrame]:
+    """
+    Tables for display/export:
+    'by_date': P(debt > each threshold), VaR/ES at each level and P(debt > today's level), per date;
+    'first_breach': probability of first breaching each threshold in each period, plus 'never';
+    'first_breach_year': the same summed within each calendar year (the first-breach year
+    distribution; equal to first_breach at yearly frequency, edge years may be partial).
+    An empty thresholds list gives no P(b>...) columns and empty first-breach tables.
+    """
+    cols = {f"P(b>{t:g})": p for t, p in zip(thresholds, breach_probabilities(paths, thresholds).T)}
+    for lv, d in var_es(paths, levels).items():
+        cols[f"VaR{lv:g}"] = d["var"]
+        cols[f"ES{lv:g}"] = d["es"]
+    cols["P(b>b0)"] = prob_above_start(paths, b0)
+    by_date = pd.DataFrame(cols, index=dates)
+    fb = {}
+    for t in thresholds:
+        res = first_breach(paths, t)
+        fb[f"{t:g}"] = np.r_[res["first"], res["never"]]
+    first = pd.DataFrame(fb, index=[str(d) for d in dates] + ["never"])
+    first.index.name = "first breach"
+    return {"by_date": by_date, "first_breach": first, "first_breach_year": _first_breach_by_year(first, dates)}
+
+def _first_breach_by_year(first: pd.DataFrame, dates: pd.PeriodIndex) -> pd.DataFrame:
+    # Sum per-period first-breach probabilities within each calendar year (as decomposition._to_years)
+    years = np.asarray(dates.year)
+    starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]]) if years.size else np.empty(0, dtype=int)
+    per = first.iloc[:len(dates)].to_numpy(dtype=float)
+    by_year = np.add.reduceat(per, starts, axis=0) if years.size else per
+    out = pd.DataFrame(np.vstack([by_year, first.iloc[len(dates):].to_numpy(dtype=float)]),
+                       index=[str(y) for y in years[starts]] + ["never"], columns=first.columns)
+    out.index.name = "first breach year"
+    return out
@@ -1,59 +1,92 @@
 from __future__ import annotations
+import hashlib
 import io
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
-from .timeseries import DataManager
-from .config import FREQ_TO_PANDAS
+from .timeseries import DataManager, FREQ_RANK, RESAMPLE_HOWS, detect_index_format, dominant_label_format, parse_period_index, parse_period_labels
+from .config import FREQ_TO_PANDAS, PERIODS_PER_YEAR
 
-def parse_pasted_two_column(text: str) -> pd.Series:
+# Parsed pastes keyed by a hash of the text, so reruns with unchanged input skip tokenizing
+_PASTE_CACHE: "OrderedDict[str, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+_PASTE_CACHE_SIZE = 32
+
+def _detect_delimiter(lines: List[str]) -> Optional[str]:
+    # Tab (Excel), then comma when every line has the same number of commas, else any whitespace
+    if any("\t" in ln for ln in lines):
+        return "\t"
+    counts = {ln.count(",") for ln in lines}
+    if len(counts) == 1 and counts.pop() > 0:
+        return ","
+    return None
+
+def tokenize_paste(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split pasted text into a cell grid in one pass and parse every cell as a number.
+    Returns (cells, numbers): object array (rows x cols, None where a row is short) and
+    float array of the same shape (NaN where a cell is not numeric). Results are cached
+    on the text hash; callers get read-only arrays and must copy before mutating.
+    """
+    key = hashlib.sha1(text.encode()).hexdigest()
+    hit = _PASTE_CACHE.get(key)
+    if hit is not None:
+        _PASTE_CACHE.move_to_end(key)
+        return hit
+    lines = [ln.strip() for ln in text.strip().splitlines() if ln.strip()]
+    if not lines:
+        out = (np.empty((0, 0), dtype=object), np.empty((0, 0)))
+    else:
+        delim = _detect_delimiter(lines)
+        grid = pd.Series(lines).str.split(delim, expand=True, regex=False) if delim else pd.Series(lines).str.split(expand=True)
+        grid = grid.apply(lambda c: c.str.strip())
+        flat = grid.stack(future_stack=True)
+        clean = flat.str.replace(r"[£%]", "", regex=True)
+        if delim != ",":
+            clean = clean.str.replace(",", "", regex=False)
+        nums = pd.to_numeric(clean, errors="coerce").to_numpy(dtype=float).reshape(grid.shape)
+        cells = grid.to_numpy(dtype=object)
+        cells[pd.isna(cells)] = None
+        out = (cells, nums)
+    for arr in out:
+        arr.flags.writeable = False
+    _PASTE_CACHE[key] = out
+    if len(_PASTE_CACHE) > _PASTE_CACHE_SIZE:
+        _PASTE_CACHE.popitem(last=False)
+    return out
+
+def parse_pasted_two_column(text: str, return_bad: bool = False):
     """
     Parse two-column data pasted from Excel (year or date, value).
     Supports YYYY or YYYY-MM (or dd/mm/YYYY) as first column.
+    Rows whose value is not numeric are dropped; with return_bad=True also returns the
+    boolean bad-row mask over the non-empty pasted lines.
     """
-    lines = [ln.strip() for ln in text.strip().splitlines() if ln.strip()]
-    rows = []
-    for ln in lines:
-        # split on tabs or commas or spaces
-        parts = [p for p in ln.replace(",", " ").split() if p]
-        if len(parts) == 1:
-            # Possibly the user pasted a single column of values, not acceptable here.
-            # We'll interpret index as a running counter; leave to caller to handle.
-            rows.append((None, float(parts[0])))
-        else:
-            idx = parts[0]
-            val = parts[1]
-            try:
-                v = float(val)
-            except Exception:
-                # Try second column that might be separated differently
-                try:
-                    v = float(parts[-1])
-                except Exception:
-                    continue
-            rows.append((idx, v))
-    # Build Series
-    if not rows:
-        return pd.Series(dtype=float)
-    idx_raw = [r[0] for r in rows]
-    vals = [r[1] for r in rows]
-    s = pd.Series(vals, index=idx_raw, dtype=float)
-    return s
+    cells, nums = tokenize_paste(text)
+    if cells.size == 0:
+        s = pd.Series(dtype=float)
+        return (s, np.zeros(0, dtype=bool)) if return_bad else s
+    n_cols = (cells != None).sum(axis=1)  # noqa: E711
+    last = nums[np.arange(len(nums)), np.maximum(n_cols - 1, 0)]
+    # Single-token rows carry only a value; otherwise take column 2, else the last token
+    vals = np.where(n_cols == 1, nums[:, 0], nums[:, 1] if nums.shape[1] > 1 else np.nan)
+    vals = np.where(np.isnan(vals) & (n_cols > 1), last, vals)
+    labels = np.where(n_cols == 1, None, cells[:, 0])
+    bad = np.isnan(vals)
+    s = pd.Series(vals[~bad].copy(), index=labels[~bad].copy(), dtype=float)
+    return (s, bad) if return_bad else s
+
+def _pasted_numbers(text: str) -> np.ndarray:
+    # All numeric cells, row-major; non-numeric tokens are skipped
+    _, nums = tokenize_paste(text)
+    flat = nums.ravel()
+    return flat[~np.isnan(flat)]
 
 def parse_one_column_values(text: str, index: List) -> pd.Series:
     """
     Parse a single column pasted values and use provided index to align.
     """
-    lines = [ln.strip() for ln in text.strip().splitlines() if ln.strip()]
-    vals = []
-    for ln in lines:
-        # Accept comma separated
-        parts = [p for p in ln.replace(",", " ").split() if p]
-        for p in parts:
-            try:
-                vals.append(float(p))
-            except:
-                pass
+    vals = _pasted_numbers(text)
     if len(vals) != len(index):
         raise ValueError(f"Expected {len(index)} values, got {len(vals)}.")
     s = pd.Series(vals, index=index, dtype=float)
@@ -62,20 +95,12 @@ def parse_one_column_values(text: str, index: List) -> pd.Series:
 def guess_frequency_from_series(s: pd.Series) -> Optional[str]:
     if s.empty:
         return None
-    # try to parse as dates
-    try:
-        # Accept YYYY or YYYY-MM or dates
-        idx_try = pd.to_datetime(s.index, errors="coerce", format="%Y-%m")
-        if idx_try.notna().sum() >= max(1, int(0.7 * len(s))):
-            return "monthly"
-    except Exception:
-        pass
-    try:
-        idx_try = pd.to_datetime(s.index, errors="coerce", format="%Y")
-        if idx_try.notna().sum() >= max(1, int(0.7 * len(s))):
-            return "yearly"
-    except Exception:
-        pass
+    # Accept YYYY, YYYYQn, YYYY-MM labels, tolerating stray labels (notes, totals)
+    fmt = dominant_label_format(s.index, min_share=0.7)
+    if fmt in ("yearly", "quarterly", "monthly"):
+        return fmt
+    if fmt == "monthly_name":
+        return "monthly"
     # Fallback: infer by length
     if len(s) > 80:
         return "monthly"
@@ -83,51 +108,367 @@ def guess_frequency_from_series(s: pd.Series) -> Optional[str]:
         return "quarterly"
     return "yearly"
 
-def read_csv_uploaded(file_bytes, index_col: int = 0, value_col: int = 1) -> pd.Series:
-    df = pd.read_csv(io.BytesIO(file_bytes))
-    idx = df.iloc[:, index_col]
-    vals = df.iloc[:, value_col]
-    s = pd.Series(vals.values, index=idx.values, dtype=float)
-    return s
+# Missing-value markers seen in ONS/OBR downloads
+CSV_NA_VALUES = ["", "..", "NA", "N/A", "n/a", "-", "x", ":"]
+
+def _csv_columns(file_bytes, index_col, value_col) -> Tuple[str, str]:
+    # Resolve positional or named columns from the header row only
+    header = list(pd.read_csv(io.BytesIO(file_bytes), nrows=0).columns)
+    pick = lambda c: header[c] if isinstance(c, int) else c
+    return pick(index_col), pick(value_col)
+
+def read_csv_uploaded(file_bytes, index_col=0, value_col=1) -> pd.Series:
+    """
+    Read one (label, value) pair of columns; only those columns are parsed, values pinned to float64.
+    """
+    idx_name, val_name = _csv_columns(file_bytes, index_col, value_col)
+    df = pd.read_csv(io.BytesIO(file_bytes), usecols=[idx_name, val_name],
+                     dtype={idx_name: str, val_name: "float64"}, na_values=CSV_NA_VALUES)
+    return pd.Series(df[val_name].to_numpy(), index=df[idx_name].to_numpy(), dtype=float)
+
+def _chunk_partials(labels, values: np.ndarray, target_freq: str, cover: bool = False) -> Tuple:
+    # Per-period sum, count and last value of one chunk, keyed by period ordinal; with cover, also the
+    # chunk's source frequency and (period, source month) pairs for the complete-period check
+    keep = ~np.isnan(values)
+    no_cover = (None, np.empty((0, 2), dtype=np.int64))
+    if not keep.any():
+        return (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64), np.empty(0)) + no_cover
+    kept = pd.Index(labels)[keep]
+    ords = parse_period_index(kept, target_freq).asi8
+    vals = values[keep]
+    uniq, inv = np.unique(ords, return_inverse=True)
+    sums = np.bincount(inv, weights=vals, minlength=len(uniq))
+    counts = np.bincount(inv, minlength=len(uniq))
+    last_pos = np.zeros(len(uniq), dtype=np.int64)
+    np.maximum.at(last_pos, inv, np.arange(len(vals)))
+    if not cover:
+        return (uniq, sums, counts, vals[last_pos]) + no_cover
+    fmt = detect_index_format(kept)
+    src = fmt if fmt in FREQ_RANK else "monthly"  # month names and dates count by month
+    months = parse_period_index(kept, "monthly").asi8
+    return uniq, sums, counts, vals[last_pos], src, np.unique(np.column_stack([ords, months]), axis=0)
+
+def _csv_chunks_pandas(file_bytes, idx_name: str, val_name: str, chunksize: int):
+    reader = pd.read_csv(io.BytesIO(file_bytes), usecols=[idx_name, val_name], chunksize=chunksize,
+                         dtype={idx_name: str, val_name: "float64"}, na_values=CSV_NA_VALUES)
+    for chunk in reader:
+        yield chunk[idx_name].to_numpy(), chunk[val_name].to_numpy(dtype=float)
+
+def _csv_chunks_arrow(file_bytes, idx_name: str, val_name: str, chunksize: int):
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    reader = pacsv.open_csv(
+        pa.BufferReader(file_bytes),
+        read_options=pacsv.ReadOptions(block_size=max(chunksize * 32, 1 << 16)),
+        convert_options=pacsv.ConvertOptions(include_columns=[idx_name, val_name],
+                                             column_types={idx_name: pa.string(), val_name: pa.float64()},
+                                             null_values=CSV_NA_VALUES, strings_can_be_null=True),
+    )
+    for batch in reader:
+        labels = batch.column(idx_name).to_numpy(zero_copy_only=False)
+        vals = batch.column(val_name).to_numpy(zero_copy_only=False).astype(float)
+        yield labels, vals
+
+def stream_csv_to_freq(
+    file_bytes,
+    target_freq: str,
+    how: str = "mean",
+    index_col=0,
+    value_col=1,
+    chunksize: int = 100_000,
+    engine: str = "pandas",
+) -> pd.Series:
+    """
+    Stream a (label, value) CSV in chunks and aggregate to target_freq as it is read
+    ('mean', 'sum' or 'last' over observations falling in each period).
+    With 'sum', target periods not fully covered by the source (e.g. a year with three quarters)
+    are dropped, as a partial total is not the period's flow; daily data is checked by month only.
+    Only the two columns are parsed, values as float64; the raw file is never held as one frame.
+    engine='pyarrow' uses pyarrow's streaming CSV reader and falls back to pandas if pyarrow is missing.
+    """
+    if how not in RESAMPLE_HOWS:
+        raise ValueError(f"how must be one of {RESAMPLE_HOWS}")
+    idx_name, val_name = _csv_columns(file_bytes, index_col, value_col)
+    chunks = _csv_chunks_pandas
+    if engine == "pyarrow":
+        try:
+            import pyarrow.csv  # noqa: F401
+            chunks = _csv_chunks_arrow
+        except ImportError:
+            pass
+    parts = [_chunk_partials(labels, vals, target_freq, cover=how == "sum") for labels, vals in chunks(file_bytes, idx_name, val_name, chunksize)]
+    code = FREQ_TO_PANDAS[target_freq]
+    if not parts or not sum(len(p[0]) for p in parts):
+        return pd.Series(dtype=float, index=pd.PeriodIndex([], freq=code))
+    # Merge partials; periods spanning chunk boundaries combine, later chunks win for 'last'
+    ords, sums, counts, lasts = (np.concatenate(x) for x in list(zip(*parts))[:4])
+    uniq, inv = np.unique(ords, return_inverse=True)
+    if how == "last":
+        last_pos = np.zeros(len(uniq), dtype=np.int64)
+        np.maximum.at(last_pos, inv, np.arange(len(ords)))
+        vals = lasts[last_pos]
+    else:
+        vals = np.bincount(inv, weights=sums, minlength=len(uniq))
+        if how == "mean":
+            vals = vals / np.bincount(inv, weights=counts, minlength=len(uniq))
+    out = pd.Series(vals, index=pd.PeriodIndex.from_ordinals(uniq, freq=code))
+    if how == "sum":
+        out = out[_complete(parts, uniq, target_freq)]
+    return out
+
+def _complete(parts, uniq: np.ndarray, target_freq: str) -> np.ndarray:
+    # Target periods holding every source period they span; the coarsest source frequency seen sets the count
+    srcs = [p[4] for p in parts if p[4] is not None]
+    src = min(srcs, key=FREQ_RANK.get)
+    if FREQ_RANK[src] <= FREQ_RANK[target_freq]:
+        return np.ones(len(uniq), dtype=bool)
+    pairs = np.unique(np.concatenate([p[5] for p in parts]), axis=0)
+    seen = np.bincount(np.searchsorted(uniq, pairs[:, 0]), minlength=len(uniq))
+    return seen >= PERIODS_PER_YEAR[src] // PERIODS_PER_YEAR[target_freq]
+
+# Parsed (label, value) columns keyed by (content hash, sheet, columns)
+_EXCEL_CACHE: "OrderedDict[Tuple, Tuple[pd.Index, np.ndarray]]" = OrderedDict()
+_EXCEL_CACHE_SIZE = 16
+
+def _is_xls(file_bytes) -> bool:
+    # Legacy .xls files are OLE compound documents; .xlsx/.xlsm are zip archives
+    return bytes(file_bytes[:4]) == b"\xd0\xcf\x11\xe0"
+
+def _sheet_ref(names: List[str], sheet_name) -> str:
+    if isinstance(sheet_name, int):
+        return names[sheet_name]
+    if sheet_name not in names:
+        raise ValueError(f"Sheet {sheet_name!r} not found; available: {', '.join(names)}")
+    return sheet_name
+
+def excel_sheets(file_bytes) -> List[str]:
+    """
+    Sheet names without parsing any cells (openpyxl read-only, or xlrd on demand for .xls).
+    """
+    if _is_xls(file_bytes):
+        import xlrd
+        return xlrd.open_workbook(file_contents=bytes(file_bytes), on_demand=True).sheet_names()
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def excel_columns(file_bytes, sheet_name=0) -> List[str]:
+    """
+    Header row of one sheet, read without loading the rest of the sheet.
+    """
+    if _is_xls(file_bytes):
+        import xlrd
+        book = xlrd.open_workbook(file_contents=bytes(file_bytes), on_demand=True)
+        sh = book.sheet_by_name(_sheet_ref(book.sheet_names(), sheet_name))
+        return [str(v) for v in sh.row_values(0)] if sh.nrows else []
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        ws = wb[_sheet_ref(wb.sheetnames, sheet_name)]
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        return ["" if v is None else str(v) for v in header]
+    finally:
+        wb.close()
+
+def _read_excel_pair(file_bytes, sheet_name, i_idx: int, i_val: int) -> Tuple[List, List]:
+    if _is_xls(file_bytes):
+        import xlrd
+        book = xlrd.open_workbook(file_contents=bytes(file_bytes), on_demand=True)
+        sh = book.sheet_by_name(_sheet_ref(book.sheet_names(), sheet_name))
+        labels = []
+        for c in sh.col_slice(i_idx, start_rowx=1):
+            labels.append(xlrd.xldate_as_datetime(c.value, book.datemode) if c.ctype == xlrd.XL_CELL_DATE else c.value)
+        return labels, sh.col_values(i_val, start_rowx=1)
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        ws = wb[_sheet_ref(wb.sheetnames, sheet_name)]
+        lo = min(i_idx, i_val)
+        labels, vals = [], []
+        # Stream rows, materializing only the column span that holds the two columns
+        for row in ws.iter_rows(min_row=2, min_col=lo + 1, max_col=max(i_idx, i_val) + 1, values_only=True):
+            labels.append(row[i_idx - lo] if len(row) > i_idx - lo else None)
+            vals.append(row[i_val - lo] if len(row) > i_val - lo else None)
+        return labels, vals
+    finally:
+        wb.close()
 
 def read_excel_uploaded(file_bytes, sheet_name=0, index_col=0, value_col=1) -> pd.Series:
-    df = pd.read_excel(io.BytesIO(file_bytes), sheet_name=sheet_name)
-    idx = df.iloc[:, index_col]
-    vals = df.iloc[:, value_col]
-    s = pd.Series(vals.values, index=idx.values, dtype=float)
-    return s
+    """
+    Read one (label, value) column pair from one sheet in read-only mode.
+    Columns may be positions or header names. Parsed columns are cached on the file's
+    content hash, so reruns with the same upload skip the workbook entirely.
+    """
+    key = (hashlib.sha1(bytes(file_bytes)).hexdigest(), sheet_name, index_col, value_col)
+    hit = _EXCEL_CACHE.get(key)
+    if hit is None:
+        if isinstance(index_col, int) and isinstance(value_col, int):
+            i_idx, i_val = index_col, value_col
+        else:
+            header = excel_columns(file_bytes, sheet_name)
+            pos = lambda c: c if isinstance(c, int) else header.index(str(c))
+            i_idx, i_val = pos(index_col), pos(value_col)
+        labels, vals = _read_excel_pair(file_bytes, sheet_name, i_idx, i_val)
+        vals = pd.to_numeric(pd.Series(vals, dtype=object), errors="coerce").to_numpy(dtype=float)
+        keep = np.array([lab is not None and lab != "" for lab in labels], dtype=bool) if labels else np.zeros(0, dtype=bool)
+        hit = (pd.Index([lab for lab, k in zip(labels, keep) if k]), vals[keep])
+        _EXCEL_CACHE[key] = hit
+        if len(_EXCEL_CACHE) > _EXCEL_CACHE_SIZE:
+            _EXCEL_CACHE.popitem(last=False)
+    else:
+        _EXCEL_CACHE.move_to_end(key)
+    idx, vals = hit
+    return pd.Series(vals.copy(), index=idx.copy(), dtype=float)
 
 def normalize_index_to_freq(s: pd.Series, target_freq: str) -> pd.Series:
     """
     Convert free-form index to PeriodIndex of target frequency.
+    Labels coarser than the target map to the last period they contain (see parse_period_index).
     """
     if s.empty:
         return s
     try:
-        dt = pd.to_datetime(s.index.astype(str), errors="coerce")
-        p = dt.to_period(FREQ_TO_PANDAS[target_freq])
-        s.index = p
-        return s
-    except Exception:
-        # Try parse year-only ints/strings
-        try:
-            years = [int(str(x)[:4]) for x in s.index]
-            p = pd.PeriodIndex([pd.Period(str(y), freq="Y") for y in years])
-            s.index = p
-            if target_freq != "yearly":
-                # upsample with ffill
-                s = s.to_timestamp().resample({"monthly": "MS", "quarterly": "QS"}[target_freq]).ffill().to_period({"monthly": "M", "quarterly": "Q"}[target_freq])
-            return s
-        except Exception:
-            return s
+        s.index = parse_period_index(s.index, target_freq)
+    except ValueError:
+        pass
+    return s
+
+_LONG_COLS = {"metric", "period", "value"}
+
+def _metric_lookup(metrics_def) -> Dict[str, str]:
+    # Accept metric ids and display names, case-insensitively
+    look = {}
+    for mid, m in metrics_def.items():
+        look[mid.lower()] = mid
+        look[m.display_name.lower()] = mid
+    return look
+
+def _frames_from_upload(file_bytes, filename: str = "") -> Dict[str, pd.DataFrame]:
+    """
+    Parse a CSV or a whole workbook once; returns sheet name -> DataFrame (CSV maps to a single entry).
+    """
+    if filename.lower().endswith((".xlsx", ".xlsm", ".xls")):
+        return pd.read_excel(io.BytesIO(file_bytes), sheet_name=None)
+    return {"csv": pd.read_csv(io.BytesIO(file_bytes))}
+
+def read_bulk_template(
+    file_bytes,
+    filename: str = "",
+    metrics_def=None,
+    default_freqs: Optional[Dict[str, str]] = None,
+) -> Tuple[Dict[str, Dict], List[str]]:
+    """
+    Read many metrics from one file: a long template (metric, period, value[, unit, frequency])
+    like sample_data/example_metrics_template.csv, a wide table (period column + one column per
+    metric) or a workbook whose sheets are either. Columns map to metric ids or display names.
+    A sheet named after a metric whose columns are not metrics holds that metric alone
+    (period column, then values); one with no value column gives the metric no observations.
+    Indexes are normalized once per frequency across all metrics. Rows whose period label does not
+    parse are dropped and listed per metric under 'dropped', so one stray row does not reject the file.
+    Returns ({metric_id: {'series', 'unit', 'freq', 'dropped'}}, unmapped column/metric names).
+    """
+    if metrics_def is None:
+        from .metrics import all_metrics_definition
+        metrics_def = all_metrics_definition()
+    default_freqs = default_freqs or {}
+    look = _metric_lookup(metrics_def)
+    long_parts = []
+    empty_metrics: List[str] = []
+    unmapped: List[str] = []
+    for sheet, df in _frames_from_upload(file_bytes, filename).items():
+        df = df.dropna(how="all")
+        cols = {str(c).strip().lower(): c for c in df.columns}
+        if _LONG_COLS.issubset(cols):
+            part = pd.DataFrame({
+                "metric": df[cols["metric"]].astype(str).str.strip(),
+                "period": df[cols["period"]].astype(str).str.strip(),
+                "value": pd.to_numeric(df[cols["value"]], errors="coerce"),
+                "unit": df[cols["unit"]] if "unit" in cols else None,
+                "frequency": df[cols["frequency"]] if "frequency" in cols else None,
+            })
+        else:
+            # Wide: first column holds periods, the others are metrics
+            period_col = df.columns[0]
+            value_cols = list(df.columns[1:])
+            sheet_metric = look.get(str(sheet).strip().lower())
+            if sheet_metric is not None and not any(str(c).strip().lower() in look for c in value_cols):
+                # One sheet per metric: the first value column, whatever its header
+                if not value_cols:
+                    empty_metrics.append(sheet_metric)
+                    continue
+                value_cols = value_cols[:1]
+                wide = df.set_index(period_col)[value_cols]
+                wide.columns = [sheet_metric]
+            else:
+                wide = df.set_index(period_col)[value_cols]
+                wide.columns = [str(c).strip() for c in wide.columns]
+            part = wide.rename_axis("period").reset_index().melt(id_vars="period", var_name="metric", value_name="value")
+            part["period"] = part["period"].astype(str).str.strip()
+            part["value"] = pd.to_numeric(part["value"], errors="coerce")
+            part["unit"] = None
+            part["frequency"] = None
+        long_parts.append(part)
+    empty = {mid: {"series": pd.Series(dtype=float, name=mid), "unit": metrics_def[mid].unit,
+                   "freq": default_freqs.get(mid, metrics_def[mid].default_freq), "dropped": []} for mid in empty_metrics}
+    if not long_parts:
+        return empty, unmapped
+    data = pd.concat(long_parts, ignore_index=True)
+    data["metric_id"] = data["metric"].str.lower().map(look)
+    unmapped = sorted(data.loc[data["metric_id"].isna(), "metric"].unique().tolist())
+    data = data[data["metric_id"].notna() & data["value"].notna()]
+    # Frequency per metric: explicit column, else detected from its labels, else the caller's default
+    freqs: Dict[str, str] = {}
+    for mid, grp in data.groupby("metric_id", sort=False):
+        explicit = grp["frequency"].dropna().astype(str).str.strip().str.lower()
+        if not explicit.empty and explicit.iloc[0] in FREQ_TO_PANDAS:
+            freqs[mid] = explicit.iloc[0]
+            continue
+        fmt = dominant_label_format(grp["period"])
+        if fmt in FREQ_TO_PANDAS:
+            freqs[mid] = fmt
+        elif fmt == "monthly_name":
+            freqs[mid] = "monthly"
+        else:
+            freqs[mid] = default_freqs.get(mid, metrics_def[mid].default_freq)
+    data["freq"] = data["metric_id"].map(freqs)
+    # One vectorized index normalization per frequency
+    out: Dict[str, Dict] = dict(empty)
+    for f, grp in data.groupby("freq", sort=False):
+        periods, ok = parse_period_labels(grp["period"], f)
+        labels = grp["period"].to_numpy()
+        vals = grp["value"].to_numpy(dtype=float)[ok]
+        mids = grp["metric_id"].to_numpy()
+        units = grp["unit"]
+        for mid in pd.unique(mids):
+            sel = mids == mid
+            u = units[sel].dropna()
+            out[mid] = {
+                "series": pd.Series(vals[sel[ok]], index=periods[sel[ok]], name=mid),
+                "unit": str(u.iloc[0]) if not u.empty else metrics_def[mid].unit,
+                "freq": f,
+                "dropped": labels[sel & ~ok].tolist(),
+            }
+    return out, unmapped
 
 def load_obr_csv(file_bytes) -> pd.DataFrame:
     """
     Load an OBR mapping CSV the user provides and return a tidy DataFrame.
     The expected format can vary; we accept wide format and melt if needed.
+    Tidy files (metric_id/app_metric_id, year, value) are normalized; wide files whose first
+    column holds years are melted. Anything else is returned as read.
     """
+    from .obr import parse_years, tidy_obr_projection
     df = pd.read_csv(io.BytesIO(file_bytes))
-    # If appears tidy, return
+    cols = {str(c).strip().lower() for c in df.columns}
+    if {"year", "value"}.issubset(cols) and cols & {"metric_id", "app_metric_id"}:
+        return tidy_obr_projection(df)
+    first = df.columns[0]
+    years = parse_years(df[first])
+    if len(df.columns) > 1 and years.notna().any() and years.dropna().between(1900, 2200).all():
+        return tidy_obr_projection(df, year_col=first)
     return df
 
 def paste_matrix_to_series(paste: str, index_labels: List[str]) -> pd.Series:
@@ -135,16 +476,7 @@ def paste_matrix_to_series(paste: str, index_labels: List[str]) -> pd.Series:
     Allow Excel-like pasting of a column into a pre-defined index labels list.
     """
     # Flatten values in row-major from paste
-    tokens = []
-    for ln in paste.splitlines():
-        parts = [p for p in ln.split("\t") if p != ""]
-        if not parts:
-            parts = [p for p in ln.replace(",", " ").split() if p]
-        for p in parts:
-            try:
-                tokens.append(float(p))
-            except:
-                pass
+    tokens = _pasted_numbers(paste)
     if len(tokens) != len(index_labels):
         raise ValueError(f"Expected {len(index_labels)} numbers, got {len(tokens)}")
-    return pd.Series(tokens, index=index_labels, dtype=float)
\ No newline at end of file
+    return pd.Series(tokens, index=index_labels, dtype=float)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
 from .config import SUPPORTED_FREQS
 
 @dataclass
@@ -99,13 +100,32 @@ def all_metrics_definition() -> Dict[str, Metric]:
         user_selectable_frequency=False,
     )
 
+    # Yearly derived ratios share one stock/flow convention (as reconcile_sfa and
+    # native_frequency_inputs): debt end-of-year, flows summed over the year, GDP as the
+    # annual total (rolling_annual_gdp); sub-annual inputs count for complete years only.
+    def _annual(s, stock=False):
+        from .engine.calibration import flow_at_freq, stock_at_freq
+        from .validation import _complete_periods
+        if s.empty:
+            return s
+        y = stock_at_freq(s, "yearly") if stock else flow_at_freq(s, "yearly")
+        return y[y.index.isin(_complete_periods(s, "yearly"))]
+
+    def _annual_gdp(dm):
+        from .engine.calibration import rolling_annual_gdp
+        from .validation import _complete_periods
+        gdp = dm.get_series("gdp_nominal")
+        if gdp.empty:
+            return gdp
+        y = rolling_annual_gdp(gdp, "yearly").dropna()
+        return y[y.index.isin(_complete_periods(gdp, "yearly"))]
+
     # Derived metric: primary_balance = -(psnb_ex) + debt_interest (sign convention)
     # If PSNB is positive (deficit), primary balance is deficit + interest -> negative primary balance
     # Define pb so that positive pb reduces debt/GDP
     def compute_primary_balance(dm):
-        import pandas as pd
-        psnb = dm.get_series("psnb_ex")  # bn
-        di = dm.get_series("debt_interest")  # bn
+        psnb = _annual(dm.get_series("psnb_ex"))  # bn over the year
+        di = _annual(dm.get_series("debt_interest"))  # bn over the year
         # Primary balance (bn): PB = -PSNB - Interest? Let's carefully define:
         # PSNB = Primary Deficit + Interest + Net Investment adjustments; for consistency we assume:
         # Primary balance approximate = - (PSNB - Interest)
@@ -130,12 +150,10 @@ def all_metrics_definition() -> Dict[str, Metric]:
 
     # Derived metric: debt ratio b = PSND / GDP
     def compute_debt_ratio(dm):
-        psnd = dm.get_series("psnd_ex")
-        gdp = dm.get_series("gdp_nominal")
-        aligned = dm.align_series([psnd, gdp], target_freq="yearly", how="intersection")
-        psnd_al, gdp_al = aligned[0], aligned[1]
-        b = (psnd_al / gdp_al).rename("debt_ratio")
-        return b
+        psnd_y = _annual(dm.get_series("psnd_ex"), stock=True)
+        gdp_y = _annual_gdp(dm)
+        idx = psnd_y.index.intersection(gdp_y.index)
+        return (psnd_y.reindex(idx) / gdp_y.reindex(idx)).rename("debt_ratio")
 
     metrics["debt_ratio"] = Metric(
         id="debt_ratio",
@@ -153,10 +171,10 @@ def all_metrics_definition() -> Dict[str, Metric]:
 
     # Derived: effective interest rate r = interest / avg debt stock
     def compute_effective_rate(dm):
-        import pandas as pd
-        psnd = dm.get_series("psnd_ex")
-        di = dm.get_series("debt_interest")
-        psnd_y, di_y = dm.align_series([psnd, di], target_freq="yearly", how="intersection")
+        psnd_y = _annual(dm.get_series("psnd_ex"), stock=True)
+        di_y = _annual(dm.get_series("debt_interest"))
+        idx = psnd_y.index.intersection(di_y.index)
+        psnd_y, di_y = psnd_y.reindex(idx), di_y.reindex(idx)
         avg_debt = (psnd_y.shift(1) + psnd_y) / 2.0
         r = (di_y / avg_debt).rename("effective_r")
         return r
@@ -164,7 +182,7 @@ def all_metrics_definition() -> Dict[str, Metric]:
     metrics["effective_r"] = Metric(
         id="effective_r",
         display_name="Effective Interest Rate (derived)",
-        description="Debt interest divided by average debt stock.",
+        description="Debt interest over the year divided by average end-of-year debt stock.",
         allowed_freqs=["yearly"],
         default_freq="yearly",
         unit="ratio",
@@ -177,8 +195,8 @@ def all_metrics_definition() -> Dict[str, Metric]:
 
     # Derived: nominal GDP growth g
     def compute_nominal_g(dm):
-        gdp = dm.get_series("gdp_nominal")
-        g_y = dm.resample_series(gdp, target_freq="yearly")
+        # Same annual GDP as the ratio denominators
+        g_y = _annual_gdp(dm)
         g = (g_y.pct_change()).rename("nominal_g")
         return g
 
@@ -196,4 +214,45 @@ def all_metrics_definition() -> Dict[str, Metric]:
         user_selectable_frequency=False,
     )
 
+    # Derived: primary balance as a share of GDP (positive reduces debt/GDP)
+    def compute_pb_ratio(dm):
+        pb_y = _annual(dm.get_series("primary_balance"))
+        gdp_y = _annual_gdp(dm)
+        idx = pb_y.index.intersection(gdp_y.index)
+        return (pb_y.reindex(idx) / gdp_y.reindex(idx)).rename("pb_ratio")
+
+    metrics["pb_ratio"] = Metric(
+        id="pb_ratio",
+        display_name="Primary Balance Ratio (derived)",
+        description="Primary balance as a share of nominal GDP.",
+        allowed_freqs=["yearly"],
+        default_freq="yearly",
+        unit="ratio",
+        required=False,
+        depends_on=["primary_balance", "gdp_nominal"],
+        derived=True,
+        compute_fn=compute_pb_ratio,
+        user_selectable_frequency=False,
+    )
+
+    # Derived: stock-flow adjustment ratio (ΔPSND - PSNB) / GDP
+    def compute_sfa_ratio(dm):
+        from .validation import reconcile_sfa
+        rec = reconcile_sfa(dm.get_series("psnd_ex"), dm.get_series("psnb_ex"), dm.get_series("gdp_nominal"), freq="yearly")
+        return rec["sfa_ratio"].dropna().rename("sfa_ratio") if "sfa_ratio" in rec else pd.Series(dtype=float)
+
+    metrics["sfa_ratio"] = Metric(
+        id="sfa_ratio",
+        display_name="Stock-Flow Adjustment Ratio (derived)",
+        description="Change in PSND less PSNB, as a share of nominal GDP.",
+        allowed_freqs=["yearly"],
+        default_freq="yearly",
+        unit="ratio",
+        required=False,
+        depends_on=["psnd_ex", "psnb_ex", "gdp_nominal"],
+        derived=True,
+        compute_fn=compute_sfa_ratio,
+        user_selectable_frequency=False,
+    )
+
     return metrics
\ No newline at end of file
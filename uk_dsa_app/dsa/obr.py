@@ -1,26 +1,137 @@
 from __future__ import annotations
+import re
 from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 
-def tidy_obr_projection(df: pd.DataFrame, year_col: Optional[str] = None) -> pd.DataFrame:
+TIDY_COLUMNS = ["metric_id", "year", "value"]
+
+def _coerce(raw: pd.Series) -> pd.Series:
+    # Numbers as published: thousands separators, trailing % and blanks are common in EFO tables
+    txt = raw.astype(str).str.strip().str.replace(",", "", regex=False).str.rstrip("%")
+    return pd.to_numeric(txt.where(raw.notna()), errors="coerce")
+
+_YEAR = r"^(\d{4})(?:\.0+)?$"
+# Fiscal years as OBR labels them: 2024-25, 2024/25, 2024-2025, FY2024-25
+_FISCAL_YEAR = r"^(?:FY\s*)?(\d{4})\s*[-/–]\s*(\d{2}|\d{4})$"
+
+def parse_years(raw: pd.Series) -> pd.Series:
+    """
+    Calendar (2024) or fiscal-year (2024-25) labels to the starting year as a float, NaN where
+    a label is neither; a fiscal year must end the year after it starts.
+    """
+    txt = raw.astype(str).str.strip()
+    cal = pd.to_numeric(txt.str.extract(_YEAR)[0], errors="coerce")
+    fy = txt.str.extract(_FISCAL_YEAR, flags=re.IGNORECASE)
+    start = pd.to_numeric(fy[0], errors="coerce")
+    end = pd.to_numeric(fy[1], errors="coerce")
+    end = end.where(fy[1].str.len() == 4, (start // 100) * 100 + end)
+    fiscal = start.where(end == start + 1)
+    return cal.fillna(fiscal).where(raw.notna())
+
+def tidy_obr_projection(df: pd.DataFrame, year_col: Optional[str] = None, return_mask: bool = False):
     """
     Try to coerce an OBR-like projection DataFrame into tidy form with columns:
     metric_id, year, value
+    Wide tables (year_col plus one column per metric) are melted in one step; cells that are
+    present but not numeric are dropped. Years may be calendar or fiscal (2024-25 -> 2024, see
+    parse_years); rows whose year does not parse are dropped. With return_mask=True also returns
+    a boolean frame shaped like the value cells, True where coercion of the value or its year failed.
     """
-    df = df.copy()
     if year_col and year_col in df.columns:
-        # assume wide columns with metric names
-        metrics = [c for c in df.columns if c != year_col]
-        rows = []
-        for _, row in df.iterrows():
-            y = row[year_col]
-            for m in metrics:
-                try:
-                    val = float(row[m])
-                except Exception:
-                    continue
-                rows.append({"metric_id": m, "year": int(y), "value": val})
-        return pd.DataFrame(rows)
+        wide = df.set_index(year_col)
+        long = wide.reset_index().melt(id_vars=year_col, var_name="metric_id", value_name="raw")
+        value = _coerce(long["raw"])
+        year = parse_years(long[year_col])
+        bad = long["raw"].notna() & (value.isna() | year.isna())
+        keep = value.notna() & year.notna()
+        tidy = pd.DataFrame({"metric_id": long["metric_id"].astype(str)[keep].to_numpy(),
+                             "year": year[keep].astype(int).to_numpy(),
+                             "value": value[keep].to_numpy(dtype=float)})
+        mask = pd.DataFrame(bad.to_numpy().reshape(wide.shape[1], wide.shape[0]).T, index=wide.index, columns=wide.columns)
+        return (tidy, mask) if return_mask else tidy
     # else if tidy already
-    # Expect columns: obr_series_name, app_metric_id, year, value
-    return df
\ No newline at end of file
+    # Expect columns: metric_id (or app_metric_id), year, value
+    cols = {str(c).strip().lower(): c for c in df.columns}
+    mid_col = cols.get("metric_id", cols.get("app_metric_id"))
+    if mid_col is None or "year" not in cols or "value" not in cols:
+        return (df, pd.DataFrame()) if return_mask else df
+    value = _coerce(df[cols["value"]])
+    year = parse_years(df[cols["year"]])
+    bad = df[cols["value"]].notna() & (value.isna() | year.isna())
+    keep = value.notna() & year.notna()
+    tidy = pd.DataFrame({"metric_id": df[mid_col].astype(str).str.strip()[keep].to_numpy(),
+                         "year": year[keep].astype(int).to_numpy(),
+                         "value": value[keep].to_numpy(dtype=float)})
+    return (tidy, bad.to_frame("value")) if return_mask else tidy
+
+def apply_obr_mapping(tidy: pd.DataFrame, mapping: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename OBR series names to app metric ids using a mapping table with columns
+    obr_series_name, app_metric_id (see sample_data/example_obr_mapping.csv). Unmapped names are kept.
+    """
+    names = dict(zip(mapping["obr_series_name"].astype(str), mapping["app_metric_id"].astype(str)))
+    out = tidy.copy()
+    out["metric_id"] = out["metric_id"].map(names).fillna(out["metric_id"])
+    return out
+
+class OBRVintageStore:
+    """
+    Many OBR forecast vintages in one value Series indexed by (vintage, metric_id, year), kept sorted
+    so any vintage/metric selection is an index slice. Vintages keep their insertion order.
+    """
+    def __init__(self):
+        self.values = pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], [], []], names=["vintage", "metric_id", "year"]))
+        self.order: List[str] = []
+
+    def add(self, vintage: str, tidy: pd.DataFrame):
+        """
+        Add or replace one vintage from a tidy (metric_id, year, value) frame.
+        """
+        new = pd.Series(tidy["value"].to_numpy(dtype=float),
+                        index=pd.MultiIndex.from_arrays([np.full(len(tidy), vintage, dtype=object),
+                                                         tidy["metric_id"].astype(str).to_numpy(),
+                                                         tidy["year"].astype(int).to_numpy()],
+                                                        names=["vintage", "metric_id", "year"]))
+        # Duplicate (metric, year) rows within a vintage: the last one wins
+        new = new[~new.index.duplicated(keep="last")]
+        if vintage in self.order:
+            self.remove(vintage)
+        self.order.append(vintage)
+        self.values = pd.concat([self.values, new]).sort_index()
+
+    def remove(self, vintage: str):
+        if vintage in self.order:
+            self.order.remove(vintage)
+            self.values = self.values.drop(vintage, level="vintage")
+
+    def vintages(self) -> List[str]:
+        return list(self.order)
+
+    def metrics(self) -> List[str]:
+        return sorted(self.values.index.get_level_values("metric_id").unique())
+
+    def paths(self, metric_id: str, vintages: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Years x vintages table of one metric (columns in the requested or insertion order).
+        """
+        vs = vintages if vintages is not None else self.order
+        sub = self.values.xs(metric_id, level="metric_id")
+        sub = sub[sub.index.get_level_values("vintage").isin(vs)]
+        table = sub.unstack("vintage")
+        return table.reindex(columns=[v for v in vs if v in table.columns])
+
+    def path(self, metric_id: str, vintage: str, freq: str = "Y") -> pd.Series:
+        """
+        One forecast as a yearly PeriodIndex series.
+        """
+        s = self.paths(metric_id, [vintage])[vintage].dropna()
+        return pd.Series(s.to_numpy(), index=pd.PeriodIndex(s.index.astype(int), freq=freq), name=vintage)
+
+    def differences(self, metric_id: str, base: str, vintages: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Each vintage minus the base vintage, by year.
+        """
+        table = self.paths(metric_id, vintages)
+        base_path = self.paths(metric_id, [base])[base] if base not in table.columns else table[base]
+        return table.sub(base_path, axis=0).drop(columns=[base], errors="ignore")
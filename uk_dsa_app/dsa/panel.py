@@ -0,0 +1,137 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .config import FREQ_TO_PANDAS, SUPPORTED_FREQS
+
+@dataclass
+class FrequencyPanel:
+    """
+    All metrics at one frequency on a shared PeriodIndex.
+    values: float array shape (n_metrics, n_periods); each metric row is contiguous,
+    so a time window of one metric is a zero-copy view.
+    mask: True where the metric has an observation at that period.
+    first/last: covered row range per metric (inclusive), -1 when empty.
+    """
+    freq: str
+    start: Optional[pd.Period] = None
+    values: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=float))
+    mask: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=bool))
+    columns: Dict[str, int] = field(default_factory=dict)
+    first: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    last: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+    @property
+    def index(self) -> pd.PeriodIndex:
+        code = FREQ_TO_PANDAS[self.freq]
+        if self.start is None:
+            return pd.PeriodIndex([], freq=code)
+        return pd.period_range(start=self.start, periods=self.values.shape[1], freq=code)
+
+    def _grow(self, start_ord: int, stop_ord: int, n_rows: int):
+        # Reallocate only when the period range or metric count extends
+        n_old_rows, n_old = self.values.shape
+        old_start = self.start.ordinal if self.start is not None else start_ord
+        new_start = min(old_start, start_ord)
+        new_stop = max(old_start + n_old, stop_ord)
+        if new_start == old_start and new_stop == old_start + n_old and n_rows <= n_old_rows:
+            return
+        n_rows = max(n_rows, n_old_rows)
+        values = np.full((n_rows, new_stop - new_start), np.nan, dtype=float)
+        mask = np.zeros((n_rows, new_stop - new_start), dtype=bool)
+        off = old_start - new_start
+        values[:n_old_rows, off:off + n_old] = self.values
+        mask[:n_old_rows, off:off + n_old] = self.mask
+        first = np.full(n_rows, -1, dtype=np.int64)
+        last = np.full(n_rows, -1, dtype=np.int64)
+        first[:n_old_rows] = np.where(self.first >= 0, self.first + off, -1)
+        last[:n_old_rows] = np.where(self.last >= 0, self.last + off, -1)
+        self.values, self.mask, self.first, self.last = values, mask, first, last
+        self.start = pd.Period(ordinal=new_start, freq=FREQ_TO_PANDAS[self.freq])
+
+    def write(self, metric_id: str, s: pd.Series):
+        """
+        Store s (PeriodIndex at this panel's frequency) as metric_id, replacing any previous values.
+        """
+        row = self.columns.get(metric_id, len(self.columns))
+        if s.empty:
+            if metric_id in self.columns:
+                self.values[row] = np.nan
+                self.mask[row] = False
+                self.first[row] = self.last[row] = -1
+            return
+        ords = s.index.asi8
+        self._grow(int(ords.min()), int(ords.max()) + 1, row + 1)
+        self.columns[metric_id] = row
+        pos = ords - self.start.ordinal
+        self.values[row] = np.nan
+        self.mask[row] = False
+        self.values[row, pos] = s.to_numpy(dtype=float)
+        self.mask[row, pos] = True
+        self.first[row] = pos.min()
+        self.last[row] = pos.max()
+
+    def window(self, metric_ids: List[str], how: str = "intersection") -> Tuple[int, int]:
+        """
+        Row range [a, b) covering the metrics: overlap ('intersection') or hull ('union').
+        """
+        rows = [self.columns[m] for m in metric_ids if m in self.columns and self.first[self.columns[m]] >= 0]
+        if len(rows) < len(metric_ids) and how == "intersection":
+            return 0, 0
+        if not rows:
+            return 0, 0
+        f, l = self.first[rows], self.last[rows]
+        if how == "union":
+            return int(f.min()), int(l.max()) + 1
+        a, b = int(f.max()), int(l.min()) + 1
+        return (a, b) if b > a else (0, 0)
+
+    def read(self, metric_ids: List[str], how: str = "intersection") -> List[pd.Series]:
+        """
+        Aligned series for metric_ids. Values are read-only views into the panel whenever the
+        window is fully observed (copy before mutating); gaps under 'intersection' fall back to a masked copy.
+        """
+        a, b = self.window(metric_ids, how)
+        idx = self.index[a:b]
+        rows = [self.columns.get(m) for m in metric_ids]
+        if how == "intersection" and b > a:
+            ok = self.mask[rows, a:b].all(axis=0)
+            if not ok.all():
+                sel = np.flatnonzero(ok)
+                return [pd.Series(self.values[r, a:b][sel], index=idx[sel], name=m) for r, m in zip(rows, metric_ids)]
+        out = []
+        for r, m in zip(rows, metric_ids):
+            if r is not None:
+                vals = self.values[r, a:b]
+                vals.flags.writeable = False
+            else:
+                vals = np.full(b - a, np.nan)
+            out.append(pd.Series(vals, index=idx, name=m, copy=False))
+        return out
+
+    def frame(self, metric_ids: List[str], how: str = "intersection") -> pd.DataFrame:
+        return pd.concat(self.read(metric_ids, how), axis=1)
+
+@dataclass
+class PanelStore:
+    """
+    Columnar backing store: one FrequencyPanel per supported frequency.
+    Each metric is resampled to every frequency once, at ingest.
+    """
+    panels: Dict[str, FrequencyPanel] = field(default_factory=lambda: {f: FrequencyPanel(f) for f in SUPPORTED_FREQS})
+
+    def write(self, metric_id: str, by_freq: Dict[str, pd.Series]):
+        for f, s in by_freq.items():
+            self.panels[f].write(metric_id, s)
+
+    def read(self, metric_ids: List[str], freq: str, how: str = "intersection") -> List[pd.Series]:
+        return self.panels[freq].read(metric_ids, how)
+
+    def coverage(self, metric_ids: List[str], freq: str) -> Tuple[Optional[pd.Period], Optional[pd.Period]]:
+        p = self.panels[freq]
+        a, b = p.window(metric_ids, "intersection")
+        if b <= a:
+            return None, None
+        idx = p.index
+        return idx[a], idx[b - 1]
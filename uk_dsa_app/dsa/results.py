@@ -0,0 +1,221 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .config import user_data_dir
+
+# Local store of stress / Monte Carlo results so runs survive a page refresh and can be compared.
+# Per-date results (quantile tables, risk tables) are kept long-form in one indexed table so they can
+# be filtered in SQL; distributions (e.g. terminal debt histograms) are compact blobs.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    scenario_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    UNIQUE (name, definition)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    created TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    scenario_id INTEGER REFERENCES scenarios (scenario_id),
+    label TEXT NOT NULL DEFAULT '',
+    freq TEXT,
+    calibration TEXT,
+    params TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    date TEXT NOT NULL,
+    key TEXT NOT NULL DEFAULT '',
+    value REAL
+);
+CREATE TABLE IF NOT EXISTS histograms (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    date TEXT NOT NULL,
+    edges BLOB NOT NULL,
+    counts BLOB NOT NULL,
+    PRIMARY KEY (run_id, metric, date)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_scenario ON runs (scenario_id, created);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id, metric);
+CREATE INDEX IF NOT EXISTS idx_results_metric ON results (metric, key, date, value);
+"""
+
+def default_results_path() -> str:
+    # In the per-user data directory so saved runs survive reboots and temp cleaners
+    return os.getenv("DSA_RESULTS_DB") or str(user_data_dir() / "results.sqlite")
+
+def calibration_fingerprint(var_params: Dict, extra: Optional[Dict] = None) -> str:
+    """
+    Short hash of a VAR calibration (A, c, Sigma, column order) plus any extra settings,
+    so runs on the same calibration can be grouped.
+    """
+    h = hashlib.sha1()
+    for name in ("A", "c", "Sigma"):
+        if name in var_params:
+            h.update(np.ascontiguousarray(np.asarray(var_params[name], dtype=float)).tobytes())
+    h.update(json.dumps({"columns": list(var_params.get("columns", [])), "extra": extra or {}}, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+def terminal_histogram(paths: np.ndarray, bins: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Histogram of the last-date values of (n_paths, n_dates) paths, ignoring diverged draws.
+    """
+    last = paths[:, -1]
+    counts, edges = np.histogram(last[np.isfinite(last)], bins=bins)
+    return edges, counts
+
+def _long_rows(run_id: int, metric: str, table: pd.DataFrame) -> List[Tuple]:
+    # One (run, metric, date, key, value) row per cell
+    dates = np.repeat(np.asarray(table.index.astype(str)), table.shape[1])
+    keys = np.tile(np.asarray(table.columns.astype(str)), table.shape[0])
+    values = table.to_numpy(dtype=float).ravel()
+    values = np.where(np.isfinite(values), values, np.nan)
+    return [(run_id, metric, d, k, None if np.isnan(v) else float(v)) for d, k, v in zip(dates, keys, values)]
+
+class ResultsStore:
+    """
+    SQLite results store (WAL journal, so the app can read while a run is being written).
+    One connection is shared by the session threads; every read and write holds the store lock.
+    A run is one stress or Monte Carlo result: kind, optional scenario definition, calibration
+    fingerprint, free-form params, per-date tables ({metric: DataFrame indexed by date}) and histograms.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_results_path()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _scenario_id(self, name: str, definition: Dict) -> int:
+        text = json.dumps(definition, sort_keys=True, default=float)
+        self.conn.execute("INSERT OR IGNORE INTO scenarios (name, definition) VALUES (?, ?)", (name, text))
+        return self.conn.execute("SELECT scenario_id FROM scenarios WHERE name = ? AND definition = ?", (name, text)).fetchone()[0]
+
+    def record_runs(self, runs: List[Dict]) -> List[int]:
+        """
+        Insert several runs in one transaction. Each run dict has 'kind' and optionally 'scenario'
+        (name), 'definition' (scenario shocks), 'label', 'freq', 'calibration', 'params',
+        'tables' {metric: DataFrame indexed by date} and 'histograms' {metric: {date: (edges, counts)}}.
+        Returns the new run ids.
+        """
+        created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        ids: List[int] = []
+        with self._lock, self.conn:
+            rows: List[Tuple] = []
+            hists: List[Tuple] = []
+            for run in runs:
+                sid = self._scenario_id(run["scenario"], run.get("definition", {})) if run.get("scenario") else None
+                cur = self.conn.execute(
+                    "INSERT INTO runs (created, kind, scenario_id, label, freq, calibration, params) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run.get("created", created), run["kind"], sid, run.get("label", ""), run.get("freq"),
+                     run.get("calibration"), json.dumps(run.get("params", {}), sort_keys=True, default=str)))
+                rid = cur.lastrowid
+                ids.append(rid)
+                for metric, table in (run.get("tables") or {}).items():
+                    rows.extend(_long_rows(rid, metric, table))
+                for metric, by_date in (run.get("histograms") or {}).items():
+                    for date, (edges, counts) in by_date.items():
+                        hists.append((rid, metric, str(date), np.asarray(edges, dtype=np.float64).tobytes(),
+                                      np.asarray(counts, dtype=np.int64).tobytes()))
+            self.conn.executemany("INSERT INTO results (run_id, metric, date, key, value) VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.executemany("INSERT INTO histograms (run_id, metric, date, edges, counts) VALUES (?, ?, ?, ?, ?)", hists)
+        return ids
+
+    def record_run(self, kind: str, **run) -> int:
+        return self.record_runs([dict(run, kind=kind)])[0]
+
+    def delete_run(self, run_id: int):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM runs WHERE run_id = ?", (int(run_id),))
+
+    def runs(self, kind: Optional[str] = None, scenario: Optional[str] = None, since: Optional[str] = None) -> pd.DataFrame:
+        """
+        Run catalogue, newest first, optionally filtered by kind, scenario name and creation time (ISO).
+        """
+        sql = ("SELECT r.run_id, r.created, r.kind, s.name AS scenario, r.label, r.freq, r.calibration, r.params "
+               "FROM runs r LEFT JOIN scenarios s ON s.scenario_id = r.scenario_id WHERE 1 = 1")
+        args: List = []
+        if kind:
+            sql += " AND r.kind = ?"
+            args.append(kind)
+        if scenario:
+            sql += " AND s.name = ?"
+            args.append(scenario)
+        if since:
+            sql += " AND r.created >= ?"
+            args.append(since)
+        with self._lock:
+            return pd.read_sql_query(sql + " ORDER BY r.created DESC, r.run_id DESC", self.conn, params=args, index_col="run_id")
+
+    def table(self, run_id: int, metric: str) -> pd.DataFrame:
+        """
+        One stored per-date table back as dates x keys (dates as strings, in insertion order).
+        """
+        with self._lock:
+            long = pd.read_sql_query("SELECT date, key, value FROM results WHERE run_id = ? AND metric = ? ORDER BY rowid",
+                                     self.conn, params=(int(run_id), metric))
+        if long.empty:
+            return pd.DataFrame()
+        out = long.pivot(index="date", columns="key", values="value")
+        return out.reindex(index=long["date"].unique(), columns=long["key"].unique())
+
+    def histogram(self, run_id: int, metric: str, date: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        with self._lock:
+            row = self.conn.execute("SELECT edges, counts FROM histograms WHERE run_id = ? AND metric = ? AND date = ?",
+                                    (int(run_id), metric, str(date))).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float64), np.frombuffer(row[1], dtype=np.int64)
+
+    def query(self, metric: str, key: str = "", op: str = ">", value: float = 0.0, date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Runs with any stored cell (metric, key) satisfying `op value`, at one date or any date.
+        Returns the run catalogue plus the extreme matching value and the first date it matches.
+        """
+        if op not in (">", ">=", "<", "<=", "="):
+            raise ValueError(f"Unsupported comparison: {op}")
+        agg = "MAX" if op in (">", ">=") else "MIN"
+        sql = (f"SELECT x.run_id, {agg}(x.value) AS value, MIN(x.date) AS first_date FROM results x "
+               f"WHERE x.metric = ? AND x.key = ? AND x.value {op} ?")
+        args: List = [metric, key, float(value)]
+        if date is not None:
+            sql += " AND x.date = ?"
+            args.append(str(date))
+        with self._lock:
+            hits = pd.read_sql_query(sql + " GROUP BY x.run_id", self.conn, params=args, index_col="run_id")
+        return self.runs().join(hits, how="inner")
+
+    def runs_breaching(self, threshold: float = 1.0, probability: float = 0.2, date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Runs where P(debt > threshold) exceeds probability (risk tables saved under metric 'risk',
+        columns as in engine.risk.risk_summary), e.g. runs_breaching(1.0, 0.2).
+        """
+        return self.query("risk", f"P(b>{threshold:g})", ">", probability, date)
+
+_STORES: Dict[str, ResultsStore] = {}
+
+def get_store(path: Optional[str] = None) -> ResultsStore:
+    """
+    Shared store per database file (one connection per process).
+    """
+    path = path or default_results_path()
+    if path not in _STORES:
+        _STORES[path] = ResultsStore(path)
+    return _STORES[path]
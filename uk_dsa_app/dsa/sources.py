@@ -0,0 +1,271 @@
+from __future__ import annotations
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .config import FREQ_TO_PANDAS
+from .timeseries import parse_period_index
+
+# ONS CDID -> (metric_id, scale to the metric's unit). ONS publishes £ levels in £m.
+# HF6W is PSND ex public sector banks, the closest long-run level to psnd_ex; it still includes
+# the Bank of England, so pass the ex-BoE CDID in refresh_from_ons(cdids=...) when using that measure.
+# debt_interest has no default mapping (the app's net interest is not one published series);
+# supply its CDID the same way or enter it by hand.
+ONS_SERIES: Dict[str, Tuple[str, float]] = {
+    "YBHA": ("gdp_nominal", 1e-3),
+    "J5II": ("psnb_ex", 1e-3),
+    "HF6W": ("psnd_ex", 1e-3),
+    "D7BT": ("cpi", 1.0),
+    "YBGB": ("gdp_deflator", 1.0),
+}
+
+# Row label shapes in ONS time-series downloads, and the JSON section per frequency
+_ONS_LABELS = {
+    "yearly": r"^\d{4}$",
+    "quarterly": r"^\d{4} Q[1-4]$",
+    "monthly": r"^\d{4} [A-Z]{3}$",
+}
+_ONS_JSON_SECTIONS = {"yearly": "years", "quarterly": "quarters", "monthly": "months"}
+
+def default_cache_dir() -> str:
+    return os.getenv("DSA_SOURCE_CACHE", os.path.join(tempfile.gettempdir(), "uk_dsa_source_cache"))
+
+class ResponseCache:
+    """
+    On-disk cache of fetched bodies. Bodies are stored once under their SHA-256; a small
+    JSON record per request key keeps the ETag (HTTP) or file signature (local files) and body hash.
+    """
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or default_cache_dir()
+        os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, "blobs", sha)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._meta_path(key)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(self._blob_path(meta["sha"])) else None
+
+    def body(self, sha: str) -> bytes:
+        with open(self._blob_path(sha), "rb") as f:
+            return f.read()
+
+    def store(self, key: str, body: bytes, **meta) -> str:
+        sha = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(sha)
+        with self._lock:
+            if not os.path.exists(blob):
+                with open(blob, "wb") as f:
+                    f.write(body)
+            with open(self._meta_path(key), "w") as f:
+                json.dump(dict(meta, key=key, sha=sha), f)
+        return sha
+
+@dataclass
+class Fetched:
+    name: str
+    sha: str
+    body: bytes
+    from_cache: bool
+
+class DataSource:
+    """
+    Files served from a local directory or a local HTTP stand-in server (location is a path or http(s) URL).
+    HTTP requests are conditional on the cached ETag; local files are re-read only when size or mtime change.
+    """
+    def __init__(self, location: str, cache: Optional[ResponseCache] = None, timeout: float = 10.0):
+        self.location = location
+        self.is_http = location.startswith(("http://", "https://"))
+        self.cache = cache or ResponseCache()
+        self.timeout = timeout
+
+    def _key(self, name: str) -> str:
+        return f"{self.location.rstrip('/')}/{name}"
+
+    def exists(self, name: str) -> bool:
+        if self.is_http:
+            return True
+        return os.path.exists(os.path.join(self.location, name))
+
+    def fetch(self, name: str) -> Fetched:
+        key = self._key(name)
+        cached = self.cache.lookup(key)
+        if self.is_http:
+            req = urllib.request.Request(key)
+            if cached and cached.get("etag"):
+                req.add_header("If-None-Match", cached["etag"])
+            try:
+                with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                    body = resp.read()
+                    etag = resp.headers.get("ETag")
+            except urllib.error.HTTPError as e:
+                if e.code == 304 and cached:
+                    return Fetched(name, cached["sha"], self.cache.body(cached["sha"]), True)
+                raise
+            # Without an ETag the content hash still dedupes the stored body
+            sha = self.cache.store(key, body, etag=etag)
+            return Fetched(name, sha, body, bool(cached and cached["sha"] == sha))
+        path = os.path.join(self.location, name)
+        st = os.stat(path)
+        sig = [st.st_size, st.st_mtime_ns]
+        if cached and cached.get("sig") == sig:
+            return Fetched(name, cached["sha"], self.cache.body(cached["sha"]), True)
+        with open(path, "rb") as f:
+            body = f.read()
+        sha = self.cache.store(key, body, sig=sig)
+        return Fetched(name, sha, body, bool(cached and cached["sha"] == sha))
+
+def parse_ons_csv(body: bytes, freq: str) -> Tuple[pd.Series, Dict[str, str]]:
+    """
+    ONS time-series CSV: metadata rows (Title, CDID, Unit, ...) followed by mixed yearly,
+    quarterly and monthly rows. Returns the rows at freq as a PeriodIndex series plus the metadata.
+    """
+    df = pd.read_csv(io.BytesIO(body), header=None, names=["label", "value"], usecols=[0, 1], dtype=str, keep_default_na=False)
+    labels = df["label"].str.strip()
+    rows = labels.str.match(_ONS_LABELS[freq])
+    is_data = labels.str.match(r"^\d{4}")
+    meta = dict(zip(labels[~is_data], df["value"][~is_data].str.strip()))
+    vals = pd.to_numeric(df["value"][rows].str.replace(",", "", regex=False), errors="coerce").to_numpy(dtype=float)
+    idx = parse_period_index(labels[rows].to_numpy(), freq)
+    keep = ~np.isnan(vals)
+    return pd.Series(vals[keep], index=idx[keep]), meta
+
+def parse_ons_json(body: bytes, freq: str) -> Tuple[pd.Series, Dict[str, str]]:
+    """
+    ONS time-series JSON ('description' plus 'years' / 'quarters' / 'months' observation lists).
+    """
+    doc = json.loads(body)
+    obs = doc.get(_ONS_JSON_SECTIONS[freq]) or []
+    labels = np.array([o["date"] for o in obs], dtype=object)
+    vals = pd.to_numeric(pd.Series([o.get("value") for o in obs], dtype=object), errors="coerce").to_numpy(dtype=float)
+    keep = ~np.isnan(vals)
+    idx = parse_period_index(labels[keep], freq) if keep.any() else pd.PeriodIndex([], freq=FREQ_TO_PANDAS[freq])
+    desc = doc.get("description", {})
+    return pd.Series(vals[keep], index=idx), {k: str(v) for k, v in desc.items() if isinstance(v, (str, int, float))}
+
+def release_date(meta: Dict[str, str]) -> Optional[pd.Timestamp]:
+    """
+    Publication date from ONS metadata ('Release date' dd-mm-yyyy in CSV, 'releaseDate' in JSON), or None.
+    """
+    for key, dayfirst in (("Release date", True), ("releaseDate", False)):
+        if meta.get(key):
+            ts = pd.to_datetime(meta[key], errors="coerce", dayfirst=dayfirst)
+            if pd.notna(ts):
+                return ts.tz_localize(None) if ts.tzinfo is not None else ts
+    return None
+
+def _ons_file(source: DataSource, cdid: str) -> str:
+    # ONS downloads are named after the CDID; JSON preferred when both exist locally
+    for name in (f"{cdid}.json", f"{cdid.lower()}.json", f"{cdid}.csv", f"{cdid.lower()}.csv"):
+        if source.exists(name):
+            return name
+    raise FileNotFoundError(f"No ONS file for {cdid} in {source.location}")
+
+def fetch_ons_series(
+    source: DataSource,
+    freqs: Optional[Dict[str, str]] = None,
+    series: Optional[Dict[str, Tuple[str, float]]] = None,
+    fmt: str = "json",
+    max_workers: int = 8,
+) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """
+    Fetch and parse every mapped ONS series concurrently.
+    freqs: metric_id -> frequency to extract (yearly if absent). For HTTP sources files are
+    requested as <CDID>.<fmt>; local directories may hold either format.
+    Returns ({metric_id: {'series', 'freq', 'cdid', 'sha', 'released', ...}} ready for DataManager.add_many, {cdid: error}).
+    """
+    series = series or ONS_SERIES
+    freqs = freqs or {}
+
+    def one(cdid: str):
+        mid, scale = series[cdid]
+        freq = freqs.get(mid, "yearly")
+        name = f"{cdid}.{fmt}" if source.is_http else _ons_file(source, cdid)
+        got = source.fetch(name)
+        parse = parse_ons_json if name.endswith(".json") else parse_ons_csv
+        s, meta = parse(got.body, freq)
+        s = (s * scale).rename(mid)
+        return mid, {"series": s, "freq": freq, "cdid": cdid, "sha": got.sha, "from_cache": got.from_cache,
+                     "title": meta.get("Title", meta.get("title", "")), "released": release_date(meta)}
+
+    batch: Dict[str, Dict] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {cdid: pool.submit(one, cdid) for cdid in series}
+        for cdid, fut in futures.items():
+            try:
+                mid, item = fut.result()
+            except Exception as e:
+                errors[cdid] = str(e)
+                continue
+            if item["series"].empty:
+                errors[cdid] = f"no {item['freq']} observations"
+                continue
+            batch[mid] = item
+    return batch, errors
+
+def ons_series_for(cdids: Optional[Dict[str, str]] = None) -> Dict[str, Tuple[str, float]]:
+    """
+    ONS_SERIES with metric_id -> CDID overrides or additions (£m series, scaled to £bn;
+    index series such as cpi keep their scale).
+    """
+    series = dict(ONS_SERIES)
+    for mid, cdid in (cdids or {}).items():
+        if not cdid:
+            continue
+        scale = next((sc for m, sc in ONS_SERIES.values() if m == mid), 1e-3)
+        series = {c: v for c, v in series.items() if v[0] != mid}
+        series[cdid] = (mid, scale)
+    return series
+
+def unmapped_required(metrics_def, cdids: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Required, non-derived metrics that an ONS refresh with these overrides does not cover.
+    """
+    covered = {mid for mid, _ in ons_series_for(cdids).values()}
+    return [mid for mid, m in metrics_def.items() if m.required and not m.derived and mid not in covered]
+
+def refresh_from_ons(dm, source: DataSource, max_workers: int = 8, cdids: Optional[Dict[str, str]] = None) -> Tuple[List[str], Dict[str, str]]:
+    """
+    One batched refresh of every ONS-mapped input into dm at each metric's chosen frequency.
+    cdids: metric_id -> CDID overrides or additions (e.g. a PSND ex BoE series for psnd_ex, or a
+    debt interest series), see ons_series_for. Vintages are stamped with each series' release
+    date when the download carries one, else the fetch time.
+    Returns (changed metric ids, per-CDID errors).
+    """
+    series = ons_series_for(cdids)
+    freqs = {mid: dm.get_user_freq(mid) for mid, _ in series.values()}
+    batch, errors = fetch_ons_series(source, series=series, freqs=freqs, max_workers=max_workers)
+    for mid, item in batch.items():
+        item["unit"] = dm.metrics_def[mid].unit
+        item["vintage_ts"] = item.get("released")
+    changed = dm.add_many(batch, vintage_label=f"ONS {source.location}") if batch else []
+    return changed, errors
+
+def fetch_obr_table(source: DataSource, name: str, sheet_name=0) -> pd.DataFrame:
+    """
+    An OBR table from the source: CSV as-is (see io.load_obr_csv), or one sheet of an EFO
+    supplementary-table workbook read raw (no header inference) for the caller to tidy.
+    """
+    from .io import load_obr_csv
+    got = source.fetch(name)
+    if name.lower().endswith(".csv"):
+        return load_obr_csv(got.body)
+    return pd.read_excel(io.BytesIO(got.body), sheet_name=sheet_name, header=None)
@@ -1,64 +1,224 @@
 from __future__ import annotations
+import warnings
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
 from .config import SUPPORTED_FREQS, FREQ_TO_PANDAS
+from .panel import PanelStore
+
+FREQ_RANK = {"monthly": 3, "quarterly": 2, "yearly": 1}
+RESAMPLE_HOWS = ("mean", "sum", "last")
+
+def period_freq(idx: pd.PeriodIndex) -> Optional[str]:
+    """
+    App frequency name of a PeriodIndex ('M', 'Q-DEC', 'Y-DEC' / 'A-DEC' -> monthly, quarterly, yearly).
+    """
+    code = idx.freqstr.split("-")[0]
+    return {"M": "monthly", "Q": "quarterly", "Y": "yearly", "A": "yearly"}.get(code)
+
+def resample_periods(s: pd.Series, target_freq: str, how: str = "mean") -> pd.Series:
+    """
+    Single resampling path for PeriodIndex series.
+    Downsampling aggregates each target period with 'mean', 'sum' (flows) or 'last' (end-of-period stocks);
+    empty periods inside the range are NaN for mean/last and 0 for sum.
+    Upsampling repeats each value over the finer periods it spans, through the end of the last period.
+    """
+    if how not in RESAMPLE_HOWS:
+        raise ValueError(f"Unsupported aggregation: {how}")
+    if s.empty or not isinstance(s.index, pd.PeriodIndex):
+        return s
+    src_freq = period_freq(s.index)
+    code = FREQ_TO_PANDAS[target_freq]
+    if src_freq == target_freq:
+        return s
+    if FREQ_RANK[src_freq] < FREQ_RANK[target_freq]:
+        # Upsample: look up the coarse period containing each fine period
+        s = s.sort_index()
+        idx = pd.period_range(start=s.index[0].asfreq(code, how="start"), end=s.index[-1].asfreq(code, how="end"), freq=code)
+        vals = s.reindex(idx.asfreq(s.index.freqstr)).to_numpy(dtype=float)
+        return pd.Series(vals, index=idx, name=s.name)
+    # Downsample: bucket by target-period ordinal
+    ords = s.index.asfreq(code).asi8
+    o0 = ords.min()
+    pos = ords - o0
+    n = int(pos.max()) + 1
+    x = s.to_numpy(dtype=float)
+    ok = ~np.isnan(x)
+    idx = pd.PeriodIndex.from_ordinals(np.arange(o0, o0 + n), freq=code)
+    if how == "last":
+        out = np.full(n, np.nan)
+        order = np.argsort(s.index.asi8[ok], kind="stable")
+        p_sorted, x_sorted = pos[ok][order], x[ok][order]
+        # sorted by source period, so target buckets are contiguous; keep each bucket's final entry
+        tail = np.flatnonzero(np.r_[p_sorted[1:] != p_sorted[:-1], True]) if len(p_sorted) else p_sorted
+        out[p_sorted[tail]] = x_sorted[tail]
+    else:
+        total = np.bincount(pos[ok], weights=x[ok], minlength=n)
+        if how == "sum":
+            out = total
+        else:
+            cnt = np.bincount(pos[ok], minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out = np.where(cnt > 0, total / np.maximum(cnt, 1), np.nan)
+    return pd.Series(out, index=idx, name=s.name)
+
+_MONTH_ABBR = {m: i for i, m in enumerate(["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"], start=1)}
+# Label patterns tried in order against the whole index; first one matching every label wins
+_LABEL_PATTERNS = [
+    ("yearly", r"^(\d{4})(?:\.0+)?$"),
+    ("quarterly", r"^(\d{4})\s*[-/ ]?\s*[Qq]([1-4])$"),
+    ("monthly", r"^(\d{4})\s*(?:-|/|M|m)\s*(\d{1,2})$"),
+    ("monthly_name", r"^(\d{4})\s+([A-Za-z]{3})[A-Za-z]*$"),
+]
+
+def detect_index_format(labels) -> Optional[str]:
+    """
+    Detect the label format of a whole index in one regex pass per candidate:
+    'yearly' (YYYY), 'quarterly' (YYYYQn, YYYY-Qn, YYYY Qn), 'monthly' (YYYY-MM, YYYYMmm),
+    'monthly_name' (ONS style 'YYYY JAN'), 'date' (anything pandas parses as dates) or None.
+    """
+    idx = pd.Index(labels)
+    if len(idx) == 0:
+        return None
+    if isinstance(idx, pd.PeriodIndex):
+        return period_freq(idx)
+    if isinstance(idx, pd.DatetimeIndex):
+        return "date"
+    if pd.api.types.is_integer_dtype(idx.dtype):
+        return "yearly"
+    txt = pd.Series(idx.astype(str)).str.strip()
+    for fmt, pat in _LABEL_PATTERNS:
+        if txt.str.match(pat).all():
+            return fmt
+    with warnings.catch_warnings():
+        # Mixed labels make pandas fall back to per-element parsing, which is what we want here
+        warnings.simplefilter("ignore", category=UserWarning)
+        if pd.to_datetime(txt, errors="coerce", dayfirst=_is_dayfirst(txt)).notna().all():
+            return "date"
+    return None
+
+def _is_dayfirst(txt: pd.Series) -> bool:
+    # UK-style dd/mm/YYYY
+    return bool(txt.str.match(r"^\d{1,2}/\d{1,2}/\d{4}").all())
+
+def parse_period_index(labels, freq: str) -> pd.PeriodIndex:
+    """
+    Vectorized conversion of free-form index labels to a PeriodIndex at freq.
+    The label format is detected once for the whole array and periods are built from integer ordinals.
+    Coarser labels map to the last period they contain (year -> Q4 / December), finer labels to the
+    period containing them. Raises ValueError when the labels cannot be parsed.
+    """
+    code = FREQ_TO_PANDAS[freq]
+    idx = pd.Index(labels)
+    fmt = detect_index_format(idx)
+    if fmt is None:
+        raise ValueError("Could not parse index labels to periods.")
+    if isinstance(idx, pd.PeriodIndex):
+        native = idx
+    elif fmt == "date":
+        if isinstance(idx, pd.DatetimeIndex):
+            dt = idx
+        else:
+            txt = pd.Series(idx.astype(str)).str.strip()
+            dt = pd.DatetimeIndex(pd.to_datetime(txt, errors="coerce", dayfirst=_is_dayfirst(txt)))
+        return dt.to_period(code)
+    else:
+        if fmt == "yearly" and pd.api.types.is_integer_dtype(idx.dtype):
+            years = idx.to_numpy(dtype=np.int64)
+        else:
+            parts = pd.Series(idx.astype(str)).str.strip().str.extract(dict(_LABEL_PATTERNS)[fmt])
+            years = parts[0].to_numpy(dtype=np.int64)
+        if fmt == "yearly":
+            native = pd.PeriodIndex.from_ordinals(years - 1970, freq="Y")
+        elif fmt == "quarterly":
+            q = parts[1].to_numpy(dtype=np.int64)
+            native = pd.PeriodIndex.from_ordinals((years - 1970) * 4 + q - 1, freq="Q")
+        else:
+            if fmt == "monthly_name":
+                m = parts[1].str.upper().map(_MONTH_ABBR)
+                if m.isna().any():
+                    raise ValueError("Unrecognized month names in index labels.")
+                m = m.to_numpy(dtype=np.int64)
+            else:
+                m = parts[1].to_numpy(dtype=np.int64)
+                if ((m < 1) | (m > 12)).any():
+                    raise ValueError("Month out of range in index labels.")
+            native = pd.PeriodIndex.from_ordinals((years - 1970) * 12 + m - 1, freq="M")
+    src = period_freq(native)
+    if src == freq:
+        return native
+    if FREQ_RANK[src] < FREQ_RANK[freq]:
+        return native.asfreq(code, how="end")
+    return native.asfreq(code)
+
+def _format_masks(txt: pd.Series) -> Dict[str, np.ndarray]:
+    # Per-label match of every label format, in detection order
+    masks = {fmt: txt.str.match(pat).to_numpy() for fmt, pat in _LABEL_PATTERNS}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=UserWarning)
+        masks["date"] = pd.to_datetime(txt, errors="coerce", dayfirst=_is_dayfirst(txt)).notna().to_numpy()
+    return masks
+
+def dominant_label_format(labels, min_share: float = 0.7) -> Optional[str]:
+    """
+    Label format as in detect_index_format, tolerating stray labels (notes, totals): when no
+    format fits every label, the one matching the most labels, if at least min_share of them.
+    """
+    fmt = detect_index_format(labels)
+    if fmt is not None:
+        return fmt
+    txt = pd.Series(pd.Index(labels).astype(str)).str.strip()
+    if txt.empty:
+        return None
+    counts = {f: int(m.sum()) for f, m in _format_masks(txt).items()}
+    best = max(counts, key=counts.get)
+    return best if counts[best] and counts[best] >= min_share * len(txt) else None
+
+def parse_period_labels(labels, freq: str) -> Tuple[pd.PeriodIndex, np.ndarray]:
+    """
+    Like parse_period_index, but labels that do not parse (a 'Total' row, a footnote) are masked
+    out rather than failing the whole index: the format matching most labels is used.
+    Returns (periods of the valid labels, boolean mask over labels).
+    """
+    idx = pd.Index(labels)
+    try:
+        return parse_period_index(idx, freq), np.ones(len(idx), dtype=bool)
+    except ValueError:
+        pass
+    fmt = dominant_label_format(idx, min_share=0.0)
+    if fmt is not None:
+        ok = _format_masks(pd.Series(idx.astype(str)).str.strip())[fmt]
+        try:
+            return parse_period_index(idx[ok], freq), ok
+        except ValueError:
+            pass
+    return pd.PeriodIndex([], freq=FREQ_TO_PANDAS[freq]), np.zeros(len(idx), dtype=bool)
+
+def projection_index(last: Optional[pd.Period], horizon_end_year: int, freq: str = "yearly") -> pd.PeriodIndex:
+    """
+    Projection periods at freq from the period after `last` through the end of horizon_end_year.
+    """
+    code = FREQ_TO_PANDAS[freq]
+    end = pd.Period(year=int(horizon_end_year), freq="Y").asfreq(code, how="end")
+    start = last.asfreq(code, how="end") + 1 if last is not None else pd.Period(year=2025, freq="Y").asfreq(code, how="start")
+    if start > end:
+        return pd.PeriodIndex([], freq=code)
+    return pd.period_range(start=start, end=end, freq=code)
 
 def _to_period_index(series: pd.Series, freq: str) -> pd.Series:
     target = FREQ_TO_PANDAS[freq]
     if isinstance(series.index, pd.PeriodIndex):
-        # If different granularity, convert via timestamp then back to Period with target code
-        if series.index.freqstr != target:
-            st = series.to_timestamp(how="start")
-            if target == "Y":
-                return st.resample("YS").mean().to_period("Y")
-            if target == "Q":
-                return st.resample("QS").mean().to_period("Q")
-            if target == "M":
-                return st.resample("MS").mean().to_period("M")
-        return series
-    # If index is int years
-    if np.issubdtype(series.index.dtype, np.integer):
-        if freq == "yearly":
-            s = pd.Series(series.values, index=[pd.Period(year=int(y), freq="Y") for y in series.index])
-            return s
-        elif freq == "quarterly":
-            # Without quarter info, map to period at Q4 of each year to preserve order
-            s = pd.Series(series.values, index=[pd.Period(f"{int(y)}Q4", freq="Q") for y in series.index])
-            return s
-        elif freq == "monthly":
-            # Map year-only to December of each year
-            s = pd.Series(series.values, index=[pd.Period(f"{int(y)}-12", freq="M") for y in series.index])
-            return s
-    # If index looks like YYYY or YYYY-MM
-    try:
-        # Accept strings like YYYY, YYYY-MM, YYYY-MM-DD, or YYYYQx
-        if target == "Q":
-            # Allow forms like 2020Q1 or 2020-Q1
-            idx = [str(x).replace("-Q", "Q") for x in series.index]
-            dt = pd.PeriodIndex(idx, freq="Q")
-        elif target == "M":
-            dt = pd.PeriodIndex(series.index, freq="M")
-        else:
-            dt = pd.PeriodIndex(series.index, freq="Y")
-        return pd.Series(series.values, index=dt)
-    except Exception:
-        pass
-    # Try to parse to DatetimeIndex, then to PeriodIndex
+        # If different granularity, aggregate/expand to the target frequency
+        return resample_periods(series, freq)
     try:
-        dt = pd.to_datetime(series.index, errors="coerce")
-        if dt.isna().any():
-            raise ValueError("Could not parse index to datetime.")
-        p = dt.to_period(target)
-        return pd.Series(series.values, index=p)
-    except Exception:
+        return pd.Series(series.values, index=parse_period_index(series.index, freq), name=series.name)
+    except ValueError:
         return series
 
 def infer_freq_from_index(idx) -> Optional[str]:
     if isinstance(idx, pd.PeriodIndex):
-        inv = {v: k for k, v in FREQ_TO_PANDAS.items()}
-        return inv.get(idx.freqstr)
+        return period_freq(idx)
     if isinstance(idx, pd.DatetimeIndex):
         # infer freq
         try:
@@ -73,10 +233,47 @@ def infer_freq_from_index(idx) -> Optional[str]:
             return None
     return None
 
+def build_dependents(metrics_def) -> Dict[str, List[str]]:
+    """
+    Reverse of Metric.depends_on: metric id -> ids of metrics derived directly from it.
+    """
+    deps: Dict[str, List[str]] = {mid: [] for mid in metrics_def}
+    for mid, m in metrics_def.items():
+        for d in m.depends_on:
+            if d not in metrics_def:
+                raise KeyError(f"Metric {mid} depends on unknown metric {d}")
+            deps[d].append(mid)
+    return deps
+
+def derivation_order(metrics_def) -> List[str]:
+    """
+    Topological order of metrics (inputs before the metrics derived from them).
+    Raises ValueError on a dependency cycle.
+    """
+    order: List[str] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(mid: str):
+        if state.get(mid) == 2:
+            return
+        if state.get(mid) == 1:
+            raise ValueError(f"Dependency cycle through metric {mid}")
+        state[mid] = 1
+        for d in metrics_def[mid].depends_on:
+            visit(d)
+        state[mid] = 2
+        order.append(mid)
+
+    for mid in metrics_def:
+        visit(mid)
+    return order
+
 @dataclass
 class SeriesContainer:
     series: Dict[str, pd.Series] = field(default_factory=dict)
     meta: Dict[str, Dict] = field(default_factory=dict)  # id -> {unit, freq}
+    # Optional columnar store holding every metric pre-resampled to each frequency
+    panel: Optional[PanelStore] = None
 
     def add(self, metric_id: str, s: pd.Series, unit: str, freq: str):
         if freq not in FREQ_TO_PANDAS:
@@ -84,6 +281,8 @@ class SeriesContainer:
         s = _to_period_index(s, freq)
         self.series[metric_id] = s.sort_index()
         self.meta[metric_id] = {"unit": unit, "freq": freq}
+        if self.panel is not None and isinstance(self.series[metric_id].index, pd.PeriodIndex):
+            self.panel.write(metric_id, {f: self.resample(metric_id, f) for f in SUPPORTED_FREQS})
 
     def get(self, metric_id: str) -> pd.Series:
         return self.series.get(metric_id, pd.Series(dtype=float))
@@ -112,31 +311,12 @@ class SeriesContainer:
         src_meta = self.get_meta(metric_id)
         src_freq = src_meta.get("freq", "yearly")
         s = _to_period_index(s, src_freq)
-        if src_freq == target_freq:
-            return s
-        # Upsample or downsample
-        if target_freq == "yearly":
-            # downsample monthly/quarterly to yearly
-            if how == "sum":
-                return s.to_timestamp().resample("YS").sum().to_period("Y")
-            return s.to_timestamp().resample("YS").mean().to_period("Y")
-        elif target_freq == "quarterly":
-            if src_freq == "monthly":
-                if how == "sum":
-                    return s.to_timestamp().resample("QS").sum().to_period("Q")
-                return s.to_timestamp().resample("QS").mean().to_period("Q")
-            elif src_freq == "yearly":
-                # upsample to quarterly: forward fill within year
-                t = s.to_timestamp().resample("QS").ffill().to_period("Q")
-                return t
-        elif target_freq == "monthly":
-            if src_freq == "quarterly":
-                return s.to_timestamp().resample("MS").ffill().to_period("M")
-            elif src_freq == "yearly":
-                return s.to_timestamp().resample("MS").ffill().to_period("M")
-        return s
+        return resample_periods(s, target_freq, how=how)
 
     def align(self, metric_ids: List[str], target_freq: str, how: str = "intersection") -> List[pd.Series]:
+        if self.panel is not None and how in ("intersection", "union") and all(m in self.panel.panels[target_freq].columns for m in metric_ids):
+            # Pre-aligned columnar store: alignment is a slice of the panel
+            return self.panel.read(metric_ids, target_freq, how)
         rs = [self.resample(mid, target_freq) for mid in metric_ids]
         if not rs:
             return rs
@@ -152,15 +332,41 @@ class SeriesContainer:
             rs = [s.reindex(idx) for s in rs]
         return rs
 
+# Change records kept per metric for incremental consumers (QA)
+CHANGE_LOG_SIZE = 64
+
+def _first_changed_ordinal(prev: pd.Series, new: pd.Series) -> Optional[int]:
+    # First period ordinal whose value was added, removed or revised
+    if prev.empty or new.empty:
+        return None
+    both = pd.concat([pd.Series(prev.to_numpy(dtype=float), index=prev.index.asi8),
+                      pd.Series(new.to_numpy(dtype=float), index=new.index.asi8)], axis=1).sort_index()
+    a, b = both[0].to_numpy(), both[1].to_numpy()
+    diff = ~((a == b) | (np.isnan(a) & np.isnan(b)))
+    hit = np.flatnonzero(diff)
+    return int(both.index[hit[0]]) if len(hit) else None
+
 class DataManager:
     """
     Handles all metric time series storage, frequency management, resampling,
     derived metric computation, dependency-based frequency enforcement, and coverage checks.
     """
-    def __init__(self, metrics_def):
+    def __init__(self, metrics_def, columnar: bool = True, track_vintages: bool = True):
+        from .vintages import VintageStore
         self.metrics_def = metrics_def
-        self.sc = SeriesContainer()
+        self.sc = SeriesContainer(panel=PanelStore() if columnar else None)
         self.user_freq_choices: Dict[str, str] = {}  # user-chosen data entry freq per metric
+        # Derivation DAG: metric -> metrics computed from it (reverse of Metric.depends_on)
+        self.dependents: Dict[str, List[str]] = build_dependents(metrics_def)
+        self.derivation_order: List[str] = derivation_order(metrics_def)
+        # Input versions bump on every content change; derived cache is keyed by them
+        self.versions: Dict[str, int] = {}
+        self._derived_cache: Dict[str, Tuple[Tuple, pd.Series]] = {}
+        self._resample_cache: Dict[Tuple[str, str, str, str], Tuple[Tuple, pd.Series]] = {}
+        # Every distinct version of each raw series, for as-of (real-time) DSA
+        self.vintages = VintageStore() if track_vintages else None
+        # Per metric: (version, first changed period ordinal or None for a full rewrite), newest last
+        self.change_log: Dict[str, List[Tuple[int, Optional[int]]]] = {}
 
     def set_user_freq(self, metric_id: str, freq: str):
         if metric_id not in self.metrics_def:
@@ -178,36 +384,142 @@ class DataManager:
             return self.user_freq_choices[metric_id]
         return self.metrics_def[metric_id].default_freq
 
-    def add_series(self, metric_id: str, s: pd.Series, unit: str, freq: Optional[str] = None):
+    def add_series(self, metric_id: str, s: pd.Series, unit: str, freq: Optional[str] = None,
+                   vintage_ts: Optional[pd.Timestamp] = None, vintage_label: str = ""):
         if metric_id not in self.metrics_def:
             raise KeyError(metric_id)
         if freq is None:
             freq = self.get_user_freq(metric_id)
+        prev = self.sc.get(metric_id)
+        prev_meta = self.sc.get_meta(metric_id)
         self.sc.add(metric_id, s, unit, freq)
+        new = self.sc.get(metric_id)
+        # Streamlit reruns re-add identical data; only a real change bumps the version
+        if prev_meta.get("freq") == freq and prev.index.equals(new.index) and prev.equals(new):
+            return
+        self.versions[metric_id] = self.versions.get(metric_id, 0) + 1
+        same_grid = prev_meta.get("freq") == freq and isinstance(prev.index, pd.PeriodIndex) and isinstance(new.index, pd.PeriodIndex)
+        log = self.change_log.setdefault(metric_id, [])
+        log.append((self.versions[metric_id], _first_changed_ordinal(prev, new) if same_grid else None))
+        del log[:-CHANGE_LOG_SIZE]
+        self.invalidate(metric_id)
+        if self.vintages is not None and isinstance(new.index, pd.PeriodIndex):
+            self.vintages.add(metric_id, new, timestamp=vintage_ts, label=vintage_label)
+
+    def first_change_since(self, metric_id: str, version: int) -> Optional[int]:
+        """
+        Earliest period ordinal changed after `version` of metric_id; None when unknown or the series was rewritten.
+        """
+        recs = [(v, o) for v, o in self.change_log.get(metric_id, []) if v > version]
+        if not recs or recs[0][0] != version + 1 or any(o is None for _, o in recs):
+            return None
+        return min(o for _, o in recs)
+
+    def at_vintage(self, as_of: pd.Timestamp) -> "DataManager":
+        """
+        New DataManager holding each raw series as it was known at `as_of`.
+        """
+        if self.vintages is None:
+            raise ValueError("Vintage tracking is disabled for this DataManager.")
+        dm = DataManager(self.metrics_def, columnar=self.sc.panel is not None, track_vintages=False)
+        dm.user_freq_choices = dict(self.user_freq_choices)
+        for mid, s in self.vintages.as_of(as_of).items():
+            meta = self.sc.get_meta(mid)
+            dm.add_series(mid, s, unit=meta.get("unit", self.metrics_def[mid].unit), freq=self.vintages.select(mid, as_of).freq)
+        return dm
+
+    def add_many(self, batch: Dict[str, Dict], vintage_ts: Optional[pd.Timestamp] = None, vintage_label: str = "") -> List[str]:
+        """
+        Register several series at once. batch: metric_id -> {'series', 'unit', 'freq'[, 'vintage_ts']};
+        an item's own vintage_ts (e.g. a publication date) takes precedence over the batch one.
+        All entries are validated first; on any problem nothing is added and a ValueError lists every issue.
+        Returns the metric ids whose data changed.
+        """
+        errors = []
+        for mid, item in batch.items():
+            if mid not in self.metrics_def:
+                errors.append(f"{mid}: unknown metric")
+                continue
+            m = self.metrics_def[mid]
+            freq = item.get("freq") or self.get_user_freq(mid)
+            if m.derived:
+                errors.append(f"{mid}: derived metrics are computed, not ingested")
+            if freq not in m.allowed_freqs:
+                errors.append(f"{mid}: frequency {freq} not allowed ({', '.join(m.allowed_freqs)})")
+            if item["series"].empty:
+                errors.append(f"{mid}: no observations")
+        if errors:
+            raise ValueError("; ".join(errors))
+        changed = []
+        for mid, item in batch.items():
+            before = self.versions.get(mid, 0)
+            freq = item.get("freq") or self.get_user_freq(mid)
+            self.user_freq_choices[mid] = freq
+            self.add_series(mid, item["series"], unit=item.get("unit") or self.metrics_def[mid].unit, freq=freq,
+                            vintage_ts=item["vintage_ts"] if item.get("vintage_ts") is not None else vintage_ts, vintage_label=vintage_label)
+            if self.versions.get(mid, 0) != before:
+                changed.append(mid)
+        return changed
+
+    def _drop_resampled(self, metric_ids):
+        ids = set(metric_ids)
+        for key in [k for k in self._resample_cache if k[0] in ids]:
+            del self._resample_cache[key]
+
+    def invalidate(self, metric_id: str) -> List[str]:
+        """
+        Drop cached derived metrics that depend, directly or transitively, on metric_id.
+        Returns the invalidated metric ids.
+        """
+        dropped = []
+        stack = list(self.dependents.get(metric_id, []))
+        seen = set()
+        while stack:
+            mid = stack.pop()
+            if mid in seen:
+                continue
+            seen.add(mid)
+            if self._derived_cache.pop(mid, None) is not None:
+                dropped.append(mid)
+            stack.extend(self.dependents.get(mid, []))
+        self._drop_resampled([metric_id] + sorted(seen))
+        return dropped
+
+    def input_key(self, metric_id: str) -> Tuple:
+        """
+        Versions of all raw inputs a metric depends on (transitively); the cache key for derived outputs.
+        """
+        m = self.metrics_def[metric_id]
+        if not m.derived:
+            return ((metric_id, self.versions.get(metric_id, 0)),)
+        key = []
+        for dep in m.depends_on:
+            key.extend(self.input_key(dep))
+        return tuple(sorted(set(key)))
 
     def get_series(self, metric_id: str) -> pd.Series:
         s = self.sc.get(metric_id)
-        if s.empty and self.metrics_def[metric_id].derived and self.metrics_def[metric_id].compute_fn:
-            # compute derived
-            computed = self.metrics_def[metric_id].compute_fn(self)
-            # Assume derived series are yearly for simplicity; set meta
-            self.sc.add(metric_id, computed, self.metrics_def[metric_id].unit, self.metrics_def[metric_id].default_freq)
-            s = self.sc.get(metric_id)
-        return s
+        m = self.metrics_def[metric_id]
+        if not s.empty or not m.derived or not m.compute_fn:
+            return s
+        key = self.input_key(metric_id)
+        cached = self._derived_cache.get(metric_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if any(self.get_series(dep).empty for dep in m.depends_on):
+            return pd.Series(dtype=float)
+        computed = m.compute_fn(self)
+        # Derived series are stored at their default frequency
+        computed = _to_period_index(computed, m.default_freq).sort_index()
+        self._derived_cache[metric_id] = (key, computed)
+        return computed
 
     def align_series(self, series_list: List[pd.Series], target_freq: str, how: str = "intersection") -> List[pd.Series]:
         # Convert unknown freq to pandas index fallback
         rs = []
         for s in series_list:
             if isinstance(s.index, pd.PeriodIndex):
-                # convert via timestamp resample to avoid anchor issues
-                st = s.to_timestamp(how="start")
-                if target_freq == "yearly":
-                    rs.append(st.resample("YS").mean().to_period("Y"))
-                elif target_freq == "quarterly":
-                    rs.append(st.resample("QS").mean().to_period("Q"))
-                else:
-                    rs.append(st.resample("MS").mean().to_period("M"))
+                rs.append(resample_periods(s, target_freq, how="mean"))
             else:
                 # try convert
                 s2 = s.copy()
@@ -233,37 +545,46 @@ class DataManager:
         return rs
 
     def resample_series(self, s: pd.Series, target_freq: str, how: str = "mean") -> pd.Series:
-        # Use the container's helper by temporarily adding s?
-        # Simpler: direct resample by period to timestamp then resample back
         if s.empty:
             return s
-        if isinstance(s.index, pd.PeriodIndex) and s.index.freqstr == FREQ_TO_PANDAS[target_freq]:
-            return s
         try:
-            st = s.to_timestamp()
-            if target_freq == "yearly":
-                if how == "sum":
-                    return st.resample("YS").sum().to_period("Y")
-                return st.resample("YS").mean().to_period("Y")
-            if target_freq == "quarterly":
-                if how == "sum":
-                    return st.resample("QS").sum().to_period("Q")
-                return st.resample("QS").mean().to_period("Q")
-            if target_freq == "monthly":
-                if how == "sum":
-                    return st.resample("MS").sum().to_period("M")
-                return st.resample("MS").mean().to_period("M")
+            return resample_periods(s, target_freq, how=how)
         except Exception:
             return s
-        return s
+
+    def resample_metric(self, metric_id: str, target_freq: str, how: str = "mean") -> pd.Series:
+        """
+        Memoized resample of a stored or derived metric.
+        Keyed by (metric, source freq, target freq, aggregation); entries carry the
+        input versions they were computed from, so a changed series is never served stale.
+        """
+        src = self.sc.get_meta(metric_id).get("freq") or self.metrics_def[metric_id].default_freq
+        key = (metric_id, src, target_freq, how)
+        version = self.input_key(metric_id)
+        hit = self._resample_cache.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        out = self.resample_series(self.get_series(metric_id), target_freq, how=how)
+        self._resample_cache[key] = (version, out)
+        return out
+
+    def align(self, metric_ids: List[str], target_freq: str, how: str = "intersection") -> List[pd.Series]:
+        """
+        Align stored metrics by id (served from the columnar panel when enabled).
+        """
+        return self.sc.align(metric_ids, target_freq, how=how)
 
     def coverage_years(self, metric_ids: List[str], target_freq: str) -> Tuple[Optional[int], Optional[int]]:
-        series = [self.resample(m, target_freq) for m in metric_ids for _ in [0]]
-        series = [self.sc.get(m) for m in metric_ids]
-        # compute intersection of coverage
+        # compute intersection of coverage over metrics that have data
+        ids = [m for m in metric_ids if not self.sc.get(m).empty]
+        if self.sc.panel is not None and ids:
+            p0, p1 = self.sc.panel.coverage(ids, target_freq)
+            if p0 is None:
+                return None, None
+            return p0.start_time.year, p1.start_time.year
         min_year = None
         max_year = None
-        for mid in metric_ids:
+        for mid in ids:
             y0, y1 = self.sc.available_years(mid)
             if y0 is None:
                 continue
@@ -1,7 +1,28 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from .config import FREQ_TO_PANDAS, PERIODS_PER_YEAR
+from .timeseries import FREQ_RANK, period_freq, resample_periods
+
+QA_CHECKS = ("missing", "bounds", "outlier", "jump")
+
+# Declarative per-metric rules: plausible bounds (None = open) and how period-on-period
+# changes are measured for jump detection ('pct' growth for levels, 'diff' for rates/ratios).
+QA_RULES: Dict[str, Dict] = {
+    "gdp_nominal": {"lower": 0.0, "upper": None, "change": "pct"},
+    "psnd_ex": {"lower": 0.0, "upper": None, "change": "pct"},
+    "psnb_ex": {"lower": 0.0, "upper": None, "change": "diff"},
+    "debt_interest": {"lower": 0.0, "upper": None, "change": "pct"},
+    "gdp_deflator": {"lower": 0.0, "upper": None, "change": "pct"},
+    "cpi": {"lower": 0.0, "upper": None, "change": "pct"},
+    "yield_10y": {"lower": -5.0, "upper": 30.0, "change": "diff"},
+    "avg_maturity_years": {"lower": 0.0, "upper": 50.0, "change": "diff"},
+}
+DEFAULT_QA_RULE = {"lower": None, "upper": None, "change": "diff"}
 
 def check_missing(s: pd.Series) -> List[int]:
     return list(np.where(s.isna())[0])
@@ -19,18 +40,260 @@ def check_outliers_zscore(s: pd.Series, threshold: float = 4.0) -> List[int]:
 
 def plausible_bounds_check(s: pd.Series, metric_id: str) -> List[int]:
     """
-    Basic sanity checks per metric.
+    Basic sanity checks per metric (bounds from QA_RULES).
+    """
+    rule = QA_RULES.get(metric_id, DEFAULT_QA_RULE)
+    lo = -np.inf if rule["lower"] is None else rule["lower"]
+    hi = np.inf if rule["upper"] is None else rule["upper"]
+    return list(np.where((s < lo) | (s > hi))[0])
+
+def rolling_robust_z(x: np.ndarray, window: int, min_obs: Optional[int] = None) -> np.ndarray:
+    """
+    Robust z-score of each column against the trailing `window` columns before it, row-wise:
+    0.6745 * (x_t - median) / MAD. NaN until min_obs prior observations exist. A perfectly flat
+    window has MAD 0, so MAD is floored at a tiny fraction of the median to still flag departures.
+    """
+    n, T = x.shape
+    min_obs = min_obs or window // 2 + 1
+    padded = np.concatenate([np.full((n, window), np.nan), x], axis=1)
+    win = sliding_window_view(padded, window, axis=1)[:, :T]
+    enough = (~np.isnan(win)).sum(axis=2) >= min_obs
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        med = np.nanmedian(win, axis=2)
+        mad = np.nanmedian(np.abs(win - med[..., None]), axis=2)
+    mad = np.maximum(mad, 1e-6 * np.abs(med) + 1e-12)
+    with np.errstate(invalid="ignore"):
+        z = 0.6745 * (x - med) / mad
+    return np.where(enough & ~np.isnan(x), z, np.nan)
+
+def period_changes(x: np.ndarray, pct: np.ndarray) -> np.ndarray:
+    """
+    Period-on-period change per row: growth rate where pct is True, difference otherwise.
+    """
+    prev = np.concatenate([np.full((x.shape[0], 1), np.nan), x[:, :-1]], axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(prev != 0, x / prev - 1.0, np.nan)
+    return np.where(pct[:, None], growth, x - prev)
+
+def qa_flags(
+    values: np.ndarray,
+    mask: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    pct: np.ndarray,
+    window: int = 12,
+    z_threshold: float = 5.0,
+    jump_threshold: float = 6.0,
+) -> np.ndarray:
+    """
+    All checks for a metrics x periods block in one pass. Returns bool array (n, T, len(QA_CHECKS)).
+    missing: gap inside a row's observed range; bounds: outside [lower, upper];
+    outlier: rolling robust z of the level; jump: rolling robust z of the period change.
+    """
+    x = np.where(mask, values, np.nan)
+    pos = np.arange(x.shape[1])
+    any_obs = mask.any(axis=1)
+    first = np.where(any_obs, mask.argmax(axis=1), x.shape[1])
+    last = np.where(any_obs, x.shape[1] - 1 - mask[:, ::-1].argmax(axis=1), -1)
+    inside = (pos >= first[:, None]) & (pos <= last[:, None])
+    flags = np.zeros(x.shape + (len(QA_CHECKS),), dtype=bool)
+    flags[..., 0] = inside & ~mask
+    flags[..., 1] = mask & ((x < lower[:, None]) | (x > upper[:, None]))
+    with np.errstate(invalid="ignore"):
+        flags[..., 2] = np.abs(rolling_robust_z(x, window)) > z_threshold
+        flags[..., 3] = np.abs(rolling_robust_z(period_changes(x, pct), window)) > jump_threshold
+    return flags
+
+def _rule_arrays(metric_ids: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rules = [QA_RULES.get(m, DEFAULT_QA_RULE) for m in metric_ids]
+    lower = np.array([-np.inf if r["lower"] is None else r["lower"] for r in rules], dtype=float)
+    upper = np.array([np.inf if r["upper"] is None else r["upper"] for r in rules], dtype=float)
+    pct = np.array([r["change"] == "pct" for r in rules], dtype=bool)
+    return lower, upper, pct
+
+def _metric_blocks(dm, metric_ids: List[str]) -> Dict[str, Tuple[List[str], np.ndarray, np.ndarray, pd.PeriodIndex]]:
+    # freq -> (ids, values, mask, index): panel rows at each metric's input frequency
+    by_freq: Dict[str, List[str]] = {}
+    for mid in metric_ids:
+        meta = dm.sc.get_meta(mid)
+        if meta:
+            by_freq.setdefault(meta["freq"], []).append(mid)
+    out = {}
+    for f, ids in by_freq.items():
+        panel = dm.sc.panel.panels[f] if dm.sc.panel is not None else None
+        if panel is not None and all(m in panel.columns for m in ids):
+            rows = [panel.columns[m] for m in ids]
+            a, b = panel.window(ids, "union")
+            out[f] = (ids, panel.values[rows, a:b], panel.mask[rows, a:b], panel.index[a:b])
+        else:
+            frame = pd.concat([dm.sc.get(m).rename(m) for m in ids], axis=1)
+            out[f] = (ids, frame.to_numpy(dtype=float).T, frame.notna().to_numpy().T, frame.index)
+    return out
+
+def run_qa(dm, metric_ids: Optional[List[str]] = None, window: int = 12, z_threshold: float = 5.0, jump_threshold: float = 6.0) -> Dict[str, pd.DataFrame]:
+    """
+    Batch QA over all stored raw series, vectorized per input frequency.
+    Returns {'flags': bool DataFrame indexed by (metric_id, period) with one column per check,
+    covering each metric's observed range, 'summary': one row per metric with flag counts}.
+    """
+    ids = metric_ids if metric_ids is not None else dm.available_metrics()
+    flag_frames, rows = [], []
+    for f, (mids, values, mask, idx) in _metric_blocks(dm, ids).items():
+        lower, upper, pct = _rule_arrays(mids)
+        flags = qa_flags(values, mask, lower, upper, pct, window, z_threshold, jump_threshold)
+        for i, mid in enumerate(mids):
+            obs = np.flatnonzero(mask[i])
+            if not len(obs):
+                continue
+            sl = slice(obs[0], obs[-1] + 1)
+            fm = pd.DataFrame(flags[i, sl], columns=list(QA_CHECKS),
+                              index=pd.MultiIndex.from_product([[mid], idx[sl]], names=["metric_id", "period"]))
+            flag_frames.append(fm)
+            anyf = fm.any(axis=1).to_numpy()
+            rows.append({"metric_id": mid, "freq": f, "n_obs": len(obs), "first": str(idx[obs[0]]), "last": str(idx[obs[-1]]),
+                         **{c: int(fm[c].sum()) for c in QA_CHECKS},
+                         "mean": float(np.mean(values[i, obs])), "std": float(np.std(values[i, obs], ddof=1)) if len(obs) > 1 else np.nan,
+                         "last_flagged": str(idx[sl][anyf][-1]) if anyf.any() else ""})
+    flags_df = pd.concat(flag_frames) if flag_frames else pd.DataFrame(columns=list(QA_CHECKS), dtype=bool)
+    return {"flags": flags_df, "summary": pd.DataFrame(rows)}
+
+def _moments(x: np.ndarray) -> Tuple[int, float, float]:
+    x = x[~np.isnan(x)]
+    if not len(x):
+        return 0, 0.0, 0.0
+    mu = float(x.mean())
+    return len(x), mu, float(((x - mu) ** 2).sum())
+
+def _combine_moments(a: Tuple[int, float, float], b: Tuple[int, float, float], sign: int = 1) -> Tuple[int, float, float]:
+    # Chan/Welford update: merge batch b into running (n, mean, M2), or remove it when sign=-1
+    n_a, mu_a, m2_a = a
+    n_b, mu_b, m2_b = b
+    if n_b == 0:
+        return a
+    n = n_a + sign * n_b
+    if n <= 0:
+        return 0, 0.0, 0.0
+    if sign > 0:
+        delta = mu_b - mu_a
+        return n, mu_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n
+    mu = (n_a * mu_a - n_b * mu_b) / n
+    delta = mu_b - mu
+    return n, mu, max(m2_a - m2_b - delta ** 2 * n * n_b / n_a, 0.0)
+
+@dataclass
+class QAState:
+    """
+    QA results for one metric at the DataManager version they were computed from.
+    flags: (n_periods, len(QA_CHECKS)) over the observed range starting at ordinal `start`.
+    moments: running (n, mean, M2) of the levels; tail: last window + 1 observations (ordinals, values).
     """
-    bad = []
-    if metric_id in ("yield_10y",):
-        # yields between -5 and 30 pct
-        bad_idx = np.where((s < -5) | (s > 30))[0]
-        bad.extend(list(bad_idx))
-    if metric_id in ("gdp_nominal", "psnd_ex", "psnb_ex", "debt_interest"):
-        # must be non-negative
-        bad_idx = np.where(s < 0)[0]
-        bad.extend(list(bad_idx))
-    return bad
+    version: int
+    freq: str
+    start: int
+    flags: np.ndarray
+    moments: Tuple[int, float, float]
+    tail_ords: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    tail_vals: np.ndarray = field(default_factory=lambda: np.empty(0))
+    frame: Optional[pd.DataFrame] = None
+
+def _observed_row(dm, metric_id: str) -> Tuple[str, int, np.ndarray, np.ndarray]:
+    # (freq, start ordinal, values, mask) over the metric's observed range at its input frequency
+    freq = dm.sc.get_meta(metric_id)["freq"]
+    panel = dm.sc.panel.panels[freq] if dm.sc.panel is not None else None
+    if panel is not None and metric_id in panel.columns:
+        r = panel.columns[metric_id]
+        a, b = int(panel.first[r]), int(panel.last[r]) + 1
+        return freq, panel.start.ordinal + a, panel.values[r, a:b], panel.mask[r, a:b]
+    s = dm.sc.get(metric_id)
+    ords = s.index.asi8
+    start = int(ords.min())
+    values = np.full(int(ords.max()) - start + 1, np.nan)
+    values[ords - start] = s.to_numpy(dtype=float)
+    return freq, start, values, ~np.isnan(values)
+
+class IncrementalQA:
+    """
+    QA that keeps per-metric state between runs and, using DataManager.first_change_since,
+    recomputes flags only from the first new or revised period (less the lookback window) onwards.
+    Results match run_qa with the same settings.
+    """
+    def __init__(self, window: int = 12, z_threshold: float = 5.0, jump_threshold: float = 6.0):
+        self.window = window
+        self.z_threshold = z_threshold
+        self.jump_threshold = jump_threshold
+        self.states: Dict[str, QAState] = {}
+        self.recomputed: Dict[str, int] = {}
+        self._dm_id: Optional[int] = None
+
+    def _flags(self, mid: str, values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        lower, upper, pct = _rule_arrays([mid])
+        return qa_flags(values[None], mask[None], lower, upper, pct, self.window, self.z_threshold, self.jump_threshold)[0]
+
+    def _update_metric(self, dm, mid: str) -> Optional[QAState]:
+        version = dm.versions.get(mid, 0)
+        prev = self.states.get(mid)
+        if prev is not None and prev.version == version:
+            self.recomputed[mid] = 0
+            return prev
+        freq, start, values, mask = _observed_row(dm, mid)
+        t0 = None
+        if prev is not None and prev.freq == freq and prev.start == start:
+            t0 = dm.first_change_since(mid, prev.version)
+        n = len(values)
+        x = np.where(mask, values, np.nan)
+        if t0 is None or t0 <= start:
+            flags = self._flags(mid, values, mask)
+            moments = _moments(x)
+            self.recomputed[mid] = n
+        else:
+            k = min(t0 - start, n)
+            a = max(0, k - self.window - 1)
+            tail = self._flags(mid, values[a:], mask[a:])[k - a:]
+            # Every period is inside the observed range, so gaps are simply unobserved periods
+            tail[:, 0] = ~mask[k:]
+            flags = np.concatenate([prev.flags[:k], tail])
+            if len(prev.tail_ords) and t0 >= prev.tail_ords[0]:
+                moments = _combine_moments(prev.moments, _moments(prev.tail_vals[prev.tail_ords >= t0]), sign=-1)
+                moments = _combine_moments(moments, _moments(x[k:]))
+            else:
+                moments = _moments(x)
+            self.recomputed[mid] = n - k
+        obs = np.flatnonzero(mask)[-(self.window + 1):]
+        return QAState(version=version, freq=freq, start=start, flags=flags, moments=moments,
+                       tail_ords=start + obs, tail_vals=values[obs].copy())
+
+    def update(self, dm, metric_ids: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Bring QA up to date with dm and return the same {'flags', 'summary'} as run_qa.
+        self.recomputed records how many periods were re-checked per metric.
+        """
+        ids = metric_ids if metric_ids is not None else dm.available_metrics()
+        self.recomputed = {}
+        if self._dm_id != id(dm):
+            # Versions are only meaningful within one DataManager (e.g. after loading a workspace)
+            self.states = {}
+            self._dm_id = id(dm)
+        flag_frames, rows = [], []
+        for mid in ids:
+            if dm.sc.get(mid).empty:
+                self.states.pop(mid, None)
+                continue
+            st = self._update_metric(dm, mid)
+            self.states[mid] = st
+            idx = pd.PeriodIndex.from_ordinals(st.start + np.arange(len(st.flags)), freq=FREQ_TO_PANDAS[st.freq])
+            if st.frame is None:
+                st.frame = pd.DataFrame(st.flags, columns=list(QA_CHECKS),
+                                        index=pd.MultiIndex.from_product([[mid], idx], names=["metric_id", "period"]))
+            flag_frames.append(st.frame)
+            anyf = st.flags.any(axis=1)
+            n, mu, m2 = st.moments
+            rows.append({"metric_id": mid, "freq": st.freq, "n_obs": n, "first": str(idx[0]), "last": str(idx[-1]),
+                         **{c: int(st.flags[:, i].sum()) for i, c in enumerate(QA_CHECKS)},
+                         "mean": mu, "std": float(np.sqrt(m2 / (n - 1))) if n > 1 else np.nan,
+                         "last_flagged": str(idx[anyf][-1]) if anyf.any() else ""})
+        flags_df = pd.concat(flag_frames) if flag_frames else pd.DataFrame(columns=list(QA_CHECKS), dtype=bool)
+        return {"flags": flags_df, "summary": pd.DataFrame(rows)}
 
 def compute_sfa(psnd: pd.Series, psnb: pd.Series) -> pd.Series:
     """
@@ -42,4 +305,122 @@ def compute_sfa(psnd: pd.Series, psnb: pd.Series) -> pd.Series:
     d_debt = psnd_y.diff()
     sfa = d_debt - psnb_y
     sfa.name = "sfa"
-    return sfa
\ No newline at end of file
+    return sfa
+
+def _coarser(f1: str, f2: str) -> str:
+    return f1 if FREQ_RANK[f1] <= FREQ_RANK[f2] else f2
+
+def _complete_periods(s: pd.Series, freq: str) -> pd.Index:
+    # Target periods fully covered by observations of s (a partial year of months is not a year)
+    n = PERIODS_PER_YEAR[period_freq(s.index)] // PERIODS_PER_YEAR[freq]
+    counts = resample_periods(pd.Series(1.0, index=s.index), freq, how="sum")
+    return counts.index[counts.to_numpy() >= n]
+
+def reconcile_sfa(
+    psnd: pd.Series,
+    psnb: pd.Series,
+    gdp: Optional[pd.Series] = None,
+    freq: Optional[str] = None,
+    window: int = 12,
+    z_threshold: float = 4.0,
+) -> pd.DataFrame:
+    """
+    Stock-flow reconciliation at native frequency: SFA_t = PSND_t - PSND_{t-1} - PSNB_t.
+    freq defaults to the finer frequency both inputs support. Debt is taken end-of-period and
+    borrowing summed over each period (only complete periods are kept). With gdp, sfa_ratio is
+    SFA over rolling annual GDP. Anomalies are periods whose SFA has |rolling robust z| > z_threshold.
+    """
+    f_d, f_b = period_freq(psnd.index), period_freq(psnb.index)
+    freq = freq or _coarser(f_d, f_b)
+    debt = resample_periods(psnd, freq, how="last") if f_d != freq else psnd
+    flow = psnb
+    if f_b != freq:
+        flow = resample_periods(psnb, freq, how="sum")
+        flow = flow[flow.index.isin(_complete_periods(psnb, freq))]
+    idx = debt.index.union(flow.index)
+    out = pd.DataFrame({"psnd": debt.reindex(idx), "psnb": flow.reindex(idx)})
+    prev = out["psnd"].shift(1)
+    # A gap in the debt series breaks the first difference rather than spanning it
+    consecutive = np.r_[False, np.diff(idx.asi8) == 1]
+    out["d_psnd"] = np.where(consecutive, out["psnd"] - prev, np.nan)
+    out["sfa"] = out["d_psnd"] - out["psnb"]
+    if gdp is not None and not gdp.empty:
+        from .engine.calibration import rolling_annual_gdp
+        out["sfa_ratio"] = out["sfa"] / rolling_annual_gdp(gdp, freq).reindex(idx)
+    out["sfa_z"] = rolling_robust_z(out["sfa"].to_numpy(dtype=float)[None], window)[0]
+    out["anomaly"] = np.abs(out["sfa_z"].fillna(0.0)) > z_threshold
+    return out.dropna(subset=["sfa"]) if out["sfa"].notna().any() else out.iloc[0:0]
+
+def sfa_by_period(rec: pd.DataFrame, by: str = "yearly") -> pd.DataFrame:
+    """
+    Decompose each `by` period's SFA into its sub-periods: rows are `by` periods, columns the
+    position within it (Q1..Q4, M01..M12) plus the total. Cells are SFA in £bn.
+    """
+    idx = rec.index
+    f = period_freq(idx)
+    if FREQ_RANK[f] <= FREQ_RANK[by]:
+        return rec[["sfa"]].rename(columns={"sfa": "total"})
+    parent = idx.asfreq(FREQ_TO_PANDAS[by], how="end")
+    n = PERIODS_PER_YEAR[f] // PERIODS_PER_YEAR[by]
+    pos = idx.asi8 % n
+    labels = [f"Q{i + 1}" for i in range(n)] if f == "quarterly" else [f"M{i + 1:02d}" for i in range(n)]
+    table = pd.DataFrame({"parent": parent, "pos": pos, "sfa": rec["sfa"].to_numpy()}).pivot(index="parent", columns="pos", values="sfa")
+    table = table.reindex(columns=range(n))
+    table.columns = labels[:n]
+    table["total"] = table.sum(axis=1, min_count=n)
+    table.index.name = by
+    return table
+
+def _triangle_at(tri: pd.DataFrame, freq: str, how: str) -> pd.DataFrame:
+    # Vintages x periods triangle carried to freq (end-of-period for stocks, complete-period sums for flows)
+    src = period_freq(tri.columns)
+    if src == freq:
+        return tri
+    n = PERIODS_PER_YEAR[src] // PERIODS_PER_YEAR[freq]
+    g = tri.T.groupby(tri.columns.asfreq(FREQ_TO_PANDAS[freq], how="end"))
+    if how == "last":
+        return g.last().T
+    summed = g.sum(min_count=1)
+    return summed.where(g.count() >= n).T
+
+def sfa_vintages(store, window: int = 12, z_threshold: float = 4.0, freq: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    SFA for every data vintage at once. At each vintage event (a new PSND or PSNB vintage),
+    the latest vintage of each input as of that time is gathered from the revision triangles,
+    and the SFA and anomaly flags are computed as matrices (events x periods). Vintages are ordered
+    by timestamp; inputs re-entered at another frequency are compared at the coarsest one.
+    Returns {'sfa', 'flags'}; empty frames when either input has no vintages.
+    """
+    hd, hb = store.history.get("psnd_ex", []), store.history.get("psnb_ex", [])
+    if not hd or not hb:
+        return {"sfa": pd.DataFrame(), "flags": pd.DataFrame()}
+    # Default: the coarsest frequency any vintage of either input was entered at, so every event is comparable
+    freq = freq or min((v.freq for v in hd + hb), key=FREQ_RANK.get)
+    # Triangles come back at each input's latest frequency, older vintages carried over
+    D = _triangle_at(store.revision_triangle("psnd_ex", how="last"), freq, "last")
+    B = _triangle_at(store.revision_triangle("psnb_ex", how="sum"), freq, "sum")
+    cols = D.columns.union(B.columns)
+    cols = pd.PeriodIndex.from_ordinals(np.arange(cols.asi8.min(), cols.asi8.max() + 1), freq=FREQ_TO_PANDAS[freq])
+    D, B = D.reindex(columns=cols).to_numpy(), B.reindex(columns=cols).to_numpy()
+    td = np.array([v.timestamp for v in hd], dtype="datetime64[ns]")
+    tb = np.array([v.timestamp for v in hb], dtype="datetime64[ns]")
+    # Vintages are kept in insertion order, which need not be time order when timestamps are given
+    od, ob = np.argsort(td, kind="stable"), np.argsort(tb, kind="stable")
+    td, tb, D, B = td[od], tb[ob], D[od], B[ob]
+    hd, hb = [hd[i] for i in od], [hb[i] for i in ob]
+    events = np.unique(np.concatenate([td, tb]))
+    # Latest vintage of each input at each event; events before an input's first vintage are dropped
+    sel_d = np.searchsorted(td, events, side="right") - 1
+    sel_b = np.searchsorted(tb, events, side="right") - 1
+    ok = (sel_d >= 0) & (sel_b >= 0)
+    events, sel_d, sel_b = events[ok], sel_d[ok], sel_b[ok]
+    Dv, Bv = D[sel_d], B[sel_b]
+    sfa = np.full_like(Dv, np.nan)
+    sfa[:, 1:] = Dv[:, 1:] - Dv[:, :-1] - Bv[:, 1:]
+    with np.errstate(invalid="ignore"):
+        flags = np.abs(rolling_robust_z(sfa, window)) > z_threshold
+    labels = [f"{hd[i].label} | {hb[j].label}" for i, j in zip(sel_d, sel_b)]
+    sfa_df = pd.DataFrame(sfa, index=pd.Index(labels, name="vintage"), columns=cols)
+    keep = sfa_df.notna().any(axis=0)
+    return {"sfa": sfa_df.loc[:, keep], "flags": pd.DataFrame(flags, index=sfa_df.index, columns=cols).loc[:, keep]}
+
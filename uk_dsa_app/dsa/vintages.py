@@ -0,0 +1,215 @@
+from __future__ import annotations
+import bisect
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .config import FREQ_TO_PANDAS, PERIODS_PER_YEAR
+from .timeseries import FREQ_RANK, period_freq, resample_periods
+
+# Periods per storage block; blocks are aligned on absolute period ordinals,
+# so appending observations or revising a few periods only rewrites the blocks they touch.
+BLOCK_SIZE = 32
+
+@dataclass
+class Vintage:
+    metric_id: str
+    seq: int
+    timestamp: pd.Timestamp
+    label: str
+    freq: str
+    content_hash: str
+    first_block: int
+    # Hashes of the blocks covering first_block, first_block + 1, ...
+    block_hashes: List[str] = field(default_factory=list)
+    n_obs: int = 0
+    # Hashes of the matching presence-mask blocks (1.0 where a period was observed, even if NaN);
+    # empty for vintages saved before masks were kept, whose presence is read off the values
+    mask_hashes: List[str] = field(default_factory=list)
+
+def _hash_bytes(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p)
+    return h.hexdigest()
+
+def content_hash(s: pd.Series) -> str:
+    """
+    Hash of a PeriodIndex series' frequency, periods and values.
+    """
+    return _hash_bytes(s.index.freqstr.encode(), s.index.asi8.tobytes(), s.to_numpy(dtype=float).tobytes())
+
+class VintageStore:
+    """
+    Keeps every ingested version of each metric with timestamp and content hash.
+    Series are split into fixed-size period blocks stored once by hash, so unchanged history
+    is shared between vintages. Blocks hold values with NaN where a period is absent; parallel
+    presence-mask blocks (deduplicated the same way) tell absent periods from observed NaN.
+    """
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self.blocks: Dict[str, np.ndarray] = {}
+        self.masks: Dict[str, np.ndarray] = {}
+        # Per metric, sorted by timestamp (ties in insertion order)
+        self.history: Dict[str, List[Vintage]] = {}
+        self._seq = 0
+
+    def add(self, metric_id: str, s: pd.Series, timestamp: Optional[pd.Timestamp] = None, label: str = "") -> Vintage:
+        """
+        Record a new vintage of metric_id. History is kept in timestamp order, so backdated vintages
+        (e.g. stamped with a publication date) slot in where they belong. If the content equals the
+        vintage current at that timestamp, that vintage is returned unchanged.
+        """
+        if not isinstance(s.index, pd.PeriodIndex):
+            raise TypeError("Vintage store expects a PeriodIndex series.")
+        s = s.sort_index()
+        h = content_hash(s)
+        hist = self.history.setdefault(metric_id, [])
+        ts = pd.Timestamp(timestamp) if timestamp is not None else pd.Timestamp.now()
+        pos = bisect.bisect_right(hist, ts, key=lambda v: v.timestamp)
+        if pos and hist[pos - 1].content_hash == h:
+            return hist[pos - 1]
+        B = self.block_size
+        hashes: List[str] = []
+        mask_hashes: List[str] = []
+        first_block = 0
+        if not s.empty:
+            ords = s.index.asi8
+            first_block = int(ords.min() // B)
+            n_blocks = int(ords.max() // B) - first_block + 1
+            dense = np.full(n_blocks * B, np.nan)
+            dense[ords - first_block * B] = s.to_numpy(dtype=float)
+            present = np.zeros(n_blocks * B)
+            present[ords - first_block * B] = 1.0
+            for blk, msk in zip(dense.reshape(n_blocks, B), present.reshape(n_blocks, B)):
+                hashes.append(self._store_block(self.blocks, blk))
+                mask_hashes.append(self._store_block(self.masks, msk))
+        self._seq += 1
+        v = Vintage(metric_id=metric_id, seq=self._seq, timestamp=ts, label=label or ts.isoformat(timespec="seconds"),
+                    freq=period_freq(s.index), content_hash=h, first_block=first_block, block_hashes=hashes, n_obs=len(s),
+                    mask_hashes=mask_hashes)
+        hist.insert(pos, v)
+        return v
+
+    @staticmethod
+    def _store_block(table: Dict[str, np.ndarray], blk: np.ndarray) -> str:
+        bh = _hash_bytes(blk.tobytes())
+        if bh not in table:
+            table[bh] = blk.copy()
+        return bh
+
+    def vintages(self, metric_id: Optional[str] = None) -> pd.DataFrame:
+        rows = []
+        for mid, hist in self.history.items():
+            if metric_id is not None and mid != metric_id:
+                continue
+            for v in hist:
+                rows.append({"metric_id": mid, "seq": v.seq, "timestamp": v.timestamp, "label": v.label,
+                             "freq": v.freq, "n_obs": v.n_obs, "n_blocks": len(v.block_hashes), "content_hash": v.content_hash[:12]})
+        return pd.DataFrame(rows)
+
+    def select(self, metric_id: str, as_of: Optional[pd.Timestamp] = None) -> Optional[Vintage]:
+        """
+        The vintage of metric_id current at `as_of` (latest if None); None if none existed yet.
+        """
+        hist = self.history.get(metric_id, [])
+        if as_of is None:
+            return hist[-1] if hist else None
+        pos = bisect.bisect_right(hist, pd.Timestamp(as_of), key=lambda v: v.timestamp)
+        return hist[pos - 1] if pos else None
+
+    def reconstruct(self, v: Vintage) -> pd.Series:
+        code = FREQ_TO_PANDAS[v.freq]
+        if not v.block_hashes:
+            return pd.Series(dtype=float, index=pd.PeriodIndex([], freq=code))
+        dense = np.concatenate([self.blocks[h] for h in v.block_hashes])
+        ords = np.arange(v.first_block * self.block_size, v.first_block * self.block_size + len(dense))
+        if v.mask_hashes:
+            keep = np.concatenate([self.masks[h] for h in v.mask_hashes]) > 0
+        else:
+            keep = ~np.isnan(dense)
+        return pd.Series(dense[keep], index=pd.PeriodIndex.from_ordinals(ords[keep], freq=code), name=v.metric_id)
+
+    def get(self, metric_id: str, as_of: Optional[pd.Timestamp] = None) -> pd.Series:
+        """
+        The metric as known at `as_of` (latest vintage if None); empty if no vintage existed yet.
+        """
+        v = self.select(metric_id, as_of)
+        return self.reconstruct(v) if v is not None else pd.Series(dtype=float)
+
+    def as_of(self, as_of: Optional[pd.Timestamp] = None, metric_ids: Optional[List[str]] = None) -> Dict[str, pd.Series]:
+        ids = metric_ids if metric_ids is not None else list(self.history.keys())
+        out = {}
+        for mid in ids:
+            v = self.select(mid, as_of)
+            if v is not None:
+                out[mid] = self.reconstruct(v)
+        return out
+
+    def revision_triangle(self, metric_id: str, how: str = "mean") -> pd.DataFrame:
+        """
+        Vintages x periods matrix of values for metric_id, built in one gather over the block table.
+        Rows are vintage labels (oldest timestamp first), columns periods; NaN where a vintage had no value.
+        Columns are at the latest vintage's frequency. A metric re-entered at another frequency keeps
+        one row per vintage: older rows are carried over with resample_periods(how) ('last' for stocks, placed
+        at period end when expanding; 'sum' for flows, complete periods only when aggregating, split evenly when expanding).
+        """
+        hist = self.history.get(metric_id, [])
+        if not hist:
+            return pd.DataFrame()
+        freq = hist[-1].freq
+        same = [i for i, v in enumerate(hist) if v.freq == freq]
+        tri = self._gather([hist[i] for i in same], freq)
+        if len(same) < len(hist):
+            tri.index = same
+            other = pd.DataFrame({i: self._carry(self.reconstruct(v), freq, how) for i, v in enumerate(hist) if v.freq != freq}).T
+            cols = tri.columns.union(other.columns)
+            tri = pd.concat([tri.reindex(columns=cols), other.reindex(columns=cols)]).sort_index()
+            tri.index = [v.label for v in hist]
+            tri.columns = pd.PeriodIndex(cols, freq=FREQ_TO_PANDAS[freq])
+        return tri.loc[:, tri.notna().any(axis=0)]
+
+    @staticmethod
+    def _carry(s: pd.Series, freq: str, how: str) -> pd.Series:
+        # One vintage at another frequency, at freq
+        s = s.dropna()
+        if s.empty:
+            return s
+        src = period_freq(s.index)
+        if FREQ_RANK[src] < FREQ_RANK[freq]:
+            if how == "last":
+                # An end-of-period stock is only known at the end of each coarse period
+                return pd.Series(s.to_numpy(), index=s.index.asfreq(FREQ_TO_PANDAS[freq], how="end"))
+            out = resample_periods(s, freq)
+            return out / (PERIODS_PER_YEAR[freq] // PERIODS_PER_YEAR[src]) if how == "sum" else out
+        out = resample_periods(s, freq, how=how)
+        if how == "sum":
+            n = PERIODS_PER_YEAR[src] // PERIODS_PER_YEAR[freq]
+            counts = resample_periods(pd.Series(1.0, index=s.index), freq, how="sum")
+            out = out[counts.to_numpy() >= n]
+        return out
+
+    def _gather(self, hist: List[Vintage], freq: str) -> pd.DataFrame:
+        # Triangle of same-frequency vintages from the deduplicated block table
+        if not hist:
+            return pd.DataFrame()
+        B = self.block_size
+        b0 = min(v.first_block for v in hist if v.block_hashes) if any(v.block_hashes for v in hist) else 0
+        b1 = max(v.first_block + len(v.block_hashes) for v in hist)
+        uniq = sorted({h for v in hist for h in v.block_hashes})
+        pos = {h: i for i, h in enumerate(uniq)}
+        # Unique block table with a trailing all-NaN block for absent positions
+        table = np.vstack([self.blocks[h] for h in uniq] + [np.full(B, np.nan)])
+        sel = np.full((len(hist), max(b1 - b0, 0)), len(uniq), dtype=np.int64)
+        for i, v in enumerate(hist):
+            sel[i, v.first_block - b0:v.first_block - b0 + len(v.block_hashes)] = [pos[h] for h in v.block_hashes]
+        values = table[sel].reshape(len(hist), -1)
+        cols = pd.PeriodIndex.from_ordinals(np.arange(b0 * B, b0 * B + values.shape[1]), freq=FREQ_TO_PANDAS[freq])
+        return pd.DataFrame(values, index=[v.label for v in hist], columns=cols)
+
+    def revisions(self, metric_id: str, how: str = "mean") -> pd.DataFrame:
+        """
+        Change in each period's value from one vintage to the next.
+        """
+        return self.revision_triangle(metric_id, how).diff()
@@ -0,0 +1,270 @@
+from __future__ import annotations
+import io
+import json
+import os
+import shutil
+import tempfile
+import weakref
+import zipfile
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from .config import APP_VERSION, FREQ_TO_PANDAS
+from .timeseries import DataManager, period_freq
+from .vintages import Vintage
+
+MANIFEST = "manifest.json"
+WORKSPACE_FORMAT = 1
+
+def _write_arrow(path: str, table: pa.Table):
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def _read_arrow(path: str, mmap: bool = True) -> pa.Table:
+    source = pa.memory_map(path, "r") if mmap else pa.OSFile(path, "rb")
+    return pa.ipc.open_file(source).read_all()
+
+def _frame_to_table(df: pd.DataFrame) -> Tuple[pa.Table, Optional[str]]:
+    """
+    DataFrame with a PeriodIndex (or plain index) to an Arrow table; periods stored as int64 ordinals.
+    """
+    freq = period_freq(df.index) if isinstance(df.index, pd.PeriodIndex) else None
+    cols = {"__index__": df.index.asi8 if freq else np.asarray(df.index)}
+    for c in df.columns:
+        cols[str(c)] = df[c].to_numpy(dtype=float)
+    return pa.table(cols), freq
+
+def _table_to_frame(table: pa.Table, freq: Optional[str]) -> pd.DataFrame:
+    idx_raw = table.column("__index__").to_numpy()
+    idx = pd.PeriodIndex.from_ordinals(idx_raw, freq=FREQ_TO_PANDAS[freq]) if freq else pd.Index(idx_raw)
+    data = {c: table.column(c).to_numpy() for c in table.column_names if c != "__index__"}
+    return pd.DataFrame(data, index=idx)
+
+def _series_by_freq(series: Dict[str, pd.Series]) -> Dict[str, pd.DataFrame]:
+    groups: Dict[str, List[pd.Series]] = {}
+    for name, s in series.items():
+        if isinstance(s.index, pd.PeriodIndex) and not s.empty:
+            groups.setdefault(period_freq(s.index), []).append(s.rename(name))
+    return {f: pd.concat(ss, axis=1) for f, ss in groups.items()}
+
+def save_workspace(path: str, dm: DataManager, model_setup: Optional[Dict] = None) -> Dict:
+    """
+    Save a workspace as a directory bundle:
+    - manifest.json: metric metadata, frequency choices, scalar settings and the file list
+    - Arrow IPC files for raw series, columnar panels, model_setup series/frames and arrays (e.g. MC paths)
+    Returns the manifest.
+    """
+    os.makedirs(path, exist_ok=True)
+    model_setup = model_setup or {}
+    manifest = {
+        "format": WORKSPACE_FORMAT,
+        "app_version": APP_VERSION,
+        "meta": dm.sc.meta,
+        "user_freq_choices": dm.user_freq_choices,
+        "versions": dm.versions,
+        "files": [],
+        "model_setup": {"scalars": {}, "series": {}, "frames": {}, "frame_groups": {}, "arrays": {}},
+    }
+
+    def add(name: str, table: pa.Table, **info):
+        _write_arrow(os.path.join(path, name), table)
+        manifest["files"].append(dict(name=name, **info))
+
+    # Raw series, one long (metric, period ordinal, value) table per native frequency
+    long: Dict[str, List[pa.Table]] = {}
+    for mid, s in dm.sc.series.items():
+        if not isinstance(s.index, pd.PeriodIndex) or s.empty:
+            continue
+        long.setdefault(period_freq(s.index), []).append(pa.table({
+            "metric": pa.array([mid] * len(s), type=pa.string()),
+            "__index__": s.index.asi8,
+            "value": s.to_numpy(dtype=float),
+        }))
+    for f, tables in long.items():
+        add(f"series_{f}.arrow", pa.concat_tables(tables), kind="series", freq=f)
+    # Columnar panels (values and presence mask), so reload skips resampling
+    if dm.sc.panel is not None:
+        for f, p in dm.sc.panel.panels.items():
+            if p.start is None:
+                continue
+            ids = sorted(p.columns, key=p.columns.get)
+            cols = {"__index__": p.index.asi8}
+            for m in ids:
+                cols[m] = p.values[p.columns[m]]
+                cols[f"mask:{m}"] = p.mask[p.columns[m]]
+            add(f"panel_{f}.arrow", pa.table(cols), kind="panel", freq=f)
+    # Vintage history: deduplicated blocks in Arrow, vintage records in the manifest
+    vs = dm.vintages
+    if vs is not None and vs.history:
+        hashes = sorted(vs.blocks)
+        add("vintage_blocks.arrow", pa.table({
+            "hash": pa.array(hashes, type=pa.string()),
+            "values": pa.FixedSizeListArray.from_arrays(np.concatenate([vs.blocks[h] for h in hashes]), vs.block_size),
+        }), kind="vintage_blocks")
+        if vs.masks:
+            mask_hashes = sorted(vs.masks)
+            add("vintage_masks.arrow", pa.table({
+                "hash": pa.array(mask_hashes, type=pa.string()),
+                "values": pa.FixedSizeListArray.from_arrays(np.concatenate([vs.masks[h] for h in mask_hashes]), vs.block_size),
+            }), kind="vintage_masks")
+        manifest["vintages"] = {
+            "block_size": vs.block_size,
+            "history": {mid: [{"seq": v.seq, "timestamp": v.timestamp.isoformat(), "label": v.label, "freq": v.freq,
+                               "content_hash": v.content_hash, "first_block": v.first_block,
+                               "block_hashes": v.block_hashes, "n_obs": v.n_obs,
+                               "mask_hashes": v.mask_hashes} for v in hist]
+                        for mid, hist in vs.history.items()},
+        }
+    # Model setup: scalars in the manifest, everything array-like in Arrow files
+    ms_man = manifest["model_setup"]
+    ms_series = {}
+    for key, val in model_setup.items():
+        if isinstance(val, pd.Series):
+            ms_series[key] = val
+        elif isinstance(val, pd.DataFrame):
+            table, f = _frame_to_table(val)
+            name = f"ms_{key}.arrow"
+            add(name, table, kind="frame")
+            ms_man["frames"][key] = {"file": name, "freq": f}
+        elif isinstance(val, dict) and val and all(isinstance(v, pd.DataFrame) for v in val.values()):
+            # e.g. mc_qdfs: {'debt_ratio': quantile frame}
+            group = {}
+            for sub, df in val.items():
+                table, f = _frame_to_table(df)
+                name = f"ms_{key}__{sub}.arrow"
+                add(name, table, kind="frame")
+                group[sub] = {"file": name, "freq": f}
+            ms_man["frame_groups"][key] = group
+        elif isinstance(val, np.ndarray):
+            name = f"ms_{key}.arrow"
+            add(name, pa.table({"values": np.ascontiguousarray(val).reshape(-1)}), kind="array")
+            ms_man["arrays"][key] = {"file": name, "shape": list(val.shape), "dtype": str(val.dtype)}
+        elif isinstance(val, (int, float, str, bool)) or val is None:
+            ms_man["scalars"][key] = val
+    for f, df in _series_by_freq(ms_series).items():
+        table, _ = _frame_to_table(df)
+        name = f"ms_series_{f}.arrow"
+        add(name, table, kind="frame")
+        for key in df.columns:
+            ms_man["series"][key] = {"file": name, "freq": f}
+    with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    return manifest
+
+def load_workspace(path: str, metrics_def, mmap: bool = True) -> Tuple[DataManager, Dict]:
+    """
+    Load a workspace saved by save_workspace. Arrow files are memory-mapped, so large
+    arrays (MC paths) come back as read-only views without copying.
+    Returns (DataManager, model_setup dict).
+    """
+    with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("format") != WORKSPACE_FORMAT:
+        raise ValueError(f"Unsupported workspace format: {manifest.get('format')}")
+    has_panel = any(f["kind"] == "panel" for f in manifest["files"])
+    dm = DataManager(metrics_def, columnar=has_panel)
+    dm.user_freq_choices = dict(manifest.get("user_freq_choices", {}))
+    dm.versions = {k: int(v) for k, v in manifest.get("versions", {}).items()}
+    for f in manifest["files"]:
+        full = os.path.join(path, f["name"])
+        if f["kind"] == "series":
+            table = _read_arrow(full, mmap)
+            metric = np.asarray(table.column("metric").to_pylist(), dtype=object)
+            ords = table.column("__index__").to_numpy()
+            vals = table.column("value").to_numpy()
+            code = FREQ_TO_PANDAS[f["freq"]]
+            # rows of one metric are contiguous
+            bounds = np.flatnonzero(np.r_[True, metric[1:] != metric[:-1], True])
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                mid = metric[a]
+                if mid not in manifest["meta"]:
+                    continue
+                dm.sc.series[mid] = pd.Series(vals[a:b], index=pd.PeriodIndex.from_ordinals(ords[a:b], freq=code))
+                dm.sc.meta[mid] = manifest["meta"][mid]
+        elif f["kind"] == "panel":
+            table = _read_arrow(full, mmap)
+            p = dm.sc.panel.panels[f["freq"]]
+            ords = table.column("__index__").to_numpy()
+            ids = [c for c in table.column_names if c != "__index__" and not c.startswith("mask:")]
+            p.start = pd.Period(ordinal=int(ords[0]), freq=FREQ_TO_PANDAS[f["freq"]]) if len(ords) else None
+            p.values = np.vstack([table.column(m).to_numpy() for m in ids]) if ids else np.empty((0, len(ords)))
+            p.mask = np.vstack([table.column(f"mask:{m}").to_numpy(zero_copy_only=False) for m in ids]) if ids else np.empty((0, len(ords)), dtype=bool)
+            p.columns = {m: i for i, m in enumerate(ids)}
+            has = p.mask.any(axis=1)
+            p.first = np.where(has, p.mask.argmax(axis=1), -1).astype(np.int64)
+            p.last = np.where(has, p.mask.shape[1] - 1 - p.mask[:, ::-1].argmax(axis=1), -1).astype(np.int64)
+        elif f["kind"] == "vintage_blocks" and dm.vintages is not None:
+            table = _read_arrow(full, mmap)
+            vs = dm.vintages
+            vs.block_size = int(manifest["vintages"]["block_size"])
+            flat = table.column("values").combine_chunks().flatten().to_numpy()
+            vs.blocks = dict(zip(table.column("hash").to_pylist(), flat.reshape(-1, vs.block_size)))
+            for mid, recs in manifest["vintages"]["history"].items():
+                hist = [Vintage(metric_id=mid, timestamp=pd.Timestamp(r.pop("timestamp")), **r) for r in recs]
+                vs.history[mid] = sorted(hist, key=lambda v: (v.timestamp, v.seq))
+            vs._seq = max((v.seq for hist in vs.history.values() for v in hist), default=0)
+        elif f["kind"] == "vintage_masks" and dm.vintages is not None:
+            table = _read_arrow(full, mmap)
+            size = int(manifest["vintages"]["block_size"])
+            flat = table.column("values").combine_chunks().flatten().to_numpy()
+            dm.vintages.masks = dict(zip(table.column("hash").to_pylist(), flat.reshape(-1, size)))
+    model_setup: Dict = {}
+    ms_man = manifest["model_setup"]
+    model_setup.update(ms_man["scalars"])
+    frames: Dict[str, pd.DataFrame] = {}
+
+    def frame(info):
+        if info["file"] not in frames:
+            frames[info["file"]] = _table_to_frame(_read_arrow(os.path.join(path, info["file"]), mmap), info["freq"])
+        return frames[info["file"]]
+
+    for key, info in ms_man["series"].items():
+        model_setup[key] = frame(info)[key].dropna().rename(key)
+    for key, info in ms_man["frames"].items():
+        model_setup[key] = frame(info)
+    for key, group in ms_man["frame_groups"].items():
+        model_setup[key] = {sub: frame(info) for sub, info in group.items()}
+    for key, info in ms_man["arrays"].items():
+        col = _read_arrow(os.path.join(path, info["file"]), mmap).column("values")
+        # single chunk of a memory-mapped file: a zero-copy, read-only view
+        arr = col.chunk(0).to_numpy(zero_copy_only=False) if col.num_chunks == 1 else col.to_numpy()
+        model_setup[key] = arr.astype(info["dtype"], copy=False).reshape(info["shape"])
+    return dm, model_setup
+
+def workspace_to_zip_bytes(dm: DataManager, model_setup: Optional[Dict] = None) -> bytes:
+    """
+    Bundle a workspace into an uncompressed zip (Arrow files are already compact columnar data).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        save_workspace(tmp, dm, model_setup)
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+            for name in sorted(os.listdir(tmp)):
+                zf.write(os.path.join(tmp, name), arcname=name)
+        return buf.getvalue()
+
+def workspace_from_zip_bytes(data: bytes, metrics_def, extract_dir: Optional[str] = None) -> Tuple[DataManager, Dict]:
+    """
+    Extract a zipped workspace to extract_dir and memory-map it. A caller-supplied directory must
+    outlive the returned objects; by default a temporary directory is used and removed when the
+    returned DataManager is garbage collected (or at exit).
+    """
+    owned = extract_dir is None
+    extract_dir = extract_dir or tempfile.mkdtemp(prefix="dsa_ws_")
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            for name in zf.namelist():
+                if os.path.basename(name) != name:
+                    raise ValueError(f"Unexpected path in workspace archive: {name}")
+            zf.extractall(extract_dir)
+        dm, ms = load_workspace(extract_dir, metrics_def)
+    except Exception:
+        if owned:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+        raise
+    if owned:
+        # Mapped arrays stay readable after unlinking on POSIX; elsewhere undeletable files are left
+        weakref.finalize(dm, shutil.rmtree, extract_dir, ignore_errors=True)
+    return dm, ms
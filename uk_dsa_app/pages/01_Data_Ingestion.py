@@ -5,8 +5,9 @@ import numpy as np
 
 from dsa.metrics import all_metrics_definition
 from dsa.timeseries import DataManager
-from dsa.io import parse_pasted_two_column, read_csv_uploaded, read_excel_uploaded, normalize_index_to_freq, paste_matrix_to_series
+from dsa.io import read_bulk_template, parse_pasted_two_column, stream_csv_to_freq, read_excel_uploaded, excel_sheets, excel_columns, normalize_index_to_freq, paste_matrix_to_series
 from dsa.config import FREQ_DEPENDENCY_RULES, SUPPORTED_FREQS
+from dsa.sources import DataSource, ons_series_for, refresh_from_ons, unmapped_required
 
 def init_session():
     if "metrics_def" not in st.session_state:
@@ -20,7 +21,7 @@ def page():
     init_session()
     st.title("Data Ingestion")
     st.write("Ingest raw series (PSND ex, PSNB ex, Debt Interest, Nominal GDP, etc.) and set each metric's frequency. Derived metrics are computed automatically and do not appear here.")
-    st.info("Inputs required: provide PSND ex BoE, Nominal GDP, PSNB ex, and Debt Interest. Optional series (deflator, CPI, maturities) improve outputs. Derived items (Primary Balance, Debt/GDP, Effective rate, Nominal g) are auto-computed and thus not listed here.")
+    st.info("Inputs required: provide PSND ex BoE, Nominal GDP, PSNB ex, and Debt Interest. Optional series (deflator, CPI, maturities) improve outputs. Derived items (Primary Balance, Debt/GDP, Effective rate, Nominal g, PB and SFA ratios) are auto-computed and thus not listed here.")
 
     metrics_def = st.session_state.metrics_def
     dm = st.session_state.dm
@@ -45,6 +46,51 @@ def page():
     if changes:
         st.info("Adjusted frequencies to respect dependencies: " + ", ".join([f"{k}→{v}" for k, v in changes.items()]))
 
+    st.subheader("Bulk upload")
+    st.caption("One file with many metrics: the long template (metric, period, value, unit, frequency) as in sample_data/example_metrics_template.csv, "
+               "a wide table (period column followed by one column per metric), or a workbook with several such sheets.")
+    bulk = st.file_uploader("Upload template CSV or workbook", type=["csv", "xlsx", "xls"], key="bulk_upload")
+    if bulk is not None:
+        try:
+            batch, unmapped = read_bulk_template(bulk.getvalue(), bulk.name, metrics_def,
+                                                 default_freqs={mid: dm.get_user_freq(mid) for mid in metrics_def})
+            if unmapped:
+                st.warning("Ignored unrecognised metrics/columns: " + ", ".join(unmapped))
+            dropped = {mid: b["dropped"] for mid, b in batch.items() if b.get("dropped")}
+            if dropped:
+                st.warning("Skipped rows with unreadable periods: " + "; ".join(
+                    f"{mid}: {', '.join(map(str, labels[:5]))}{' …' if len(labels) > 5 else ''}" for mid, labels in dropped.items()))
+            if batch:
+                st.dataframe(pd.DataFrame([{"metric_id": mid, "freq": b["freq"], "unit": b["unit"], "obs": len(b["series"]),
+                                            "start": str(b["series"].index.min()), "end": str(b["series"].index.max())}
+                                           for mid, b in batch.items()]), use_container_width=True)
+                if st.button("Add all to dataset", key="bulk_add"):
+                    changed = dm.add_many(batch, vintage_label=bulk.name)
+                    st.success(f"Updated {len(changed)} metric(s)." if changed else "No changes: data identical to what is loaded.")
+        except Exception as e:
+            st.error(f"Bulk upload failed: {e}")
+
+    st.subheader("Refresh from ONS files")
+    loc = st.text_input("Folder path or http:// URL", value=os.getenv("DSA_ONS_SOURCE", ""), key="ons_location")
+    c1, c2 = st.columns(2)
+    psnd_cdid = c1.text_input("Series ID for PSND", value=os.getenv("DSA_ONS_PSND_CDID", "HF6W"), key="ons_psnd_cdid",
+                              help="HF6W is PSND ex public sector banks (includes the Bank of England). Enter the ex-BoE series ID (£m) to match the metric definition.")
+    di_cdid = c2.text_input("Series ID for debt interest", value=os.getenv("DSA_ONS_DEBT_INTEREST_CDID", ""), key="ons_di_cdid",
+                            help="No default: net debt interest is not mapped to a single ONS series. Enter one (£m) to include it.")
+    cdids = {"psnd_ex": psnd_cdid.strip().upper(), "debt_interest": di_cdid.strip().upper()}
+    st.caption("Reads ONS time-series CSV/JSON downloads named by series ID (" + ", ".join(f"{c} → {mid}" for c, (mid, _) in ons_series_for(cdids).items())
+               + ") from a local folder or a local HTTP mirror. Responses are cached on disk; unchanged files are not re-downloaded. "
+               "Vintages are dated by each series' ONS release date.")
+    missing = unmapped_required(metrics_def, cdids)
+    if missing:
+        st.info("Not covered by the ONS refresh (enter a series ID above or upload): " + ", ".join(metrics_def[m].display_name for m in missing))
+    if st.button("Refresh all ONS series", disabled=not loc.strip(), key="ons_refresh"):
+        with st.spinner("Fetching..."):
+            changed, errors = refresh_from_ons(dm, DataSource(loc.strip()), cdids=cdids)
+        st.success(f"Updated: {', '.join(changed) if changed else 'nothing changed'}")
+        if errors:
+            st.warning("Not loaded: " + "; ".join(f"{c}: {e}" for c, e in errors.items()))
+
     st.subheader("Enter data series")
     for mid, m in metrics_def.items():
         # Skip derived metrics in data entry
@@ -61,16 +107,33 @@ def page():
             if mode in ("Upload CSV", "Upload Excel"):
                 file = st.file_uploader(f"Upload file for {m.display_name}", type=["csv", "xlsx", "xls"], key=f"file_{mid}")
                 if file is not None:
-                    if file.type.endswith("csv"):
-                        s = read_csv_uploaded(file.read())
+                    if file.name.lower().endswith(".csv"):
+                        # Stream and aggregate finer observations (e.g. daily yields) to the entry frequency;
+                        # debt is a stock, other £bn series are flows, the rest are averaged
+                        how = "last" if mid == "psnd_ex" else ("sum" if m.unit == "bn_gbp" else "mean")
+                        try:
+                            series = stream_csv_to_freq(file.getvalue(), entry_freq, how=how, engine="pyarrow")
+                        except ValueError as e:
+                            st.error(f"Could not read CSV: {e}")
                     else:
-                        s = read_excel_uploaded(file.read())
-                    s = normalize_index_to_freq(s, entry_freq)
-                    series = s
+                        data = file.getvalue()
+                        try:
+                            sheets = excel_sheets(data)
+                            sheet = st.selectbox("Sheet", options=sheets, key=f"sheet_{mid}")
+                            cols = excel_columns(data, sheet)
+                            c1, c2 = st.columns(2)
+                            idx_col = c1.selectbox("Date/period column", options=range(len(cols)), format_func=lambda i: cols[i] or f"column {i + 1}", key=f"xidx_{mid}")
+                            val_col = c2.selectbox("Value column", options=range(len(cols)), index=min(1, len(cols) - 1), format_func=lambda i: cols[i] or f"column {i + 1}", key=f"xval_{mid}")
+                            s = read_excel_uploaded(data, sheet_name=sheet, index_col=idx_col, value_col=val_col).dropna()
+                            series = normalize_index_to_freq(s, entry_freq)
+                        except Exception as e:
+                            st.error(f"Could not read workbook: {e}")
             elif mode == "Paste two-column":
                 txt = st.text_area("Paste two-column data (date, value)", height=150, key=f"paste_{mid}")
                 if txt.strip():
-                    s = parse_pasted_two_column(txt)
+                    s, bad = parse_pasted_two_column(txt, return_bad=True)
+                    if bad.any():
+                        st.warning(f"Skipped {int(bad.sum())} row(s) without a numeric value (lines {', '.join(str(i + 1) for i in np.flatnonzero(bad)[:10])}{'…' if bad.sum() > 10 else ''}).")
                     s = normalize_index_to_freq(s, entry_freq)
                     series = s
             else:
@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
 from dsa.metrics import all_metrics_definition
-from dsa.timeseries import DataManager
-from dsa.validation import check_missing, check_outliers_zscore, plausible_bounds_check, compute_sfa
+from dsa.timeseries import DataManager, period_freq
+from dsa.validation import QA_CHECKS, IncrementalQA, reconcile_sfa, sfa_by_period, sfa_vintages
 from dsa.plotting import line_chart
 
 def init_session():
@@ -24,7 +24,19 @@ def page():
     if missing:
         st.warning(f"Missing required metrics: {', '.join(missing)}")
 
-    # Show each available series QA
+    # Batch QA over all series: rolling robust outliers, growth jumps, bounds, gaps
+    # State persists across reruns; only periods changed since the last run are re-checked
+    if "qa_engine" not in st.session_state:
+        st.session_state.qa_engine = IncrementalQA()
+    qa = st.session_state.qa_engine.update(dm)
+    figs = st.session_state.setdefault("qa_figs", {})
+    if not qa["summary"].empty:
+        st.subheader("QA summary")
+        st.caption("outlier: |robust z| > 5 against the trailing 12 observations; jump: same test on period-on-period changes; "
+                   "bounds: outside the plausible range for the metric; missing: gaps inside the observed range.")
+        st.dataframe(qa["summary"], use_container_width=True)
+
+    flags = qa["flags"]
     for mid in dm.available_metrics():
         s = dm.get_series(mid)
         if s.empty:
@@ -32,26 +44,56 @@ def page():
         with st.expander(f"QA: {metrics_def[mid].display_name}"):
             st.write("Last 10 observations")
             st.dataframe(s.to_frame(name=metrics_def[mid].display_name).tail(10))
-            # Missing and outliers
-            mi = check_missing(s)
-            oi = check_outliers_zscore(s)
-            pi = plausible_bounds_check(s, mid)
-            if mi:
-                st.warning(f"Missing values at positions: {mi}")
-            if oi:
-                st.warning(f"Potential outliers (z-score>4): {oi}")
-            if pi:
-                st.warning(f"Values outside plausible bounds: {pi}")
-            st.plotly_chart(line_chart({metrics_def[mid].display_name: s}, "Series preview", metrics_def[mid].unit), use_container_width=True)
-
-    # SFA residual check
+            fm = flags.xs(mid, level="metric_id") if mid in flags.index.get_level_values(0) else flags.iloc[0:0]
+            labels = {"missing": "Missing values at", "bounds": "Values outside plausible bounds at",
+                      "outlier": "Potential outliers (rolling robust z) at", "jump": "Unusual period-on-period changes at"}
+            for c in QA_CHECKS:
+                hit = fm.index[fm[c].to_numpy()] if not fm.empty else []
+                if len(hit):
+                    st.warning(f"{labels[c]}: {', '.join(str(p) for p in hit[:20])}{' …' if len(hit) > 20 else ''}")
+            # Rebuild the preview only when the series changed
+            key = dm.versions.get(mid, 0)
+            if mid not in figs or figs[mid][0] != key:
+                figs[mid] = (key, line_chart({metrics_def[mid].display_name: s}, "Series preview", metrics_def[mid].unit))
+            st.plotly_chart(figs[mid][1], use_container_width=True)
+
+    # SFA reconciliation at the native frequency of the inputs
     if not dm.get_series("psnd_ex").empty and not dm.get_series("psnb_ex").empty:
-        psnd_y = dm.resample_series(dm.get_series("psnd_ex"), target_freq="yearly", how="mean")
-        psnb_y = dm.resample_series(dm.get_series("psnb_ex"), target_freq="yearly", how="mean")
-        sfa = compute_sfa(psnd_y, psnb_y)
+        rec = reconcile_sfa(dm.get_series("psnd_ex"), dm.get_series("psnb_ex"), dm.get_series("gdp_nominal"))
         st.subheader("Stock-Flow Adjustment (bn)")
-        st.dataframe(sfa.to_frame().tail(15))
-        st.plotly_chart(line_chart({"SFA (bn)": sfa}, "SFA residual (ΔDebt - PSNB)", "bn_gbp"), use_container_width=True)
+        st.caption("SFA = ΔPSND − PSNB, with debt taken end-of-period and borrowing summed within each period, "
+                   "at the finest frequency both series share. Anomalies: |rolling robust z| > 4.")
+        if rec.empty:
+            st.info("PSND and PSNB do not overlap.")
+        else:
+            st.dataframe(rec.tail(15))
+            anomalies = rec.index[rec["anomaly"].to_numpy()]
+            if len(anomalies):
+                st.warning("Anomalous SFA in: " + ", ".join(str(p) for p in anomalies[-20:]))
+            st.plotly_chart(line_chart({"SFA (bn)": rec["sfa"]}, "SFA residual (ΔDebt - PSNB)", "bn_gbp"), use_container_width=True)
+            if period_freq(rec.index) != "yearly":
+                st.write("SFA by year and sub-period")
+                st.dataframe(sfa_by_period(rec, "yearly").tail(10))
+        if dm.vintages is not None:
+            sv = sfa_vintages(dm.vintages)
+            if len(sv["sfa"]) > 1:
+                st.write("SFA across data vintages (last 24 periods)")
+                st.dataframe(sv["sfa"].iloc[:, -24:])
+
+    # Data vintages and revisions
+    vs = dm.vintages
+    if vs is not None and vs.history:
+        st.subheader("Data vintages")
+        st.dataframe(vs.vintages())
+        vmid = st.selectbox("Revision triangle for", options=sorted(vs.history.keys()), key="vintage_metric")
+        # Older vintages entered at another frequency are carried to the latest one
+        how = "last" if vmid == "psnd_ex" else ("sum" if vmid in metrics_def and metrics_def[vmid].unit == "bn_gbp" else "mean")
+        tri = vs.revision_triangle(vmid, how=how)
+        if len(tri) > 1:
+            st.write("Values by vintage (rows) and period (columns), last 24 periods")
+            st.dataframe(tri.iloc[:, -24:])
+            st.write("Revisions versus previous vintage")
+            st.dataframe(vs.revisions(vmid, how=how).iloc[1:, -24:])
 
     st.success("QA complete. Proceed to Model Setup.")
 
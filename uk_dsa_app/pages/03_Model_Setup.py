@@ -3,9 +3,8 @@ import pandas as pd
 import numpy as np
 from dsa.metrics import all_metrics_definition
 from dsa.timeseries import DataManager
-from dsa.engine.calibration import compute_effective_r_from_interest_and_debt, implied_pb_ratio
-from dsa.engine.dsa_math import stock_flow_adjustment_ratio
-from dsa.config import DEFAULT_HORIZON
+from dsa.engine.calibration import inflation_at_freq, native_frequency_inputs
+from dsa.config import DEFAULT_HORIZON, MC_DEFAULTS, SUPPORTED_FREQS
 
 def init_session():
     if "metrics_def" not in st.session_state:
@@ -25,28 +24,47 @@ def page():
 
     horizon_end = st.number_input("Projection horizon end year", min_value=2026, max_value=2050, value=DEFAULT_HORIZON, step=1)
     st.session_state.model_setup["horizon_end"] = int(horizon_end)
+    model_freq = st.selectbox("Model frequency", options=list(SUPPORTED_FREQS), index=list(SUPPORTED_FREQS).index("yearly"),
+                              help="Quarterly/monthly runs use end-of-period debt, summed flows and rolling annual GDP.")
+    st.session_state.model_setup["freq"] = model_freq
 
-    # Derived baseline series (convert via timestamp then back to periods)
-    psnd = dm.resample_series(dm.get_series("psnd_ex"), target_freq="yearly", how="mean")
-    gdp = dm.resample_series(dm.get_series("gdp_nominal"), target_freq="yearly", how="mean")
-    psnb = dm.resample_series(dm.get_series("psnb_ex"), target_freq="yearly", how="mean")
-    di = dm.resample_series(dm.get_series("debt_interest"), target_freq="yearly", how="mean")
-
-    if psnd.empty or gdp.empty or psnb.empty or di.empty:
+    # Derived baseline series come from the DataManager's derivation cache;
+    # they are recomputed only when an input series changes.
+    if dm.missing_required():
         st.warning("Required core series missing. Provide PSND ex, GDP nominal, PSNB ex, and Debt Interest.")
         return
 
-    eff_r = compute_effective_r_from_interest_and_debt(di, psnd)
-    g = gdp.pct_change().rename("nominal_g")
-    pb_ratio = implied_pb_ratio(psnb, di, gdp)
-    sfa_ratio = stock_flow_adjustment_ratio(psnd, psnb, gdp)
+    if model_freq == "yearly":
+        b_ratio = dm.get_series("debt_ratio")
+        eff_r = dm.get_series("effective_r")
+        g = dm.get_series("nominal_g")
+        pb_ratio = dm.get_series("pb_ratio")
+        sfa_ratio = dm.get_series("sfa_ratio")
+    else:
+        native = native_frequency_inputs(dm.get_series("psnd_ex"), dm.get_series("psnb_ex"),
+                                         dm.get_series("debt_interest"), dm.get_series("gdp_nominal"), model_freq)
+        b_ratio, eff_r, g, pb_ratio, sfa_ratio = (native[c] for c in ["debt_ratio", "effective_r", "nominal_g", "pb_ratio", "sfa_ratio"])
 
     # Save to session
     st.session_state.model_setup["effective_r"] = eff_r
     st.session_state.model_setup["nominal_g"] = g
     st.session_state.model_setup["pb_ratio"] = pb_ratio
     st.session_state.model_setup["sfa_ratio"] = sfa_ratio
-    st.session_state.model_setup["b_ratio"] = (psnd / gdp).rename("debt_ratio")
+    st.session_state.model_setup["b_ratio"] = b_ratio
+
+    # Optional inflation input for the index-linked gilt channel
+    price_ids = [mid for mid in ("cpi", "gdp_deflator") if not dm.get_series(mid).empty]
+    if price_ids:
+        price_id = st.selectbox("Inflation measure (index-linked gilts)", options=price_ids,
+                                format_func=lambda mid: metrics[mid].display_name,
+                                help="Index-linked gilts uprate with RPI; CPI or the GDP deflator stands in for it.")
+        st.session_state.model_setup["inflation"] = inflation_at_freq(dm.get_series(price_id), model_freq)
+        il_share = st.number_input("Index-linked share of debt", min_value=0.0, max_value=1.0,
+                                   value=float(st.session_state.model_setup.get("il_share", MC_DEFAULTS.il_share)), step=0.05)
+        st.session_state.model_setup["il_share"] = float(il_share)
+    else:
+        st.session_state.model_setup.pop("inflation", None)
+        st.caption("Add CPI or the GDP deflator on the Data Ingestion page to enable the index-linked gilt channel.")
 
     st.subheader("Derived series preview")
     df_prev = pd.concat([st.session_state.model_setup["b_ratio"],
@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
+from dsa.config import PERIODS_PER_YEAR
+from dsa.timeseries import projection_index
 from dsa.engine.dsa_math import debt_dynamics, stabilize_primary_balance, fiscal_gap, interest_to_gdp
-from dsa.plotting import line_chart
+from dsa.engine.decomposition import decompose_history, cumulative_contributions, waterfall_inputs
+from dsa.plotting import line_chart, waterfall
 
 def init_session():
     if "model_setup" not in st.session_state:
@@ -22,10 +25,10 @@ def page():
     sfa_hist = ms["sfa_ratio"].dropna()
     horizon_end = int(ms["horizon_end"])
 
-    # Prepare projection dates: yearly beyond last hist year
-    last_year = int(b_hist.index.max().start_time.year) if not b_hist.empty else 2024
-    proj_years = list(range(last_year+1, horizon_end+1))
-    proj_idx = pd.period_range(start=str(proj_years[0]), end=str(proj_years[-1]), freq="Y") if proj_years else pd.PeriodIndex([], freq="Y")
+    # Prepare projection dates at the model frequency beyond the last hist period
+    freq = ms.get("freq", "yearly")
+    ppy = PERIODS_PER_YEAR[freq]
+    proj_idx = projection_index(b_hist.index.max() if not b_hist.empty else None, horizon_end, freq)
 
     # Baseline assumptions: hold last observed r,g,pb,sfa constant
     r_proj = pd.Series(r_hist.iloc[-1] if not r_hist.empty else 0.03, index=proj_idx, name="effective_r")
@@ -34,21 +37,35 @@ def page():
     sfa_proj = pd.Series(0.0, index=proj_idx, name="sfa_ratio")
 
     b0 = float(b_hist.iloc[-1]) if not b_hist.empty else 0.85
-    b_baseline = debt_dynamics(b0=b0, r=r_proj, g=g_proj, pb=pb_proj, sfa=sfa_proj)
+    b_baseline = debt_dynamics(b0=b0, r=r_proj, g=g_proj, pb=pb_proj, sfa=sfa_proj, periods_per_year=ppy)
 
     # Combine historical and baseline for charting
     b_all = pd.concat([b_hist, b_baseline])
     st.plotly_chart(line_chart({"Debt/GDP": b_all}, "Debt-to-GDP ratio baseline", "ratio"), use_container_width=True)
 
     # Debt-stabilizing PB
-    pb_star_hist = stabilize_primary_balance(b_hist, r_hist, g_hist).dropna()
-    pb_star_proj = stabilize_primary_balance(b_baseline, r_proj, g_proj)
+    pb_star_hist = stabilize_primary_balance(b_hist, r_hist, g_hist, periods_per_year=ppy).dropna()
+    pb_star_proj = stabilize_primary_balance(b_baseline, r_proj, g_proj, periods_per_year=ppy)
     st.plotly_chart(line_chart({"PB* (hist)": pb_star_hist, "PB* (proj)": pb_star_proj}, "Debt-stabilizing primary balance", "ratio"), use_container_width=True)
 
     # Fiscal gap latest
     latest_gap = (pb_hist.iloc[-1] - pb_star_hist.iloc[-1]) if not pb_star_hist.empty and not pb_hist.empty else float("nan")
     st.metric("Latest fiscal gap (pb - pb*)", f"{latest_gap:.2%}" if pd.notna(latest_gap) else "N/A")
 
+    # What drove past changes in the debt ratio
+    st.subheader("Debt-change decomposition (history)")
+    hist_dec = decompose_history(b_hist, r_hist, g_hist, pb_hist, sfa_hist, periods_per_year=ppy)
+    if hist_dec.empty:
+        st.info("Not enough overlapping history of debt, r, g and pb to decompose.")
+    else:
+        years = sorted(hist_dec["period"].unique())
+        lo, hi = st.select_slider("Window", options=years, value=(years[max(len(years) - 10, 0)], years[-1]), key="decomp_window")
+        row = cumulative_contributions(hist_dec, b_hist, start=lo, end=hi)
+        st.plotly_chart(waterfall(title=f"Change in debt ratio, {lo}–{hi}", **waterfall_inputs(row)), use_container_width=True)
+        st.caption("'Other' is the part of the observed change not explained by r − g, the primary balance and SFA "
+                   "(e.g. valuation effects or timing differences in the inputs).")
+        st.dataframe(hist_dec.pivot(index="period", columns="component", values="value").style.format("{:.4f}"), use_container_width=True)
+
     st.success("Baseline projections completed. Proceed to Stress Tests.")
 
 if __name__ == "__main__":
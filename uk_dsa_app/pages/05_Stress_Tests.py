@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
+from dsa.config import PERIODS_PER_YEAR
+from dsa.timeseries import projection_index
 from dsa.engine.dsa_math import debt_stress_response
 from dsa.engine.scenarios import DEFAULT_SCENARIOS
-from dsa.plotting import line_chart
+from dsa.engine.calibration import calibrate_var
+from dsa.engine.mc import stochastic_stress
+from dsa.engine.reverse_stress import reverse_stress
+from dsa.plotting import fan_chart, line_chart
+from dsa.results import calibration_fingerprint, get_store
 
 def init_session():
     if "model_setup" not in st.session_state:
@@ -23,9 +29,9 @@ def page():
     sfa_hist = ms["sfa_ratio"].dropna()
     horizon_end = int(ms["horizon_end"])
 
-    last_year = int(b_hist.index.max().start_time.year) if not b_hist.empty else 2024
-    proj_years = list(range(last_year+1, horizon_end+1))
-    proj_idx = pd.period_range(start=str(proj_years[0]), end=str(proj_years[-1]), freq="Y") if proj_years else pd.PeriodIndex([], freq="Y")
+    freq = ms.get("freq", "yearly")
+    ppy = PERIODS_PER_YEAR[freq]
+    proj_idx = projection_index(b_hist.index.max() if not b_hist.empty else None, horizon_end, freq)
 
     r_proj = pd.Series(r_hist.iloc[-1] if not r_hist.empty else 0.03, index=proj_idx, name="effective_r")
     g_proj = pd.Series(g_hist.iloc[-1] if not g_hist.empty else 0.04, index=proj_idx, name="nominal_g")
@@ -47,9 +53,71 @@ def page():
         sc = [s for s in DEFAULT_SCENARIOS if s.name == choice][0]
         shocks = {"r_pp": sc.r_pp, "g_pp": sc.g_pp, "pb_pp": sc.pb_pp, "sfa_ratio_pp": sc.sfa_ratio_pp}
 
-    b_stress = debt_stress_response(b0=b0, r=r_proj, g=g_proj, pb=pb_proj, sfa=sfa_proj, shocks=shocks)
+    b_stress = debt_stress_response(b0=b0, r=r_proj, g=g_proj, pb=pb_proj, sfa=sfa_proj, shocks=shocks, periods_per_year=ppy)
     st.plotly_chart(line_chart({"Baseline": pd.concat([b_hist, b_stress*0+pd.NA]).dropna(), "Stressed": pd.concat([b_hist.iloc[-1:]*0+pd.NA, b_stress]).dropna()}, f"Debt-to-GDP under {choice}", "ratio"), use_container_width=True)
 
+    # Stochastic stress: every scenario on the same simulated VAR paths
+    st.subheader("Stochastic stress tests (all scenarios)")
+    st.caption("Each scenario's shocks are added to one shared set of simulated r, g and pb paths (common random numbers), "
+               "so differences between scenarios reflect the shocks rather than simulation noise.")
+    df_hist = pd.concat([g_hist.rename("nominal_g"), r_hist.rename("effective_r"), pb_hist.rename("pb_ratio")], axis=1).dropna()
+    params = calibrate_var(df_hist, lags=1)
+    if not params:
+        st.info("Insufficient data to calibrate the VAR for stochastic stress tests.")
+    else:
+        n_paths = st.number_input("Paths", min_value=500, max_value=50000, value=5000, step=500, key="stress_paths")
+        if st.button("Run stochastic stress tests"):
+            res = stochastic_stress(b0=b0, dates=proj_idx, var_params=params,
+                                    map_columns={m: params["columns"].index(m) for m in ("nominal_g", "effective_r", "pb_ratio")},
+                                    scenarios=DEFAULT_SCENARIOS, sfa_ratio=sfa_proj, n_paths=int(n_paths),
+                                    seed=42, periods_per_year=ppy)
+            if res:
+                ms["stress_qdfs"] = res["quantiles"]
+                ms["stress_diffs"] = res["differences"]
+                defs = {sc.name: {"r_pp": sc.r_pp, "g_pp": sc.g_pp, "pb_pp": sc.pb_pp, "sfa_ratio_pp": sc.sfa_ratio_pp} for sc in DEFAULT_SCENARIOS}
+                fp = calibration_fingerprint(params, {"lags": 1})
+                try:
+                    get_store().record_runs([
+                        {"kind": "stochastic_stress", "scenario": name, "definition": defs.get(name, {}), "freq": freq,
+                         "calibration": fp, "params": {"n_paths": int(n_paths), "seed": 42, "b0": b0},
+                         "tables": {"debt_ratio": q, **({"difference": res["differences"][name]} if name in res["differences"] else {})}}
+                        for name, q in res["quantiles"].items()])
+                except Exception as e:
+                    st.warning(f"Could not save the runs: {e}")
+        if "stress_qdfs" in ms and ms["stress_qdfs"]["Baseline"].index.equals(proj_idx):
+            qd, dd = ms["stress_qdfs"], ms["stress_diffs"]
+            pick = st.selectbox("Scenario fan chart", options=[n for n in qd if n != "Baseline"], key="stress_fan")
+            st.plotly_chart(fan_chart({"Baseline": qd["Baseline"], pick: qd[pick]}, f"Debt ratio: baseline vs {pick}", "ratio"), use_container_width=True)
+            last = proj_idx[-1]
+            st.write(f"At {last}: debt ratio quantiles by scenario and the per-path increase over baseline")
+            st.dataframe(pd.DataFrame({n: {"median": q.loc[last, "50"], "p95": q.loc[last, "95"],
+                                           "Δ median": dd[n].loc[last, "50"] if n in dd else 0.0,
+                                           "Δ 5–95%": f"{dd[n].loc[last, '5']:.3f} – {dd[n].loc[last, '95']:.3f}" if n in dd else ""}
+                                       for n, q in qd.items()}).T)
+
+    # Reverse stress: smallest combined shocks that breach a debt threshold by a target year
+    st.subheader("Reverse stress test")
+    st.caption("Searches over combinations of permanent shocks (r up, g down, primary balance down) for the smallest "
+               "ones that push the debt ratio above the threshold by the target period. Shock size is measured in "
+               "pp of r / g and % of GDP of primary balance.")
+    c1, c2, c3 = st.columns(3)
+    threshold = c1.number_input("Debt threshold (ratio)", value=1.10, step=0.05, format="%.2f", key="rev_threshold")
+    by = c2.selectbox("Breach by", options=list(proj_idx), index=len(proj_idx) - 1, format_func=str, key="rev_by")
+    use = c3.multiselect("Shocked components", options=["r", "g", "pb"], default=["r", "g", "pb"], key="rev_use")
+    if use:
+        rev = reverse_stress(b0=b0, r=r_proj, g=g_proj, pb=pb_proj, sfa=sfa_proj, threshold=float(threshold), by=by,
+                             periods_per_year=ppy, active=tuple(c in use for c in ("r", "g", "pb")))
+        if rev["baseline_breach"]:
+            st.warning(f"The baseline already exceeds {threshold:.2f} by {by}.")
+        elif rev["frontier"].empty:
+            st.info("No combination within 10pp / 10% of GDP per component breaches the threshold.")
+        else:
+            mn = rev["minimal"]
+            st.write(f"Smallest breaching combination: r +{100*mn['r_pp']:.2f}pp, g {100*mn['g_pp']:.2f}pp, "
+                     f"PB {100*mn['pb_pp']:.2f}% of GDP (first breach {mn['breach_period']}).")
+            frontier = rev["frontier"].sort_values("size")
+            st.dataframe((frontier[["r_pp", "g_pp", "pb_pp"]] * 100).join(frontier[["size", "breach_period"]]).round(3))
+
     st.success("Stress test completed. Proceed to Monte Carlo.")
 
 if __name__ == "__main__":
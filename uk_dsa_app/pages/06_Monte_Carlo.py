@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
+from dsa.config import PERIODS_PER_YEAR
+from dsa.timeseries import projection_index
 import numpy as np
-from dsa.engine.calibration import calibrate_var
+from dsa.engine.calibration import calibrate_var, estimate_fiscal_reaction
 from dsa.engine.mc import mc_distribution
-from dsa.plotting import fan_chart
+from dsa.engine.risk import risk_summary
+from dsa.engine.decomposition import decompose_paths, waterfall_inputs
+from dsa.plotting import fan_chart, waterfall
+from dsa.results import calibration_fingerprint, get_store, terminal_histogram
+from dsa.config import MC_DEFAULTS
 
 def init_session():
     if "model_setup" not in st.session_state:
@@ -24,11 +30,18 @@ def page():
     sfa_hist = ms["sfa_ratio"].dropna()
     horizon_end = int(ms["horizon_end"])
 
-    last_year = int(b_hist.index.max().start_time.year) if not b_hist.empty else 2024
-    proj_years = list(range(last_year+1, horizon_end+1))
-    proj_idx = pd.period_range(start=str(proj_years[0]), end=str(proj_years[-1]), freq="Y") if proj_years else pd.PeriodIndex([], freq="Y")
+    freq = ms.get("freq", "yearly")
+    ppy = PERIODS_PER_YEAR[freq]
+    proj_idx = projection_index(b_hist.index.max() if not b_hist.empty else None, horizon_end, freq)
 
-    df_hist = pd.concat([g_hist.rename("nominal_g"), r_hist.rename("effective_r"), pb_hist.rename("pb_ratio")], axis=1).dropna()
+    il_share = 0.0
+    drivers = [g_hist.rename("nominal_g"), r_hist.rename("effective_r"), pb_hist.rename("pb_ratio")]
+    if "inflation" in ms and not ms["inflation"].dropna().empty:
+        if st.checkbox(f"Index-linked gilt channel (share {ms.get('il_share', MC_DEFAULTS.il_share):.0%})", value=True,
+                       help="Adds inflation to the VAR; the index-linked share of debt accretes inflation surprises."):
+            il_share = float(ms.get("il_share", MC_DEFAULTS.il_share))
+            drivers.append(ms["inflation"].dropna().rename("inflation"))
+    df_hist = pd.concat(drivers, axis=1).dropna()
     st.write("Historical calibration sample size:", len(df_hist))
     lag = st.slider("VAR lags", min_value=1, max_value=2, value=1, step=1)
     params = calibrate_var(df_hist, lags=lag)
@@ -38,17 +51,83 @@ def page():
 
     n_paths = st.number_input("Number of Monte Carlo paths", min_value=500, max_value=100000, value=5000, step=500)
     seed = st.number_input("Random seed", min_value=1, max_value=10_000_000, value=42, step=1)
+    dist_labels = {"Gaussian": "gaussian", "Student-t (fat tails)": "student_t", "Regime-switching (calm/crisis)": "regime"}
+    dist_choice = st.selectbox("Shock distribution", options=list(dist_labels.keys()))
+    shock_dist = dist_labels[dist_choice]
+    t_df = MC_DEFAULTS.t_df
+    regime = None
+    if shock_dist == "student_t":
+        t_df = st.number_input("Degrees of freedom", min_value=2.5, max_value=100.0, value=MC_DEFAULTS.t_df, step=0.5)
+    elif shock_dist == "regime":
+        p_enter = st.number_input("P(calm → crisis) per period", min_value=0.0, max_value=1.0, value=MC_DEFAULTS.regime_p_enter, step=0.01)
+        p_exit = st.number_input("P(crisis → calm) per period", min_value=0.01, max_value=1.0, value=MC_DEFAULTS.regime_p_exit, step=0.01)
+        crisis_scale = st.number_input("Crisis volatility multiplier", min_value=1.0, max_value=10.0, value=MC_DEFAULTS.regime_crisis_scale, step=0.1)
+        regime = {"p_enter": p_enter, "p_exit": p_exit, "crisis_scale": crisis_scale}
+    reaction = None
+    if st.checkbox("Fiscal reaction function (pb responds to lagged debt)"):
+        reaction = estimate_fiscal_reaction(pb_hist, b_hist)
+        if reaction:
+            st.write(f"Estimated pb_t = {reaction['alpha']:.4f} + {reaction['beta']:.4f} · b_(t-1) "
+                     f"(β s.e. {reaction['beta_se']:.4f}, n = {reaction['nobs']})")
+        else:
+            st.warning("Insufficient data to estimate the reaction function; running without feedback.")
+    thr_txt = st.text_input("Debt/GDP thresholds for tail risk (ratios, comma separated)", value="0.9, 1.0, 1.2")
+    try:
+        thresholds = [float(t) for t in thr_txt.replace(";", ",").split(",") if t.strip()]
+    except ValueError:
+        thresholds = []
+    if not thresholds:
+        st.warning("Thresholds must be numbers; using 0.9, 1.0, 1.2.")
+        thresholds = [0.9, 1.0, 1.2]
+    save_run = st.checkbox("Save this run to the local results store", value=True,
+                           help="Saved runs can be compared and queried on the Report and Export page.")
     if st.button("Run Monte Carlo"):
         qdfs = mc_distribution(b0=float(b_hist.iloc[-1]), dates=proj_idx, var_params=params,
-                               map_columns={"nominal_g": params["columns"].index("nominal_g"),
-                                            "effective_r": params["columns"].index("effective_r"),
-                                            "pb_ratio": params["columns"].index("pb_ratio")},
+                               map_columns={m: params["columns"].index(m) for m in params["columns"]},
                                sfa_ratio=sfa_hist.reindex(proj_idx).fillna(0.0),
-                               n_paths=int(n_paths), seed=int(seed))
+                               n_paths=int(n_paths), seed=int(seed),
+                               shock_dist=shock_dist, t_df=float(t_df), regime=regime,
+                               reaction=reaction or None, periods_per_year=ppy, keep_samples=True, return_paths=True, return_drivers=True,
+                               il_share=il_share)
         if qdfs:
+            # Sorted per-date draws, kept for percentile ranks on the OBR page
+            st.session_state.model_setup["mc_samples"] = qdfs.pop("samples")
+            paths = qdfs.pop("paths")
+            risk = risk_summary(paths, proj_idx, float(b_hist.iloc[-1]), thresholds=thresholds)
+            decomp = decompose_paths(float(b_hist.iloc[-1]), paths, qdfs.pop("drivers"),
+                                     sfa_hist.reindex(proj_idx).fillna(0.0).to_numpy(dtype=float), proj_idx,
+                                     periods_per_year=ppy, tidy=False)
+            st.session_state.model_setup["mc_decomp"] = decomp["by_quantile"]
+            if save_run:
+                try:
+                    get_store().record_run(
+                        "mc", scenario="Baseline", freq=freq,
+                        calibration=calibration_fingerprint(params, {"lags": lag}),
+                        params={"n_paths": int(n_paths), "seed": int(seed), "shock_dist": shock_dist, "t_df": float(t_df),
+                                "regime": regime, "reaction": reaction or None, "il_share": il_share, "b0": float(b_hist.iloc[-1])},
+                        tables={"debt_ratio": qdfs["debt_ratio"], "risk": risk["by_date"]},
+                        histograms={"debt_ratio": {str(proj_idx[-1]): terminal_histogram(paths)}})
+                except Exception as e:
+                    st.warning(f"Could not save the run: {e}")
+            st.session_state.model_setup["mc_risk"] = risk
             fig = fan_chart({"Debt/GDP": qdfs["debt_ratio"]}, "Debt ratio fan chart (MC)", "ratio")
             st.plotly_chart(fig, use_container_width=True)
             st.session_state.model_setup["mc_qdfs"] = qdfs
+            st.subheader("Tail risk")
+            st.caption("P(b>x): share of paths above x; VaR/ES: percentile and mean beyond it; P(b>b0): debt above today's level.")
+            st.dataframe(risk["by_date"].style.format("{:.3f}"), use_container_width=True)
+            st.write("Distribution of the first breach year")
+            st.dataframe(risk["first_breach_year"].style.format("{:.3f}"), use_container_width=True)
+            if len(risk["first_breach_year"]) < len(risk["first_breach"]):
+                with st.expander("By period"):
+                    st.dataframe(risk["first_breach"].style.format("{:.3f}"), use_container_width=True)
+            st.subheader("What drives the tails")
+            st.caption("Average cumulative contributions over the horizon for paths ending near each percentile of terminal debt.")
+            bq = decomp["by_quantile"]
+            cols = st.columns(len(bq))
+            for col, (q, row) in zip(cols, bq.iterrows()):
+                col.plotly_chart(waterfall(title=f"P{q} paths", **waterfall_inputs(row)), use_container_width=True)
+            st.dataframe(bq.style.format("{:.3f}", subset=[c for c in bq.columns if c != "n_paths"]), use_container_width=True)
             st.success("Monte Carlo completed. Proceed to OBR Comparison.")
         else:
             st.warning("Simulation failed (parameter mapping).")
@@ -1,43 +1,75 @@
 import streamlit as st
 import pandas as pd
 from dsa.io import load_obr_csv
+from dsa.metrics import all_metrics_definition
+from dsa.obr import OBRVintageStore
+from dsa.engine.mc import rank_paths
 from dsa.plotting import line_chart
 
 def page():
     st.title("OBR Comparison")
     st.write("Upload OBR projections (CSV) and map to app metrics to compare paths. Use the provided sample mapping CSV to align fields.")
-    file = st.file_uploader("Upload OBR CSV", type=["csv"])
-    if file is None:
+    if "obr_store" not in st.session_state:
+        st.session_state.obr_store = OBRVintageStore()
+    store = st.session_state.obr_store
+    files = st.file_uploader("Upload OBR CSV (one file per forecast vintage)", type=["csv"], accept_multiple_files=True)
+    for file in files or []:
+        vintage = file.name.rsplit(".", 1)[0]
+        if vintage in store.vintages():
+            continue
+        df = load_obr_csv(file.getvalue())
+        # Expect columns metric_id, year, value
+        if not {"metric_id", "year", "value"}.issubset(df.columns):
+            st.warning(f"{file.name}: CSV must include columns metric_id, year, value (or a year column followed by one column per metric).")
+            continue
+        store.add(vintage, df)
+    if not store.vintages():
         st.info("Provide OBR projections CSV. You can build it from OBR's EFO tables and adapt columns to: metric_id, year, value.")
         return
-    df = load_obr_csv(file.read())
-    st.dataframe(df.head(10))
-    # Expect columns metric_id, year, value
-    if not {"metric_id", "year", "value"}.issubset(df.columns):
-        st.warning("CSV must include columns: metric_id, year, value.")
-        return
+    st.caption("Loaded vintages: " + ", ".join(store.vintages()))
+
     # Example: metric_id values: 'debt_ratio', 'deficit_ratio', 'interest_ratio'
     st.subheader("Select metric to compare")
-    metric_choice = st.selectbox("Metric", options=sorted(df["metric_id"].unique()))
-    dfm = df[df["metric_id"] == metric_choice].copy()
-    dfm["period"] = pd.PeriodIndex(dfm["year"].astype(int), freq="Y")
-    s_obr = pd.Series(dfm["value"].values, index=dfm["period"].values, name="OBR")
+    metric_choice = st.selectbox("Metric", options=store.metrics())
+    chosen = st.multiselect("Vintages", options=store.vintages(), default=store.vintages()[-3:])
+    if not chosen:
+        return
+    # Model ratios are shares of GDP; OBR tables are usually % of GDP, so say which the upload uses
+    app_metric = st.session_state.get("metrics_def", all_metrics_definition()).get(metric_choice)
+    scale = 1.0
+    if app_metric is not None and app_metric.unit == "ratio":
+        obr_unit = st.radio("OBR values are in", options=["% of GDP", "ratio"], horizontal=True,
+                            help=f"The app's {app_metric.display_name} is a ratio; % of GDP values are divided by 100.")
+        scale = 0.01 if obr_unit == "% of GDP" else 1.0
+    paths = {v: store.path(metric_choice, v) * scale for v in chosen}
     # Compare to our baseline or MC median if available
-    s_app = None
     ms = st.session_state.get("model_setup", {})
     if metric_choice == "debt_ratio":
-        b_hist = ms.get("b_ratio", pd.Series(dtype=float))
-        b_proj = None
-        # Not stored explicitly; reconstruct baseline from last page? We'll just show hist if not present
-        s_app = b_hist
-    # If Monte Carlo median available
-    if "mc_qdfs" in ms and metric_choice == "debt_ratio":
-        qdf = ms["mc_qdfs"]["debt_ratio"]
-        s_med = qdf["50"]
-        s_med.name = "MC median"
-        st.plotly_chart(line_chart({"OBR": s_obr, "MC median": s_med}, "OBR vs App (debt ratio)", "ratio"), use_container_width=True)
-    else:
-        st.plotly_chart(line_chart({"OBR": s_obr, "App": s_app}, "OBR vs App", "value"), use_container_width=True)
+        if "mc_qdfs" in ms:
+            s_med = ms["mc_qdfs"]["debt_ratio"]["50"].rename("MC median")
+            paths["MC median"] = s_med
+        else:
+            paths["App (history)"] = ms.get("b_ratio", pd.Series(dtype=float))
+    st.plotly_chart(line_chart(paths, f"OBR vintages vs App ({metric_choice})", "value"), use_container_width=True)
+
+    if len(chosen) > 1:
+        base = st.selectbox("Difference against", options=chosen, index=0)
+        st.write(f"Revision versus {base}")
+        st.dataframe(store.differences(metric_choice, base, chosen) * scale)
+    st.dataframe(store.paths(metric_choice, chosen) * scale)
+
+    # Where each OBR forecast year sits in the simulated distribution, for all vintages at once
+    if metric_choice == "debt_ratio" and "mc_samples" in ms and "mc_qdfs" in ms:
+        table = store.paths(metric_choice) * scale
+        table.index = pd.PeriodIndex(table.index.astype(int), freq="Y")
+        ranks = rank_paths(ms["mc_samples"], ms["mc_qdfs"]["debt_ratio"].index, table).dropna(how="all")
+        if not ranks.empty:
+            st.subheader("OBR forecasts within the Monte Carlo distribution")
+            st.caption("Percentile of each OBR vintage's debt ratio among the simulated paths for that year.")
+            st.dataframe(ranks.round(1))
+            last = ranks.index[-1]
+            st.write("; ".join(f"{v}: OBR {last} debt at our {ranks.loc[last, v]:.0f}th percentile"
+                               for v in ranks.columns if pd.notna(ranks.loc[last, v])))
 
 if __name__ == "__main__":
-    page()
\ No newline at end of file
+    page()
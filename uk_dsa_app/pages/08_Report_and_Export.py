@@ -2,7 +2,11 @@ import streamlit as st
 import pandas as pd
 from dsa.report import build_html_report, html_download_bytes, _fig_to_png_bytes
 from dsa.plotting import line_chart
-from dsa.config import IMPERIAL_LOGO_PATH
+from dsa.config import FREQ_TO_PANDAS, IMPERIAL_LOGO_PATH
+from dsa.metrics import all_metrics_definition
+from dsa.workspace import workspace_to_zip_bytes, workspace_from_zip_bytes
+from dsa.results import get_store
+from dsa.plotting import fan_chart
 
 def page():
     st.title("Report and Export")
@@ -35,5 +39,55 @@ def page():
 
     st.success("Report generated.")
 
+    st.subheader("Workspace")
+    st.write("Save all ingested series, model setup and Monte Carlo outputs as a columnar (Arrow) bundle, or reopen a saved one.")
+    if "dm" in st.session_state and st.button("Prepare workspace bundle"):
+        st.session_state.workspace_zip = workspace_to_zip_bytes(st.session_state.dm, ms)
+    if st.session_state.get("workspace_zip"):
+        st.download_button("Download workspace (.zip)", data=st.session_state.workspace_zip, file_name="uk_dsa_workspace.zip", mime="application/zip")
+    ws_file = st.file_uploader("Open workspace (.zip)", type=["zip"], key="workspace_upload")
+    if ws_file is not None and st.button("Load workspace"):
+        metrics_def = st.session_state.get("metrics_def") or all_metrics_definition()
+        dm, model_setup = workspace_from_zip_bytes(ws_file.read(), metrics_def)
+        st.session_state.metrics_def = metrics_def
+        st.session_state.dm = dm
+        st.session_state.model_setup = model_setup
+        st.success(f"Workspace loaded: {len(dm.available_metrics())} series.")
+
+    st.subheader("Saved runs")
+    st.write("Monte Carlo and stochastic stress runs saved in the local results store.")
+    try:
+        store = get_store()
+        catalogue = store.runs()
+    except Exception as e:
+        st.warning(f"Results store unavailable: {e}")
+        return
+    if catalogue.empty:
+        st.info("No saved runs yet.")
+        return
+    c1, c2, c3 = st.columns(3)
+    thr = c1.number_input("Debt threshold", value=1.0, step=0.1, format="%.2f", key="runs_thr")
+    prob = c2.number_input("Minimum P(debt > threshold)", min_value=0.0, max_value=1.0, value=0.2, step=0.05, key="runs_prob")
+    only = c3.checkbox("Only runs above the probability", value=False, key="runs_only")
+    if only:
+        catalogue = store.runs_breaching(float(thr), float(prob))
+        st.caption("value: highest P(debt > threshold) in the run; first_date: first date above the probability. "
+                   "Only Monte Carlo runs save tail-risk tables, with the thresholds chosen when they ran.")
+    st.dataframe(catalogue, use_container_width=True)
+    picked = st.multiselect("Compare runs (median and 5–95% band)", options=list(catalogue.index), key="runs_pick",
+                            format_func=lambda i: f"#{i} {catalogue.loc[i, 'kind']} {catalogue.loc[i, 'scenario'] or ''} {catalogue.loc[i, 'created']}")
+    if picked:
+        qdfs = {}
+        for rid in picked:
+            q = store.table(rid, "debt_ratio")
+            if not q.empty:
+                q.index = pd.PeriodIndex(q.index, freq=FREQ_TO_PANDAS.get(catalogue.loc[rid, "freq"]) or pd.Period(q.index[0]).freqstr)
+                qdfs[f"#{rid}"] = q
+        if qdfs:
+            st.plotly_chart(fan_chart(qdfs, "Saved runs: debt ratio", "ratio"), use_container_width=True)
+        if len(picked) == 1 and st.button("Delete this run", key="runs_delete"):
+            store.delete_run(picked[0])
+            st.success(f"Run #{picked[0]} deleted.")
+
 if __name__ == "__main__":
     page()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+def test_decomposition_adds_up_for_history_and_paths():
+    from dsa.engine.decomposition import COMPONENTS, cumulative_contributions, decompose_history, decompose_paths
+    from dsa.engine.mc import debt_paths
+    rng = np.random.default_rng(1)
+    dates = pd.period_range("2025Q1", periods=12, freq="Q")
+    r = 0.03 + 0.01 * rng.standard_normal((500, 12))
+    g = 0.04 + 0.01 * rng.standard_normal((500, 12))
+    pb = -0.002 + 0.001 * rng.standard_normal((500, 12))
+    sfa = np.full(12, 0.001)
+    paths = debt_paths(0.9, r, g, pb, sfa, periods_per_year=4)
+    out = decompose_paths(0.9, paths, {"effective_r": r, "nominal_g": g, "pb_ratio": pb}, sfa, dates, periods_per_year=4)
+    table = out["table"]
+    assert set(table["period"]) == {"2025", "2026", "2027"} and len(table) == 500 * 3 * 5
+    assert np.abs(table.loc[table["component"] == "residual", "value"]).max() < 1e-12
+    change = table[table["component"] == "change"].groupby("path")["value"].sum().to_numpy()
+    assert np.allclose(change, paths[:, -1] - 0.9)
+    bq = out["by_quantile"]
+    assert np.allclose(bq["start"] + bq[list(COMPONENTS)].sum(axis=1), bq["end"])
+    assert bq.loc["5", "end"] < bq.loc["50", "end"] < bq.loc["95", "end"]
+    # History: the identity holds exactly for data generated by it, so the residual is zero
+    b = pd.Series(paths[0], index=dates)
+    hist = decompose_history(b, pd.Series(r[0], index=dates), pd.Series(g[0], index=dates), pd.Series(pb[0], index=dates),
+                             pd.Series(sfa, index=dates), periods_per_year=4)
+    row = cumulative_contributions(hist, b)
+    assert abs(row["residual"]) < 1e-12 and np.isclose(row["end"], paths[0, -1]) and np.isclose(row["start"], paths[0, 0])
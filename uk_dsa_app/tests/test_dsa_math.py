@@ -16,4 +16,24 @@ def test_pb_stabilizing_signs():
     r = pd.Series([0.03, 0.03, 0.03], index=idx)
     g = pd.Series([0.02, 0.02, 0.02], index=idx)
     pb_star = stabilize_primary_balance(b, r, g)
-    assert (pb_star > 0).all()
\ No newline at end of file
+    assert (pb_star > 0).all()
+
+def test_quarterly_dynamics_match_yearly_with_deannualized_rates():
+    yidx = pd.period_range(start="2025", periods=4, freq="Y")
+    qidx = pd.period_range(start="2025Q1", periods=16, freq="Q")
+    b_y = debt_dynamics(b0=0.9, r=pd.Series(0.04, index=yidx), g=pd.Series(0.03, index=yidx), pb=pd.Series(0.0, index=yidx))
+    b_q = debt_dynamics(b0=0.9, r=pd.Series(0.04, index=qidx), g=pd.Series(0.03, index=qidx), pb=pd.Series(0.0, index=qidx),
+                        periods_per_year=4)
+    assert np.allclose(b_q.iloc[3::4].values, b_y.values)
+
+def test_index_linked_dynamics_with_historical_inflation_only():
+    import pytest
+    idx = pd.period_range(start="2026", periods=5, freq="Y")
+    r, g, pb = pd.Series(0.04, index=idx), pd.Series(0.03, index=idx), pd.Series(0.0, index=idx)
+    hist_cpi = pd.Series([0.02, 0.08], index=pd.period_range("2023", periods=2, freq="Y"))
+    linked = debt_dynamics(0.9, r, g, pb, il_share=0.25, inflation=hist_cpi)
+    # The last observed rate is carried forward, so there is no surprise and the path is the conventional one
+    assert np.isfinite(linked).all()
+    assert np.allclose(linked, debt_dynamics(0.9, r, g, pb))
+    with pytest.raises(ValueError, match="no observations"):
+        debt_dynamics(0.9, r, g, pb, il_share=0.25, inflation=pd.Series(np.nan, index=idx))
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+def test_stream_csv_aggregates_across_chunks():
+    from dsa.io import stream_csv_to_freq
+    days = pd.date_range("2020-01-01", "2020-06-30", freq="D")
+    csv = pd.DataFrame({"date": days.strftime("%Y-%m-%d"), "yield": np.arange(len(days), dtype=float)}).to_csv(index=False).encode()
+    ref = pd.Series(np.arange(len(days), dtype=float), index=days.to_period("M")).groupby(level=0).mean()
+    for engine in ("pandas", "pyarrow"):
+        s = stream_csv_to_freq(csv, "monthly", how="mean", chunksize=40, engine=engine)
+        assert s.index.equals(ref.index)
+        assert np.allclose(s.values, ref.values)
+
+def test_stream_csv_sum_drops_incomplete_periods():
+    from dsa.io import stream_csv_to_freq
+    q = pd.period_range("2019Q2", "2021Q3", freq="Q")
+    csv = pd.DataFrame({"period": q.astype(str), "psnb": np.ones(len(q))}).to_csv(index=False).encode()
+    for engine in ("pandas", "pyarrow"):
+        s = stream_csv_to_freq(csv, "yearly", how="sum", chunksize=3, engine=engine)
+        assert list(s.index.astype(str)) == ["2020"] and s.iloc[0] == 4.0
+        assert len(stream_csv_to_freq(csv, "yearly", how="last", engine=engine)) == 3
+
+def test_paste_tokenizer_delimiters_bad_rows_and_cache():
+    from dsa.io import parse_pasted_two_column, normalize_index_to_freq
+    text = "2019\t1,234.5\n2020\t12\n2021\tn/a\n"
+    s, bad = parse_pasted_two_column(text, return_bad=True)
+    assert s.tolist() == [1234.5, 12.0]
+    assert bad.tolist() == [False, False, True]
+    assert parse_pasted_two_column("2019, 1.5\n2020, 2").tolist() == [1.5, 2.0]
+    # Cached parses are handed out as fresh objects, so normalizing one does not leak into the next
+    normalize_index_to_freq(parse_pasted_two_column(text), "yearly")
+    assert list(parse_pasted_two_column(text).index) == ["2019", "2020"]
+
+def test_excel_discovery_and_pruned_read():
+    import io
+    from dsa.io import excel_sheets, excel_columns, read_excel_uploaded
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf) as w:
+        pd.DataFrame({"note": ["x"]}).to_excel(w, sheet_name="cover", index=False)
+        pd.DataFrame({"year": [2019, 2020], "other": ["a", "b"], "psnb": [50.0, 300.0]}).to_excel(w, sheet_name="data", index=False)
+    data = buf.getvalue()
+    assert excel_sheets(data) == ["cover", "data"]
+    assert excel_columns(data, "data") == ["year", "other", "psnb"]
+    s = read_excel_uploaded(data, sheet_name="data", index_col="year", value_col="psnb")
+    assert list(s.index) == [2019, 2020] and s.tolist() == [50.0, 300.0]
+    s.index = ["a", "b"]
+    assert list(read_excel_uploaded(data, sheet_name="data", index_col="year", value_col="psnb").index) == [2019, 2020]
+
+def test_bulk_template_and_add_many():
+    import os
+    from dsa.io import read_bulk_template
+    from dsa.metrics import all_metrics_definition
+    from dsa.timeseries import DataManager
+    path = os.path.join(os.path.dirname(__file__), "..", "sample_data", "example_metrics_template.csv")
+    with open(path, "rb") as f:
+        batch, unmapped = read_bulk_template(f.read(), "template.csv")
+    assert unmapped == []
+    assert batch["cpi"]["freq"] == "monthly"
+    assert batch["gdp_nominal"]["series"].index.freqstr.startswith("Y")
+    dm = DataManager(all_metrics_definition())
+    assert set(dm.add_many(batch)) == set(batch)
+    assert dm.add_many(batch) == []
+    bad = {"gdp_nominal": dict(batch["gdp_nominal"], freq="monthly")}
+    with pytest.raises(ValueError, match="gdp_nominal"):
+        dm.add_many(bad)
+
+def test_guess_frequency_tolerates_stray_labels():
+    from dsa.io import guess_frequency_from_series
+    q = [f"{y} Q{i}" for y in range(2015, 2020) for i in range(1, 5)]
+    assert guess_frequency_from_series(pd.Series(1.0, index=q + ["Total", "Source: ONS"])) == "quarterly"
+    assert guess_frequency_from_series(pd.Series(1.0, index=["2019", "2020", "2021", "note"])) == "yearly"
+    assert guess_frequency_from_series(pd.Series(1.0, index=["2019 JAN", "2019 FEB", "2019 MAR"])) == "monthly"
+
+def test_bulk_template_drops_stray_rows_per_metric():
+    from dsa.io import read_bulk_template
+    csv = "year,Nominal GDP,psnb_ex\n2019,2200,40\n2020,2100,300\nTotal,4300,340\n"
+    batch, unmapped = read_bulk_template(csv.encode(), "wide.csv")
+    assert unmapped == []
+    assert batch["gdp_nominal"]["series"].tolist() == [2200.0, 2100.0]
+    assert batch["gdp_nominal"]["freq"] == "yearly" and batch["psnb_ex"]["dropped"] == ["Total"]
+
+def test_bulk_workbook_with_one_sheet_per_metric():
+    import io
+    from dsa.io import read_bulk_template
+    from dsa.metrics import all_metrics_definition
+    from dsa.timeseries import DataManager
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf) as w:
+        pd.DataFrame({"quarter": ["2020 Q1", "2020 Q2", "Source: ONS"], "£bn": [540.0, 480.0, None]}).to_excel(w, sheet_name="gdp_nominal", index=False)
+        pd.DataFrame({"year": [2019, 2020], "PSNB ex (net borrowing)": [40.0, 300.0]}).to_excel(w, sheet_name="psnb_ex", index=False)
+        pd.DataFrame({"year": [2019, 2020]}).to_excel(w, sheet_name="psnd_ex", index=False)
+    batch, unmapped = read_bulk_template(buf.getvalue(), "book.xlsx")
+    assert unmapped == []
+    assert batch["gdp_nominal"]["freq"] == "quarterly" and batch["gdp_nominal"]["series"].tolist() == [540.0, 480.0]
+    assert batch["psnb_ex"]["series"].tolist() == [40.0, 300.0]
+    # A metric sheet without values is reported by validation rather than skipped
+    with pytest.raises(ValueError, match="psnd_ex: no observations"):
+        DataManager(all_metrics_definition()).add_many(batch)
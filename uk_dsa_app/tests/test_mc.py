@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from dsa.engine.mc import draw_shocks, simulate_var_paths
+
+def test_shock_distributions_match_target_covariance():
+    Sigma = np.array([[0.0004, 0.0001], [0.0001, 0.0009]])
+    rng = np.random.default_rng(0)
+    for dist in ("gaussian", "student_t"):
+        eps = draw_shocks(Sigma, n_steps=50, n_paths=4000, rng=rng, dist=dist, t_df=6.0)
+        cov = np.cov(eps.reshape(-1, 2), rowvar=False)
+        assert np.allclose(cov, Sigma, rtol=0.1, atol=2e-5)
+
+def test_regime_shocks_fatter_than_gaussian():
+    Sigma = np.eye(2) * 0.01
+    gauss = draw_shocks(Sigma, 20, 2000, np.random.default_rng(1))
+    reg = draw_shocks(Sigma, 20, 2000, np.random.default_rng(1), dist="regime",
+                      regime={"p_enter": 0.2, "p_exit": 0.2, "crisis_scale": 3.0})
+    assert reg.std() > gauss.std()
+
+def test_simulate_var_paths_shape():
+    A = np.eye(3) * 0.5
+    c = np.zeros(3)
+    paths = simulate_var_paths(A, c, np.eye(3) * 0.01, np.zeros(3), n_steps=7, n_paths=11, shock_dist="student_t")
+    assert paths.shape == (11, 7, 3)
+
+def test_reaction_function_narrows_debt_distribution():
+    import pandas as pd
+    from dsa.engine.mc import mc_distribution
+    params = {"A": np.eye(3) * 0.5, "c": np.array([0.02, 0.02, 0.0]),
+              "Sigma": np.eye(3) * 1e-4, "columns": ["nominal_g", "effective_r", "pb_ratio"]}
+    dates = pd.period_range("2025", periods=30, freq="Y")
+    cols = {"nominal_g": 0, "effective_r": 1, "pb_ratio": 2}
+    free = mc_distribution(0.9, dates, params, cols, n_paths=2000)["debt_ratio"]
+    fed = mc_distribution(0.9, dates, params, cols, n_paths=2000,
+                          reaction={"alpha": -0.045, "beta": 0.05})["debt_ratio"]
+    assert (fed["95"] - fed["5"]).iloc[-1] < (free["95"] - free["5"]).iloc[-1]
+
+def test_percentile_rank_matches_brute_force():
+    from dsa.engine.mc import percentile_rank, rank_paths
+    rng = np.random.default_rng(3)
+    samples = np.sort(rng.normal(size=(6, 400)) + np.arange(6)[:, None], axis=1)
+    values = rng.normal(size=(3, 6)) + np.arange(6)
+    values[0, 2] = samples[2, 100]
+    brute = np.array([[50.0 * ((samples[t] < v).sum() + (samples[t] <= v).sum()) / 400 for t, v in enumerate(row)] for row in values])
+    assert np.allclose(percentile_rank(samples, values), brute)
+    dates = pd.period_range("2025Q1", periods=6, freq="Q")
+    paths = pd.DataFrame({"obr": [values[1, 3]]}, index=pd.PeriodIndex(["2025"], freq="Y"))
+    assert np.isclose(rank_paths(samples, dates, paths).iloc[0, 0], brute[1, 3])
+
+def test_stochastic_stress_shares_random_numbers_with_baseline():
+    from dsa.engine.mc import mc_distribution, stochastic_stress
+    from dsa.engine.scenarios import DEFAULT_SCENARIOS
+    vp = {"A": np.eye(3) * 0.5, "c": np.array([0.02, 0.015, 0.0]), "Sigma": np.diag([4e-4, 2e-4, 1e-4]),
+          "columns": ["nominal_g", "effective_r", "pb_ratio"]}
+    cols = {"nominal_g": 0, "effective_r": 1, "pb_ratio": 2}
+    dates = pd.period_range("2025", periods=10, freq="Y")
+    out = stochastic_stress(0.95, dates, vp, cols, DEFAULT_SCENARIOS, n_paths=2000)
+    base = mc_distribution(0.95, dates, vp, cols, n_paths=2000)["debt_ratio"]
+    assert np.allclose(out["quantiles"]["Baseline"].to_numpy(), base.to_numpy())
+    # A pb shock shifts every path by the same deterministic amount at t=1
+    pb = out["differences"]["Primary -1% GDP"].iloc[0]
+    assert np.allclose(pb.to_numpy(), 0.01)
+    assert set(out["quantiles"]) == {"Baseline"} | {sc.name for sc in DEFAULT_SCENARIOS}
+
+def test_index_linked_channel_only_moves_debt_on_inflation_surprises():
+    from dsa.engine.dsa_math import debt_dynamics
+    from dsa.engine.mc import debt_paths
+    idx = pd.period_range("2025", periods=8, freq="Y")
+    r, g, pb = pd.Series(0.03, index=idx), pd.Series(0.04, index=idx), pd.Series(-0.01, index=idx)
+    base = debt_dynamics(0.9, r, g, pb)
+    assert np.allclose(debt_dynamics(0.9, r, g, pb, il_share=0.25, inflation=pd.Series(0.02, index=idx)), base)
+    hot = debt_dynamics(0.9, r, g, pb, il_share=0.25, inflation=pd.Series(0.05, index=idx),
+                        inflation_expected=pd.Series(0.02, index=idx))
+    assert (hot > base).all()
+    # Paths: same answer per path as the deterministic engine, on quarterly steps
+    rng = np.random.default_rng(3)
+    R = 0.03 + 0.005 * rng.standard_normal((50, 8))
+    G = 0.04 + 0.005 * rng.standard_normal((50, 8))
+    PB = np.full((50, 8), -0.0025)
+    S = 0.01 * rng.standard_normal((50, 8))
+    paths = debt_paths(0.9, R, G, PB, np.zeros(8), periods_per_year=4, il_share=0.25, inflation_surprise=S)
+    one = debt_dynamics(0.9, pd.Series(R[7], index=idx), pd.Series(G[7], index=idx), pd.Series(PB[7], index=idx),
+                        periods_per_year=4, il_share=0.25, inflation=pd.Series(S[7], index=idx),
+                        inflation_expected=pd.Series(0.0, index=idx))
+    assert np.allclose(paths[7], one.to_numpy())
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+def test_tidy_wide_with_mask_and_vintage_store():
+    from dsa.obr import OBRVintageStore, tidy_obr_projection
+    wide = pd.DataFrame({"year": [2024, 2025, 2026], "debt_ratio": ["97.1", "n/a", "98.4"], "deficit_ratio": [4.5, 3.9, None]})
+    tidy, mask = tidy_obr_projection(wide, year_col="year", return_mask=True)
+    assert len(tidy) == 4
+    assert mask.loc[2025, "debt_ratio"] and not mask.loc[2026, "deficit_ratio"]
+    store = OBRVintageStore()
+    store.add("Mar24", tidy)
+    store.add("Nov24", tidy.assign(value=tidy["value"] + 1.0))
+    assert store.vintages() == ["Mar24", "Nov24"]
+    diff = store.differences("debt_ratio", "Mar24")
+    assert np.allclose(diff["Nov24"].to_numpy(), 1.0)
+    assert str(store.path("debt_ratio", "Nov24").index[-1]) == "2026"
+
+def test_tidy_fiscal_year_labels_and_year_failures():
+    from dsa.io import load_obr_csv
+    from dsa.obr import parse_years, tidy_obr_projection
+    assert parse_years(pd.Series(["2024-25", "2099/2100", "FY2025-26", "2024", "2024-26", "Total"])).tolist()[:4] == [2024, 2099, 2025, 2024]
+    assert parse_years(pd.Series(["2024-26", "Total"])).isna().all()
+    efo = pd.DataFrame({"Fiscal year": ["2023-24", "2024-25", "2025-26", "Memo: average"],
+                        "debt_ratio": ["97.9", "98.6", "98.8", "98.4"]})
+    tidy, mask = tidy_obr_projection(efo, year_col="Fiscal year", return_mask=True)
+    assert tidy["year"].tolist() == [2023, 2024, 2025]
+    assert mask["debt_ratio"].tolist() == [False, False, False, True]
+    long = pd.DataFrame({"metric_id": ["debt_ratio"] * 2, "year": ["2024-25", "n/a"], "value": [98.6, 99.0]})
+    tidy, mask = tidy_obr_projection(long, return_mask=True)
+    assert tidy["year"].tolist() == [2024] and mask["value"].tolist() == [False, True]
+    assert load_obr_csv(efo.to_csv(index=False).encode())["year"].tolist() == [2023, 2024, 2025]
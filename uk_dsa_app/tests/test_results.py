@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+def test_results_store_roundtrip_and_breach_query(tmp_path):
+    from dsa.engine.risk import risk_summary
+    from dsa.results import ResultsStore, terminal_histogram
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    dates = pd.period_range("2025", periods=6, freq="Y")
+    rng = np.random.default_rng(0)
+    runs = []
+    for drift in (0.0, 0.03):
+        paths = 0.95 + np.cumsum(drift + 0.02 * rng.standard_normal((1000, 6)), axis=1)
+        q = pd.DataFrame(np.percentile(paths, [5, 50, 95], axis=0).T, index=dates, columns=["5", "50", "95"])
+        runs.append({"kind": "mc", "scenario": "Baseline", "definition": {"r_pp": drift}, "params": {"drift": drift},
+                     "tables": {"debt_ratio": q, "risk": risk_summary(paths, dates, 0.95, thresholds=(1.0,))["by_date"]},
+                     "histograms": {"debt_ratio": {"2030": terminal_histogram(paths, bins=20)}}})
+    calm, hot = store.record_runs(runs)
+    assert np.allclose(store.table(calm, "debt_ratio").to_numpy(), runs[0]["tables"]["debt_ratio"].to_numpy())
+    edges, counts = store.histogram(hot, "debt_ratio", "2030")
+    assert len(edges) == 21 and counts.sum() == 1000
+    hits = store.runs_breaching(1.0, 0.2)
+    assert list(hits.index) == [hot]
+    assert hits.loc[hot, "value"] > 0.2 and len(store.runs_breaching(1.0, 0.2, date="2025")) == 0
+    assert len(store.runs(scenario="Baseline")) == 2
+    store.delete_run(hot)
+    assert store.runs_breaching(1.0, 0.2).empty and store.histogram(hot, "debt_ratio", "2030") is None
+    store.close()
+
+def test_results_store_default_path_and_threaded_reads(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from dsa.results import ResultsStore, default_results_path
+    monkeypatch.delenv("DSA_RESULTS_DB", raising=False)
+    monkeypatch.setenv("DSA_DATA_DIR", str(tmp_path / "data"))
+    assert default_results_path() == str(tmp_path / "data" / "results.sqlite")
+    store = ResultsStore()
+    table = pd.DataFrame({"50": np.linspace(0.9, 1.0, 5)}, index=pd.period_range("2025", periods=5, freq="Y").astype(str))
+
+    def work(i):
+        rid = store.record_run("mc", label=str(i), tables={"debt_ratio": table})
+        return store.table(rid, "debt_ratio").equals(table) and rid in store.runs("mc").index
+
+    with ThreadPoolExecutor(8) as ex:
+        assert all(ex.map(work, range(40)))
+    assert len(store.runs()) == 40
+    store.close()
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+def test_reverse_stress_frontier_breaches_exactly_and_is_minimal():
+    from dsa.engine.dsa_math import debt_stress_response
+    from dsa.engine.reverse_stress import reverse_stress
+    idx = pd.period_range("2025", periods=10, freq="Y")
+    r, g, pb = pd.Series(0.035, index=idx), pd.Series(0.04, index=idx), pd.Series(-0.01, index=idx)
+    out = reverse_stress(0.95, r, g, pb, None, 1.10, by=pd.Period("2030", "Y"))
+    fr = out["frontier"]
+    assert not out["baseline_breach"] and len(fr) > 10
+    for _, row in fr.iterrows():
+        shocks = {"r_pp": row["r_pp"], "g_pp": row["g_pp"], "pb_pp": row["pb_pp"], "sfa_ratio_pp": 0.0}
+        b = debt_stress_response(0.95, r, g, pb, pd.Series(0.0, index=idx), shocks)
+        assert abs(b.loc[:"2030"].max() - 1.10) < 1e-6
+    # Scaling the smallest shock down by 1% no longer breaches
+    mn = out["minimal"]
+    small = {"r_pp": 0.99 * mn["r_pp"], "g_pp": 0.99 * mn["g_pp"], "pb_pp": 0.99 * mn["pb_pp"], "sfa_ratio_pp": 0.0}
+    assert debt_stress_response(0.95, r, g, pb, pd.Series(0.0, index=idx), small).loc[:"2030"].max() < 1.10
+    again = reverse_stress(0.95, r, g, pb, None, 1.10, by=pd.Period("2030", "Y"))
+    assert again["frontier"].equals(fr)
+    again["frontier"].loc[:, "size"] = 0.0
+    assert reverse_stress(0.95, r, g, pb, None, 1.10, by=pd.Period("2030", "Y"))["frontier"].equals(fr)
+    # Same values on later dates: a new cache entry with later breach periods
+    later = [s.set_axis(idx + 5) for s in (r, g, pb)]
+    shifted = reverse_stress(0.95, *later, None, 1.10, by=pd.Period("2035", "Y"))
+    assert shifted["minimal"]["breach_period"] == str(pd.Period(mn["breach_period"], "Y") + 5)
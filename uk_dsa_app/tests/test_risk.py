@@ -0,0 +1,47 @@
+import numpy as np
+
+def test_risk_metrics_match_sorting_and_streaming():
+    from dsa.engine.risk import RiskAccumulator, breach_probabilities, first_breach, prob_above_start, var_es
+    rng = np.random.default_rng(0)
+    paths = 1.0 + np.cumsum(0.03 * rng.standard_normal((4000, 8)), axis=1)
+    tails = var_es(paths, (95,))[95]
+    top = np.sort(paths, axis=0)[-200:]
+    assert np.allclose(tails["var"], top[0]) and np.allclose(tails["es"], top.mean(axis=0))
+    fb = first_breach(paths, 1.05)
+    loop = np.array([np.argmax(p > 1.05) if (p > 1.05).any() else -1 for p in paths])
+    assert np.allclose(fb["first"], np.bincount(loop[loop >= 0], minlength=8) / 4000)
+    assert np.isclose(fb["never"], (loop < 0).mean())
+    assert np.allclose(fb["cumulative"][-1], 1 - fb["never"])
+    acc = RiskAccumulator(8, 4000, 1.0, [1.05], levels=(95,))
+    for batch in np.array_split(paths, 5):
+        acc.update(batch)
+    res = acc.result()
+    assert np.allclose(res["breach"], breach_probabilities(paths, [1.05]))
+    assert np.allclose(res["tails"][95]["es"], tails["es"])
+    assert np.allclose(res["above_start"], prob_above_start(paths, 1.0))
+
+def test_risk_with_no_thresholds_and_no_paths():
+    import pandas as pd
+    from dsa.engine.risk import RiskAccumulator, breach_probabilities, risk_summary
+    paths = np.linspace(0.8, 1.2, 30).reshape(10, 3)
+    assert breach_probabilities(paths, []).shape == (3, 0)
+    res = risk_summary(paths, pd.period_range("2025", periods=3, freq="Y"), 1.0, thresholds=[])
+    assert not any(c.startswith("P(b>0") or c.startswith("P(b>1") for c in res["by_date"].columns)
+    assert res["first_breach"].shape == (4, 0)
+    empty = RiskAccumulator(3, 10, 1.0, [1.0]).result()
+    assert np.isnan(empty["breach"]).all() and np.isnan(empty["tails"][95]["var"]).all()
+
+def test_first_breach_year_sums_sub_annual_periods():
+    import pandas as pd
+    from dsa.engine.risk import risk_summary
+    rng = np.random.default_rng(1)
+    paths = 1.0 + np.cumsum(0.02 * rng.standard_normal((2000, 10)), axis=1)
+    dates = pd.period_range("2025Q3", periods=10, freq="Q")
+    res = risk_summary(paths, dates, 1.0, thresholds=[1.05])
+    fy = res["first_breach_year"]
+    assert list(fy.index) == ["2025", "2026", "2027", "never"]
+    per = res["first_breach"]["1.05"]
+    assert np.isclose(fy.loc["2026", "1.05"], per.loc[["2026Q1", "2026Q2", "2026Q3", "2026Q4"]].sum())
+    assert np.isclose(fy["1.05"].sum(), 1.0)
+    yearly = risk_summary(paths, pd.period_range("2025", periods=10, freq="Y"), 1.0, thresholds=[1.05])
+    assert np.allclose(yearly["first_breach_year"].to_numpy(), yearly["first_breach"].to_numpy())
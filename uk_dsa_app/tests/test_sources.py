@@ -0,0 +1,84 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pandas as pd
+
+ONS_CSV = (
+    '"Title","Gross Domestic Product at market prices: Current price: Seasonally adjusted £m"\n'
+    '"CDID","YBHA"\n"Unit","£m"\n"Release date","01-01-2025"\n'
+    '"2019","2,200,000"\n"2020","2,100,000"\n"2020 Q1","540,000"\n"2020 Q2","480,000"\n'
+)
+ONS_JSON = {"description": {"cdid": "D7BT", "title": "CPI INDEX 00"},
+            "years": [{"date": "2020", "value": "108.7"}],
+            "months": [{"date": "2020 JAN", "value": "108.2"}, {"date": "2020 FEB", "value": "108.6"}]}
+
+def _write_files(d):
+    (d / "YBHA.csv").write_text(ONS_CSV)
+    (d / "D7BT.json").write_text(json.dumps(ONS_JSON))
+
+def test_ons_directory_source_maps_scales_and_caches(tmp_path):
+    from dsa.sources import DataSource, ResponseCache, fetch_ons_series
+    data = tmp_path / "ons"
+    data.mkdir()
+    _write_files(data)
+    src = DataSource(str(data), cache=ResponseCache(str(tmp_path / "cache")))
+    batch, errors = fetch_ons_series(src, freqs={"gdp_nominal": "quarterly", "cpi": "monthly"})
+    assert set(batch) == {"gdp_nominal", "cpi"} and set(errors) == {"J5II", "HF6W", "YBGB"}
+    assert batch["gdp_nominal"]["series"].tolist() == [540.0, 480.0]
+    assert str(batch["cpi"]["series"].index[-1]) == "2020-02"
+    again, _ = fetch_ons_series(src, freqs={"gdp_nominal": "quarterly", "cpi": "monthly"})
+    assert all(item["from_cache"] for item in again.values())
+
+def test_http_source_uses_etag(tmp_path):
+    from dsa.sources import DataSource, ResponseCache
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = ONS_CSV.encode()
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        src = DataSource(f"http://127.0.0.1:{server.server_port}", cache=ResponseCache(str(tmp_path)))
+        first = src.fetch("YBHA.csv")
+        second = src.fetch("YBHA.csv")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert hits == [None, '"v1"']
+    assert not first.from_cache and second.from_cache and second.body == first.body
+
+def test_refresh_from_ons_with_alternative_psnd_series(tmp_path):
+    from dsa.metrics import all_metrics_definition
+    from dsa.sources import DataSource, refresh_from_ons
+    from dsa.timeseries import DataManager
+    _write_files(tmp_path)
+    (tmp_path / "PSNX.csv").write_text(ONS_CSV.replace("YBHA", "PSNX").replace("Gross Domestic Product", "Net debt"))
+    dm = DataManager(all_metrics_definition())
+    changed, errors = refresh_from_ons(dm, DataSource(str(tmp_path)), cdids={"psnd_ex": "PSNX"})
+    assert "psnd_ex" in changed and "HF6W" not in errors and "PSNX" not in errors
+    assert dm.get_series("psnd_ex").tolist() == [2200.0, 2100.0]
+    # Vintages carry the ONS release date (CSV) rather than the fetch time
+    assert dm.vintages.select("psnd_ex").timestamp == pd.Timestamp("2025-01-01")
+
+def test_debt_interest_coverage_is_reported():
+    from dsa.metrics import all_metrics_definition
+    from dsa.sources import ons_series_for, unmapped_required
+    metrics_def = all_metrics_definition()
+    assert unmapped_required(metrics_def) == ["debt_interest"]
+    assert unmapped_required(metrics_def, {"debt_interest": "ABCD"}) == []
+    assert ons_series_for({"debt_interest": "ABCD"})["ABCD"] == ("debt_interest", 1e-3)
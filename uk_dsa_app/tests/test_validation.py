@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+def test_run_qa_flags_local_break_gap_and_bounds():
+    from dsa.metrics import all_metrics_definition
+    from dsa.timeseries import DataManager
+    from dsa.validation import run_qa
+    rng = np.random.default_rng(0)
+    dm = DataManager(all_metrics_definition())
+    years = [str(y) for y in range(1970, 2024)]
+    gdp = pd.Series(500 * np.cumprod(1.05 + 0.02 * rng.standard_normal(len(years))), index=years)
+    gdp.iloc[40:] *= 1.4
+    dm.add_series("gdp_nominal", gdp, "bn_gbp", "yearly")
+    months = pd.period_range("2010-01", "2015-12", freq="M").astype(str)
+    cpi = pd.Series(100 + 0.2 * np.arange(len(months)), index=months)
+    cpi.iloc[30] = -1.0
+    dm.set_user_freq("cpi", "monthly")
+    dm.add_series("cpi", cpi.drop(cpi.index[50]), "index_2015_100", "monthly")
+    qa = run_qa(dm)
+    summary = qa["summary"].set_index("metric_id")
+    assert summary.loc["gdp_nominal", "jump"] >= 1 and summary.loc["gdp_nominal", "bounds"] == 0
+    assert summary.loc["cpi", ["missing", "bounds"]].tolist() == [1, 1]
+    flagged = qa["flags"].xs("gdp_nominal", level="metric_id")
+    assert flagged.loc[pd.Period("2010", "Y"), "jump"]
+
+def test_incremental_qa_rechecks_only_tail_and_matches_batch():
+    from dsa.metrics import all_metrics_definition
+    from dsa.timeseries import DataManager
+    from dsa.validation import IncrementalQA, run_qa
+    rng = np.random.default_rng(1)
+    months = pd.period_range("2000-01", "2020-12", freq="M").astype(str)
+    cpi = pd.Series(100 * np.cumprod(1.002 + 0.003 * rng.standard_normal(len(months))), index=months)
+    dm = DataManager(all_metrics_definition())
+    dm.set_user_freq("cpi", "monthly")
+    qa = IncrementalQA()
+    dm.add_series("cpi", cpi.iloc[:200], "index_2015_100")
+    qa.update(dm)
+    revised = cpi.iloc[:230].copy()
+    revised.iloc[210] *= 1.3
+    dm.add_series("cpi", revised, "index_2015_100")
+    out = qa.update(dm)
+    assert qa.recomputed["cpi"] == 30
+    ref = run_qa(dm)
+    assert out["flags"].equals(ref["flags"])
+    assert np.isclose(out["summary"]["std"].iloc[0], ref["summary"]["std"].iloc[0])
+    qa.update(dm)
+    assert qa.recomputed["cpi"] == 0
+
+def test_reconcile_sfa_native_monthly_and_across_vintages():
+    from dsa.validation import reconcile_sfa, sfa_vintages
+    from dsa.vintages import VintageStore
+    rng = np.random.default_rng(0)
+    months = pd.period_range("2015-01", "2020-06", freq="M")
+    psnb = pd.Series(5 + rng.standard_normal(len(months)), index=months)
+    sfa = 0.3 * rng.standard_normal(len(months))
+    sfa[40] = 15.0
+    psnd = pd.Series(1500 + np.cumsum(psnb.to_numpy() + sfa), index=months)
+    rec = reconcile_sfa(psnd, psnb)
+    assert np.allclose(rec["sfa"].to_numpy(), sfa[1:])
+    assert list(rec.index[rec["anomaly"].to_numpy()]) == [months[40]]
+    # Quarterly borrowing: debt taken at quarter end, flows summed
+    psnb_q = psnb.groupby(months.asfreq("Q")).sum()
+    rec_q = reconcile_sfa(psnd, psnb_q)
+    assert np.allclose(rec_q["sfa"].to_numpy(), pd.Series(sfa, index=months).groupby(months.asfreq("Q")).sum().to_numpy()[1:])
+    store = VintageStore()
+    store.add("psnd_ex", psnd.iloc[:-6], pd.Timestamp("2020-01-01"))
+    store.add("psnb_ex", psnb.iloc[:-6], pd.Timestamp("2020-01-02"))
+    store.add("psnb_ex", psnb, pd.Timestamp("2020-07-02"))
+    store.add("psnd_ex", psnd, pd.Timestamp("2020-07-03"))
+    out = sfa_vintages(store)
+    assert out["sfa"].shape[0] == 3
+    assert np.allclose(out["sfa"].iloc[-1].dropna().to_numpy(), sfa[1:])
+
+def test_sfa_vintages_with_reentered_frequency_and_unsorted_timestamps():
+    from dsa.metrics import all_metrics_definition
+    from dsa.timeseries import DataManager
+    from dsa.validation import sfa_vintages
+    quarters = pd.period_range("2015Q1", "2019Q4", freq="Q")
+    psnb_q = pd.Series(10.0, index=quarters)
+    psnd_q = pd.Series(1000.0 + 10.0 * np.arange(1, len(quarters) + 1), index=quarters)
+    years = pd.period_range("2015", "2019", freq="Y")
+    dm = DataManager(all_metrics_definition())
+    # Entered yearly first, then re-entered quarterly with an earlier (explicit) timestamp
+    dm.add_series("psnd_ex", psnd_q.groupby(quarters.asfreq("Y")).last().set_axis(years), "bn_gbp", "yearly", vintage_ts=pd.Timestamp("2020-03-01"))
+    dm.add_series("psnb_ex", psnb_q.groupby(quarters.asfreq("Y")).sum().set_axis(years) + 1.0, "bn_gbp", "yearly", vintage_ts=pd.Timestamp("2020-03-02"))
+    dm.add_series("psnd_ex", psnd_q, "bn_gbp", "quarterly", vintage_ts=pd.Timestamp("2020-01-01"))
+    dm.add_series("psnb_ex", psnb_q, "bn_gbp", "quarterly", vintage_ts=pd.Timestamp("2020-01-02"))
+    assert dm.vintages.revision_triangle("psnd_ex", how="last").shape[0] == 2
+    out = sfa_vintages(dm.vintages)
+    # Events in time order at the coarsest frequency: quarterly pair (SFA 0), yearly debt with quarterly
+    # borrowing (still 0), then the yearly pair whose borrowing is 1 higher per year
+    assert out["sfa"].shape[0] == 3 and out["sfa"].columns.freqstr.startswith("Y")
+    assert np.allclose(out["sfa"].iloc[:2].to_numpy(), 0.0)
+    assert np.allclose(out["sfa"].iloc[-1].to_numpy(), -1.0)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from dsa.vintages import VintageStore
+
+def test_vintages_dedupe_blocks_and_reconstruct_as_of():
+    vs = VintageStore(block_size=8)
+    idx = pd.period_range("2000Q1", periods=40, freq="Q")
+    s1 = pd.Series(np.arange(40.0), index=idx)
+    s2 = s1.copy()
+    s2.iloc[-1] += 1.0
+    vs.add("psnd_ex", s1.iloc[:36], timestamp="2025-01-01", label="v1")
+    vs.add("psnd_ex", s1.iloc[:36], timestamp="2025-01-02")  # unchanged: no new vintage
+    vs.add("psnd_ex", s2, timestamp="2025-02-01", label="v2")
+    assert len(vs.history["psnd_ex"]) == 2
+    assert len(vs.blocks) == 6  # 5 blocks of v1, only the tail block differs
+    assert vs.get("psnd_ex", "2025-01-15").equals(s1.iloc[:36])
+    tri = vs.revision_triangle("psnd_ex")
+    assert tri.shape == (2, 40)
+    assert np.isnan(tri.loc["v1"].iloc[-1]) and tri.loc["v2"].iloc[-1] == 40.0
+
+def test_revision_triangle_with_mixed_frequencies_and_observed_nan():
+    vs = VintageStore(block_size=8)
+    y = pd.Series([10.0, 20.0, 30.0], index=pd.period_range("2020", periods=3, freq="Y"))
+    q = pd.Series(np.arange(1.0, 11.0), index=pd.period_range("2020Q1", periods=10, freq="Q"))
+    vs.add("psnb_ex", y, timestamp="2025-01-01", label="yearly")
+    vs.add("psnb_ex", q, timestamp="2025-02-01", label="quarterly")
+    tri = vs.revision_triangle("psnb_ex", how="sum")
+    assert list(tri.index) == ["yearly", "quarterly"] and tri.columns.freqstr.startswith("Q")
+    # Yearly flows split evenly over quarters
+    assert np.allclose(tri.loc["yearly", "2021Q1":"2021Q4"], 5.0)
+    vs.add("psnb_ex", y * 2, timestamp="2025-03-01", label="yearly again")
+    tri = vs.revision_triangle("psnb_ex", how="sum")
+    # Quarterly vintage summed to years; the half-covered 2022 is not a complete year
+    assert tri.loc["quarterly", pd.Period("2021", "Y")] == 5 + 6 + 7 + 8 and np.isnan(tri.loc["quarterly", pd.Period("2022", "Y")])
+    assert len(vs.revisions("psnb_ex", how="sum")) == 3
+    # Observed NaN round-trips as a present period
+    s = pd.Series([1.0, np.nan, 3.0], index=pd.period_range("2020", periods=3, freq="Y"))
+    vs.add("gdp_nominal", s, timestamp="2025-01-01")
+    back = vs.get("gdp_nominal")
+    assert len(back) == 3 and np.isnan(back.iloc[1])
+
+def test_vintages_added_out_of_timestamp_order():
+    vs = VintageStore()
+    idx = pd.period_range("2020", periods=3, freq="Y")
+    vs.add("x", pd.Series([1.0, 2.0, 3.0], index=idx), timestamp="2024-03-01", label="mar")
+    vs.add("x", pd.Series([1.0, 2.0, 2.5], index=idx), timestamp="2024-01-01", label="jan")
+    assert vs.select("x", "2024-04-01").label == "mar"
+    assert vs.select("x", "2024-02-01").label == "jan"
+    assert vs.select("x", "2023-12-31") is None and vs.select("x").label == "mar"
+    assert list(vs.revision_triangle("x").index) == ["jan", "mar"]
+    # Same content as the vintage current at that time is not a new vintage
+    assert vs.add("x", pd.Series([1.0, 2.0, 2.5], index=idx), timestamp="2024-02-01").label == "jan"
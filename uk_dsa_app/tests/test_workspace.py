@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from dsa.metrics import all_metrics_definition
+from dsa.timeseries import DataManager
+from dsa.workspace import save_workspace, load_workspace
+
+def test_workspace_roundtrip(tmp_path):
+    dm = DataManager(all_metrics_definition())
+    dm.add_series("gdp_nominal", pd.Series([100.0, 104.0, 108.0], index=[2020, 2021, 2022]), "bn_gbp", "yearly")
+    dm.add_series("psnd_ex", pd.Series(np.linspace(80, 90, 36), index=pd.period_range("2020-01", periods=36, freq="M")), "bn_gbp", "monthly")
+    paths = np.random.default_rng(0).random((100, 8))
+    ms = {"horizon_end": 2035, "b_ratio": dm.get_series("debt_ratio"), "mc_paths": paths}
+    save_workspace(str(tmp_path), dm, ms)
+    dm2, ms2 = load_workspace(str(tmp_path), all_metrics_definition())
+    assert dm2.get_series("psnd_ex").equals(dm.get_series("psnd_ex"))
+    assert dm2.get_series("debt_ratio").equals(dm.get_series("debt_ratio"))
+    assert ms2["horizon_end"] == 2035
+    assert np.array_equal(ms2["mc_paths"], paths)
+
+def test_workspace_keeps_vintages(tmp_path):
+    dm = DataManager(all_metrics_definition())
+    s = pd.Series([100.0, 104.0, 108.0], index=[2020, 2021, 2022])
+    dm.add_series("gdp_nominal", s, "bn_gbp", "yearly", vintage_ts="2025-01-01")
+    dm.add_series("gdp_nominal", s * 1.01, "bn_gbp", "yearly", vintage_ts="2025-02-01")
+    save_workspace(str(tmp_path), dm, {})
+    dm2, _ = load_workspace(str(tmp_path), all_metrics_definition())
+    assert dm2.vintages.revision_triangle("gdp_nominal").equals(dm.vintages.revision_triangle("gdp_nominal"))
+
+def test_workspace_zip_extract_dir_removed_with_data_manager(tmp_path):
+    import gc
+    import glob
+    import os
+    import tempfile
+    import pytest
+    from dsa.workspace import workspace_from_zip_bytes, workspace_to_zip_bytes
+    dm = DataManager(all_metrics_definition())
+    dm.add_series("gdp_nominal", pd.Series([100.0, 104.0, 108.0], index=[2020, 2021, 2022]), "bn_gbp", "yearly")
+    data = workspace_to_zip_bytes(dm, {"mc_paths": np.ones((10, 4))})
+    before = set(glob.glob(os.path.join(tempfile.gettempdir(), "dsa_ws_*")))
+    dm2, ms2 = workspace_from_zip_bytes(data, all_metrics_definition())
+    created = set(glob.glob(os.path.join(tempfile.gettempdir(), "dsa_ws_*"))) - before
+    assert len(created) == 1 and dm2.get_series("gdp_nominal").equals(dm.get_series("gdp_nominal"))
+    del dm2, ms2
+    gc.collect()
+    assert not os.path.exists(created.pop())
+    with pytest.raises(Exception):
+        workspace_from_zip_bytes(b"not a zip", all_metrics_definition())
+    assert set(glob.glob(os.path.join(tempfile.gettempdir(), "dsa_ws_*"))) == before